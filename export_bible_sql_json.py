@@ -8,18 +8,36 @@
 默认优先读取 bible-db/CG.db（即主库 main.db）。
 如需从 SQL dump 导出，请显式传入 --sql-dump。
 输出默认到 output/data-sql/，避免覆盖现有 src/static/data/。
+
+输出为紧凑 JSON（无缩进）。导出后在输出目录写入 .bible-export.json，记录数据源的
+大小 / 修改时间 / sha256、导出器版本与导出选项；再次运行时若数据源、版本、选项均未变化
+且三份 JSON 都在，直接跳过（--force 强制重新导出）。
+
+另按书卷分卷输出到 bible/ 子目录，供前端只下载用到的书卷：
+- bible/text/<卷号>.json、bible/notes/<卷号>.json、bible/xrefs/<卷号>.json
+  （与整本文件同格式，只含该卷；没有条目的分卷不生成）
+- bible/index.json  {"version": 1, "books": {"创": {"index": 1, "text": {"file", "count", "size", "hash"}, ...}}}
+  hash 为分卷内容 sha256 的前 16 位，前端据此给分卷 URL 加版本参数。
+
+以及 bible-text.bin：与 bible-text.json 内容相同的二进制经文存储（见 src/verse_store.py），
+供构建期按键 / 按经节区间查询，mmap 只读打开，无需整本 json.load。
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import os
 import re
 import sqlite3
 from collections import defaultdict
 from dataclasses import dataclass
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.hashing import file_sha256
+from src.verse_store import VerseStoreWriter
 
 
 HERE = Path(__file__).resolve().parent
@@ -30,6 +48,16 @@ DEFAULT_SQLITE_DB_CANDIDATES = [
 ]
 DEFAULT_OUT_DIR = HERE / "output" / "data-sql"
 
+# 输出格式或导出逻辑变化时递增，使已有输出失效
+EXPORTER_VERSION = 4
+STAMP_FILE = ".bible-export.json"
+SHARD_DIR = "bible"
+SHARD_KINDS = ("text", "notes", "xrefs")
+SHARD_INDEX_FILE = SHARD_DIR + "/index.json"
+SHARD_INDEX_VERSION = 1
+VERSE_STORE_FILE = "bible-text.bin"
+OUTPUT_FILES = ("bible-text.json", "bible-notes.json", "bible-xrefs.json", SHARD_INDEX_FILE, VERSE_STORE_FILE)
+
 
 def resolve_default_sqlite_db() -> Optional[Path]:
     for p in DEFAULT_SQLITE_DB_CANDIDATES:
@@ -195,10 +223,16 @@ def build_book_token_map(book_map: Dict[int, str]) -> Dict[str, str]:
     return token_map
 
 
-def normalize_xrefs(raw: str, token_map: Dict[str, str]) -> str:
+def sorted_book_tokens(token_map: Dict[str, str]) -> List[str]:
+    """书卷 token 从长到短排序（批量归一时只需算一次）。"""
+    return sorted(token_map.keys(), key=len, reverse=True)
+
+
+def normalize_xrefs(raw: str, token_map: Dict[str, str], tokens: Optional[List[str]] = None) -> str:
     """将串珠原文尽量归一为 '书1:1,书1:2' 形式。
 
     注意：该归一是启发式，复杂写法（如多重区间、夹注）可能仍保留原貌。
+    tokens 为 sorted_book_tokens(token_map) 的结果，不传时现算。
     """
     if not raw:
         return ""
@@ -220,7 +254,8 @@ def normalize_xrefs(raw: str, token_map: Dict[str, str]) -> str:
     cur_chapter: Optional[int] = None
 
     # 从长到短匹配书卷 token
-    tokens = sorted(token_map.keys(), key=len, reverse=True)
+    if tokens is None:
+        tokens = sorted_book_tokens(token_map)
 
     for part in parts:
         p = re.sub(r"^[参见]\s*", "", part)
@@ -342,166 +377,320 @@ def apply_markers(
 ) -> str:
     """将 {seq} / [letter] 按 location 插入经文中。
 
-    location 按 1-based 解释：插入在第 location 个字符前。
+    location 按 1-based 解释：插入在第 location 个字符前；超出文本长度的标记附加在末尾。
+    同一位置注解在串珠之前，同类标记保持传入顺序。
     """
     if not verse_text:
         return verse_text
 
-    events: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+    events = [(int(loc), 0, "{" + str(seq) + "}") for loc, seq in note_rows
+              if loc is not None and seq is not None]
+    events += [(int(loc), 1, "[" + str(letter) + "]") for loc, letter in bead_rows
+               if loc is not None and letter is not None]
+    if not events:
+        return verse_text
+    # 稳定排序：同位置、同优先级的标记保持传入顺序
+    events.sort(key=lambda e: (e[0], e[1]))
 
-    for location, seq in note_rows:
-        if location is None or seq is None:
-            continue
-        events[int(location)].append((0, "{" + str(seq) + "}"))
+    n = len(verse_text)
+    out: List[str] = []
+    pos = 0
+    for loc, _prio, token in events:
+        if loc < 1:
+            continue  # 位置非法（≤0）的标记丢弃
+        cut = loc - 1 if loc <= n else n
+        if cut > pos:
+            out.append(verse_text[pos:cut])
+            pos = cut
+        out.append(token)
+    out.append(verse_text[pos:])
+    return "".join(out)
 
-    for location, letter in bead_rows:
-        if location is None or letter is None:
-            continue
-        events[int(location)].append((1, "[" + str(letter) + "]"))
 
-    chars = list(verse_text)
-    out: List[str] = []
+def write_json_compact(path: Path, data) -> None:
+    """写出紧凑 JSON（先写临时文件再替换，中途失败不留下半截文件）。"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
 
-    # i 为当前“将要输出的字符”位置（1-based）
-    for i, ch in enumerate(chars, start=1):
-        if i in events:
-            for _prio, token in sorted(events[i], key=lambda x: x[0]):
-                out.append(token)
-        out.append(ch)
 
-    # 若有超出文本长度的标记，附加在末尾
-    tail_positions = [p for p in events.keys() if p > len(chars)]
-    for p in sorted(tail_positions):
-        for _prio, token in sorted(events[p], key=lambda x: x[0]):
-            out.append(token)
+# ── 导出戳：数据源未变化时跳过 ──────────────────────────────────────────────
 
-    return "".join(out)
+
+def load_stamp(out_dir: Path) -> dict:
+    try:
+        with open(out_dir / STAMP_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def source_fingerprint(source: Path, stamp: dict) -> dict:
+    """数据源指纹 {size, mtime_ns, sha256}；大小与修改时间都和上次相同时沿用上次的 sha256。"""
+    st = source.stat()
+    prev = stamp.get("source") or {}
+    if prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns and prev.get("sha256"):
+        digest = prev["sha256"]
+    else:
+        digest = file_sha256(source)
+    return {"path": str(source), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+
+
+def is_export_current(stamp: dict, fingerprint: dict, out_dir: Path, normalize_xref: bool) -> bool:
+    """导出器版本、数据源 sha256、导出选项都与上次一致，且输出文件完好。"""
+    if stamp.get("exporter_version") != EXPORTER_VERSION:
+        return False
+    if (stamp.get("source") or {}).get("sha256") != fingerprint["sha256"]:
+        return False
+    if stamp.get("normalize_xrefs") != normalize_xref:
+        return False
+    sizes = stamp.get("outputs") or {}
+    for name in OUTPUT_FILES:
+        p = out_dir / name
+        if not p.exists() or p.stat().st_size != sizes.get(name):
+            return False
+    return True
+
+
+def write_stamp(out_dir: Path, fingerprint: dict, normalize_xref: bool) -> None:
+    stamp = {
+        "exporter_version": EXPORTER_VERSION,
+        "source": fingerprint,
+        "normalize_xrefs": normalize_xref,
+        "outputs": {name: (out_dir / name).stat().st_size for name in OUTPUT_FILES},
+    }
+    write_json_compact(out_dir / STAMP_FILE, stamp)
+
+
+class JsonObjectWriter:
+    """逐项写出一个紧凑 JSON 对象（与 json.dump(..., separators=(",", ":")) 输出相同）。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.tmp = path.with_name(path.name + ".tmp")
+        self.f = open(self.tmp, "w", encoding="utf-8")
+        self.f.write("{")
+        self.count = 0
+
+    _encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def add(self, key: str, value) -> None:
+        encode = self._encode
+        self.f.write(("," if self.count else "") + encode(key) + ":" + encode(value))
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.write("}")
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except OSError:
+            pass
+
+
+class BookShardWriter:
+    """按书卷分卷写出 text / notes / xrefs，全部写完后汇总成 bible/index.json。"""
+
+    def __init__(self, out_dir: Path):
+        self.root = out_dir / SHARD_DIR
+        for kind in SHARD_KINDS:
+            (self.root / kind).mkdir(parents=True, exist_ok=True)
+        self.books: Dict[str, dict] = {}
+        self.book: Optional[Tuple[int, str]] = None
+        self.writers: Dict[str, JsonObjectWriter] = {}
+
+    def start_book(self, book_index: int, abbr: str) -> None:
+        self.finish_book()
+        self.book = (book_index, abbr)
+        self.writers = {kind: JsonObjectWriter(self.root / kind / f"{book_index}.json") for kind in SHARD_KINDS}
+
+    def add(self, kind: str, key: str, value) -> None:
+        self.writers[kind].add(key, value)
+
+    def finish_book(self) -> None:
+        if self.book is None:
+            return
+        book_index, abbr = self.book
+        entry: dict = {"index": book_index}
+        for kind, w in self.writers.items():
+            w.close()
+            if not w.count:
+                os.remove(w.path)
+                continue
+            entry[kind] = {
+                "file": f"{kind}/{book_index}.json",
+                "count": w.count,
+                "size": w.path.stat().st_size,
+                "hash": file_sha256(w.path)[:16],
+            }
+        self.books[abbr] = entry
+        self.book = None
+        self.writers = {}
+
+    def close(self) -> None:
+        self.finish_book()
+        # 清理上次导出遗留、本次已不存在的分卷
+        keep = {e[kind]["file"] for e in self.books.values() for kind in SHARD_KINDS if kind in e}
+        for kind in SHARD_KINDS:
+            for p in (self.root / kind).glob("*.json"):
+                if f"{kind}/{p.name}" not in keep:
+                    p.unlink()
+        write_json_compact(self.root / "index.json", {"version": SHARD_INDEX_VERSION, "books": self.books})
+
+    def abort(self) -> None:
+        for w in self.writers.values():
+            w.abort()
+        self.book = None
+        self.writers = {}
+
+
+def _group_by_verse(rows: Iterable[tuple]) -> Iterator[Tuple[Tuple[int, int, int], List[tuple]]]:
+    """按 (book_index, chapter, section) 分组已排序的行。"""
+    for key, group in groupby(rows, key=lambda r: (int(r[0]), int(r[1]), int(r[2]))):
+        yield key, list(group)
+
+
+def _merge_by_verse(*streams: Iterator[Tuple[Tuple[int, int, int], List[tuple]]]):
+    """多路有序归并：按经节顺序产出 (VerseKey, [各路该经节的行，没有则为空列表])。"""
+    heads = [next(s, None) for s in streams]
+    while True:
+        keys = [h[0] for h in heads if h is not None]
+        if not keys:
+            return
+        key = min(keys)
+        groups = []
+        for i, h in enumerate(heads):
+            if h is not None and h[0] == key:
+                groups.append(h[1])
+                heads[i] = next(streams[i], None)
+            else:
+                groups.append([])
+        yield VerseKey(*key), groups
+
+
+_FLAG_SUFFIX = {1: "上", 2: "下", 3: "中"}
 
 
 def export_json(conn: sqlite3.Connection, out_dir: Path, normalize_xref: bool) -> None:
+    """单遍导出：三张表按经节顺序流式读取、归并，三份 JSON 边算边写。"""
     out_dir.mkdir(parents=True, exist_ok=True)
 
     book_map = load_book_acronym_map(conn)
     token_map = build_book_token_map(book_map)
+    tokens = sorted_book_tokens(token_map)
 
-    # 预取 footnote / bead
-    footnote_by_flag: Dict[Tuple[int, int, int, int], List[Tuple[int, int]]] = defaultdict(list)
-    notes_by_base: Dict[VerseKey, Dict[str, str]] = defaultdict(dict)
-
-    foot_rows = conn.execute(
+    # 三路游标都按 (book_index, chapter, section, flag) 排序，逐行读取而不是 fetchall
+    foot_rows = conn.cursor().execute(
         """
         SELECT book_index, chapter, section, flag, location, seq, note
         FROM footnote
         ORDER BY book_index, chapter, section, flag, seq, location
         """
-    ).fetchall()
-    for b, ch, sec, flag, loc, seq, note in foot_rows:
-        key_flag = (int(b), int(ch), int(sec), int(flag))
-        if loc is not None and seq is not None:
-            footnote_by_flag[key_flag].append((int(loc), int(seq)))
-
-        if note is not None:
-            note_text = str(note).strip()
-            if note_text:
-                base = VerseKey(int(b), int(ch), int(sec))
-                notes_by_base[base][str(seq)] = note_text
-
-    bead_by_flag: Dict[Tuple[int, int, int, int], List[Tuple[int, str]]] = defaultdict(list)
-    xrefs_by_base: Dict[VerseKey, Dict[str, str]] = defaultdict(dict)
-
-    bead_rows = conn.execute(
+    )
+    bead_rows = conn.cursor().execute(
         """
         SELECT book_index, chapter, section, flag, location, seq, bead
         FROM bead
         ORDER BY book_index, chapter, section, flag, seq, location
         """
-    ).fetchall()
-    for b, ch, sec, flag, loc, seq, bead_text in bead_rows:
-        key_flag = (int(b), int(ch), int(sec), int(flag))
-        if loc is not None and seq is not None:
-            bead_by_flag[key_flag].append((int(loc), str(seq)))
-
-        if bead_text is not None:
-            text = str(bead_text).strip()
-            if text:
-                base = VerseKey(int(b), int(ch), int(sec))
-                if normalize_xref:
-                    text = normalize_xrefs(text, token_map)
-                xrefs_by_base[base][str(seq)] = text
-
-    # 导出 text
-    bible_text: Dict[str, str] = {}
-    content_rows = conn.execute(
+    )
+    content_rows = conn.cursor().execute(
         """
         SELECT book_index, chapter, section, flag, content
         FROM content
         ORDER BY book_index, chapter, section, flag
         """
-    ).fetchall()
-
-    for b, ch, sec, flag, content in content_rows:
-        b = int(b)
-        ch = int(ch)
-        sec = int(sec)
-        flag = int(flag)
-        verse = str(content or "")
-
-        suffix = ""
-        if flag == 1:
-            suffix = "上"
-        elif flag == 2:
-            suffix = "下"
-        elif flag == 3:
-            suffix = "中"
-
-        book_abbr = book_map.get(b, str(b))
-        key = f"{book_abbr}{ch}:{sec}{suffix}"
-
-        # 文本标记只按同 flag 注入，另兼容 flag=0 的公共标记。
-        note_rows = list(footnote_by_flag.get((b, ch, sec, flag), []))
-        if flag != 0:
-            note_rows.extend(footnote_by_flag.get((b, ch, sec, 0), []))
-
-        bead_rows2 = list(bead_by_flag.get((b, ch, sec, flag), []))
-        if flag != 0:
-            bead_rows2.extend(bead_by_flag.get((b, ch, sec, 0), []))
-
-        bible_text[key] = apply_markers(verse, note_rows, bead_rows2)
-
-    # 导出 notes/xrefs：统一使用 base key（不带 上/下）
-    bible_notes: Dict[str, Dict[str, str]] = {}
-    for base, seq_map in notes_by_base.items():
-        if not seq_map:
-            continue
-        book_abbr = book_map.get(base.book_index, str(base.book_index))
-        key = f"{book_abbr}{base.chapter}:{base.section}"
-        sorted_items = sorted(seq_map.items(), key=lambda kv: int(kv[0]))
-        bible_notes[key] = [v for _, v in sorted_items]
-
-    bible_xrefs: Dict[str, Dict[str, str]] = {}
-    for base, seq_map in xrefs_by_base.items():
-        if not seq_map:
-            continue
-        book_abbr = book_map.get(base.book_index, str(base.book_index))
-        key = f"{book_abbr}{base.chapter}:{base.section}"
-        sorted_items = sorted(seq_map.items(), key=lambda kv: kv[0])
-        bible_xrefs[key] = {k: v for k, v in sorted_items}
+    )
 
     p_text = out_dir / "bible-text.json"
     p_notes = out_dir / "bible-notes.json"
     p_xrefs = out_dir / "bible-xrefs.json"
+    writers = [JsonObjectWriter(p) for p in (p_text, p_notes, p_xrefs)]
+    w_text, w_notes, w_xrefs = writers
+    shards = BookShardWriter(out_dir)
+    store = VerseStoreWriter(out_dir / VERSE_STORE_FILE)
 
-    p_text.write_text(json.dumps(bible_text, ensure_ascii=False, indent=2), encoding="utf-8")
-    p_notes.write_text(json.dumps(bible_notes, ensure_ascii=False, indent=2), encoding="utf-8")
-    p_xrefs.write_text(json.dumps(bible_xrefs, ensure_ascii=False, indent=2), encoding="utf-8")
+    try:
+        for base, (foots, beads, contents) in _merge_by_verse(
+            _group_by_verse(foot_rows), _group_by_verse(bead_rows), _group_by_verse(content_rows)
+        ):
+            book_abbr = book_map.get(base.book_index, str(base.book_index))
+            if shards.book is None or shards.book[0] != base.book_index:
+                shards.start_book(base.book_index, book_abbr)
+            base_key = f"{book_abbr}{base.chapter}:{base.section}"
+
+            # 注解：插入标记按 flag 归类；注解文本按 seq 去重（同 seq 后出现的覆盖）
+            note_marks: Dict[int, List[Tuple[int, int]]] = {}
+            notes: Dict[str, str] = {}
+            for _b, _ch, _sec, flag, loc, seq, note in foots:
+                if loc is not None and seq is not None:
+                    note_marks.setdefault(int(flag), []).append((int(loc), int(seq)))
+                if note is not None:
+                    note_text = str(note).strip()
+                    if note_text:
+                        notes[str(seq)] = note_text
+
+            bead_marks: Dict[int, List[Tuple[int, str]]] = {}
+            xrefs: Dict[str, str] = {}
+            for _b, _ch, _sec, flag, loc, seq, bead_text in beads:
+                if loc is not None and seq is not None:
+                    bead_marks.setdefault(int(flag), []).append((int(loc), str(seq)))
+                if bead_text is not None:
+                    text = str(bead_text).strip()
+                    if text:
+                        if normalize_xref:
+                            text = normalize_xrefs(text, token_map, tokens)
+                        xrefs[str(seq)] = text
+
+            # 经文：只注入同 flag 的标记，另兼容 flag=0 的公共标记
+            common_notes = note_marks.get(0, [])
+            common_beads = bead_marks.get(0, [])
+            for _b, _ch, _sec, flag, content in contents:
+                flag = int(flag)
+                n_rows = note_marks.get(flag, [])
+                b_rows = bead_marks.get(flag, [])
+                if flag != 0:
+                    n_rows = n_rows + common_notes
+                    b_rows = b_rows + common_beads
+                half = _FLAG_SUFFIX.get(flag, "")
+                text = apply_markers(str(content or ""), n_rows, b_rows)
+                w_text.add(base_key + half, text)
+                shards.add("text", base_key + half, text)
+                store.add(base.book_index, book_abbr, base.chapter, base.section, half, text)
+
+            # 注解 / 串珠统一使用 base key（不带 上/下）
+            if notes:
+                note_list = [v for _, v in sorted(notes.items(), key=lambda kv: int(kv[0]))]
+                w_notes.add(base_key, note_list)
+                shards.add("notes", base_key, note_list)
+            if xrefs:
+                xref_map = dict(sorted(xrefs.items()))
+                w_xrefs.add(base_key, xref_map)
+                shards.add("xrefs", base_key, xref_map)
+    except BaseException:
+        for w in writers:
+            w.abort()
+        shards.abort()
+        raise
+    for w in writers:
+        w.close()
+    shards.close()
+    store.close()
 
     def _mb(p: Path) -> float:
         return p.stat().st_size / 1024.0 / 1024.0
 
     print(f"导出完成：{out_dir}")
-    print(f"  bible-text.json   : {len(bible_text)} 节, {_mb(p_text):.2f} MB")
-    print(f"  bible-notes.json  : {len(bible_notes)} 节, {_mb(p_notes):.2f} MB")
-    print(f"  bible-xrefs.json  : {len(bible_xrefs)} 节, {_mb(p_xrefs):.2f} MB")
+    print(f"  bible-text.json   : {w_text.count} 节, {_mb(p_text):.2f} MB")
+    print(f"  bible-notes.json  : {w_notes.count} 节, {_mb(p_notes):.2f} MB")
+    print(f"  bible-xrefs.json  : {w_xrefs.count} 节, {_mb(p_xrefs):.2f} MB")
+    print(f"  {SHARD_DIR}/            : {len(shards.books)} 卷分卷 + index.json")
+    print(f"  {VERSE_STORE_FILE}    : {_mb(out_dir / VERSE_STORE_FILE):.2f} MB")
 
 
 def parse_args() -> argparse.Namespace:
@@ -510,6 +699,7 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--sqlite-db", type=Path, default=None, help="直接读取 sqlite db 文件；提供时优先于 --sql-dump")
     p.add_argument("--out-dir", type=Path, default=DEFAULT_OUT_DIR, help="输出目录（默认 output/data-sql）")
     p.add_argument("--normalize-xrefs", action="store_true", help="启用串珠文本归一（启发式）")
+    p.add_argument("--force", action="store_true", help="忽略导出戳，强制重新导出")
     return p.parse_args()
 
 
@@ -521,14 +711,26 @@ def main() -> None:
 
     if sqlite_db is not None:
         print(f"数据源：SQLite DB -> {sqlite_db}")
+        source = sqlite_db
     else:
         print(f"数据源：SQL dump -> {args.sql_dump}")
+        source = args.sql_dump
+
+    fingerprint = None
+    if source is not None and source.exists():
+        stamp = load_stamp(args.out_dir)
+        fingerprint = source_fingerprint(source, stamp)
+        if not args.force and is_export_current(stamp, fingerprint, args.out_dir, args.normalize_xrefs):
+            print(f"数据源未变化（sha256 {fingerprint['sha256'][:12]}），跳过导出：{args.out_dir}")
+            return
 
     conn = open_db(args.sql_dump, sqlite_db)
     try:
         export_json(conn, args.out_dir, normalize_xref=args.normalize_xrefs)
     finally:
         conn.close()
+    if fingerprint is not None:
+        write_stamp(args.out_dir, fingerprint, args.normalize_xrefs)
 
 
 if __name__ == "__main__":
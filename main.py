@@ -12,9 +12,14 @@ import base64
 import hashlib
 import subprocess
 from datetime import datetime
-from src.parser_improved import parse_training_docs_improved
-from src.generator import export_training_json, generate_search_index_from_json
+from src.parser_improved import collect_outline_verses, parse_training_docs_improved
+from src.generator import (TRAINING_INDEX_FILE, TRAINING_SHARD_DIR, export_training_json,
+                           generate_search_index_from_json, write_training_shards)
 from src.bible_dict import BibleDict
+from src.hashing import file_sha256
+from src.node_worker import NodeWorkerError, close_node_worker, get_node_worker
+from src.build_profile import PROFILE_DIR, PROFILE_FILE, get_profiler, profile_span, reset_profiler
+from src.scripture_refs import ref_cache
 
 
 def generate_pages_middleware(config, project_root='.'):
@@ -471,6 +476,69 @@ def url_safe_name(name):
     return safe if safe else name
 
 
+_patch_hymn_module = None
+
+
+def run_hymn_patch(patch_script, output_dir, batch_folder):
+    """
+    在当前进程内执行 tools/patch-hymn-from-word.py 的 patch_training_json。
+
+    省去单独启动 Python 解释器、重新导入解析器的开销；晨兴文档经 ImprovedParser 的
+    文档缓存读取，每份只解析一次。脚本的 stderr 日志缩进后并入批次日志。
+
+    Returns:
+        诗歌补丁摘要 dict；失败返回 None。
+    """
+    global _patch_hymn_module
+    import io
+    import importlib.util
+    from contextlib import redirect_stderr
+
+    buf = io.StringIO()
+    hymn_meta = None
+    error = None
+    try:
+        if _patch_hymn_module is None:
+            spec = importlib.util.spec_from_file_location('patch_hymn_from_word', patch_script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _patch_hymn_module = module
+        with redirect_stderr(buf), profile_span('hymn-patch'):
+            hymn_meta = _patch_hymn_module.patch_training_json(output_dir, batch_folder)
+    except Exception as e:
+        error = e
+    for line in buf.getvalue().strip().split('\n'):
+        if line:
+            print(f"  {line}")
+    if error is not None:
+        print(f"  ⚠ 诗歌补丁异常: {error}")
+    return hymn_meta
+
+
+def call_node_worker(method, params, label):
+    """
+    通过常驻 Node 进程（tools/node-worker.js）执行构建请求，日志缩进打印。
+
+    Returns:
+        成功时返回 Node 端结果，失败返回 None。
+    """
+    try:
+        with profile_span(f'node:{method}'):
+            result, log = get_node_worker().call(method, params)
+    except NodeWorkerError as e:
+        for line in e.log:
+            print(f"  {line}")
+        print(f"✗ {label} 解析失败: {e}")
+        return None
+    except Exception as e:
+        print(f"✗ {label} 解析进程异常: {e}")
+        return None
+
+    for line in log:
+        print(f"  {line}")
+    return result
+
+
 def process_batch_txt(batch_folder, config, batch_config, safe_batch_name, txt_file=None):
     """
     使用 TXT 文件（优先）生成 training.json，调用 Node.js 脚本。
@@ -490,47 +558,17 @@ def process_batch_txt(batch_folder, config, batch_config, safe_batch_name, txt_f
         print(f"⚠ 未找到 TXT 构建脚本: {_build_txt}")
         return None
 
-    cmd = [
-        'node', _build_txt,
-        '--folder', batch_folder,
-        '--output', output_dir,
-    ]
+    params = {'folder': batch_folder, 'output': output_dir}
     if txt_file:
-        cmd.extend(['--txt', txt_file])
+        params['txt'] = txt_file
     if batch_config.get('year'):
-        cmd.extend(['--year', str(batch_config['year'])])
+        params['year'] = str(batch_config['year'])
     if batch_config.get('season'):
-        cmd.extend(['--season', str(batch_config['season'])])
+        params['season'] = str(batch_config['season'])
 
     print(f"  调用 Node.js 解析 TXT 文件...")
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-        )
-    except Exception as e:
-        print(f"✗ TXT 解析进程异常: {e}")
-        return None
-
-    # stderr 输出人类可读日志
-    if result.stderr:
-        for line in result.stderr.strip().split('\n'):
-            print(f"  {line}")
-
-    if result.returncode != 0:
-        print(f"✗ TXT 解析失败 (exit {result.returncode})")
-        if result.stdout:
-            print(f"  stdout: {result.stdout[:200]}")
-        return None
-
-    # stdout 是元数据 JSON
-    try:
-        meta = json.loads(result.stdout.strip())
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"✗ 无法解析 TXT 脚本输出: {e}")
+    meta = call_node_worker('build-batch-txt', params, 'TXT')
+    if meta is None:
         return None
 
     print(f"✓ TXT 解析完成: {meta.get('chapter_count', 0)} 篇章")
@@ -539,44 +577,13 @@ def process_batch_txt(batch_folder, config, batch_config, safe_batch_name, txt_f
     _patch_hymn = os.path.join(os.path.dirname(__file__), 'tools', 'patch-hymn-from-word.py')
     if os.path.exists(_patch_hymn):
         print(f"\n  📖 从晨兴 Word 文档提取诗歌内容...")
-        try:
-            _child_env = os.environ.copy()
-            _child_env['PYTHONIOENCODING'] = 'utf-8'
-            hymn_result = subprocess.run(
-                [sys.executable, _patch_hymn,
-                 '--output-dir', output_dir,
-                 '--batch-folder', batch_folder],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=180,
-                env=_child_env,
-            )
-            if hymn_result.stderr:
-                for line in hymn_result.stderr.strip().split('\n'):
-                    print(f"  {line}")
-            if hymn_result.returncode == 0 and hymn_result.stdout.strip():
-                # 从 stdout 中提取 JSON（首行 { 到末行 }），忽略混入的非 JSON 输出
-                _raw = hymn_result.stdout.strip()
-                _json_start = _raw.find('{')
-                _json_end = _raw.rfind('}')
-                if _json_start >= 0 and _json_end > _json_start:
-                    _json_str = _raw[_json_start:_json_end + 1]
-                    hymn_meta = json.loads(_json_str)
-                    patched = hymn_meta.get('patched_chapters', 0)
-                    if patched:
-                        print(f"  ✓ 诗歌数据已合并: {patched}/{hymn_meta.get('total_chapters', 0)} 篇")
-                    else:
-                        print(f"  ⚠ 无诗歌数据需要合并")
-                else:
-                    print(f"  ⚠ 诗歌补丁输出无 JSON，跳过")
-            elif hymn_result.returncode != 0:
-                print(f"  ⚠ 诗歌补丁失败 (exit {hymn_result.returncode})")
-        except subprocess.TimeoutExpired:
-            print(f"  ⚠ 诗歌补丁超时，跳过")
-        except Exception as e:
-            print(f"  ⚠ 诗歌补丁异常: {e}")
+        hymn_meta = run_hymn_patch(_patch_hymn, output_dir, batch_folder)
+        if hymn_meta is not None:
+            patched = hymn_meta.get('patched_chapters', 0)
+            if patched:
+                print(f"  ✓ 诗歌数据已合并: {patched}/{hymn_meta.get('total_chapters', 0)} 篇")
+            else:
+                print(f"  ⚠ 无诗歌数据需要合并")
 
         # ── 回退：若 training.json 中 hymn_images 为空但磁盘有 hymn_*.png，则自动补充 ──
         _training_json = os.path.join(output_dir, 'training.json')
@@ -687,46 +694,15 @@ def process_batch_epub(batch_folder, config, batch_config, safe_batch_name, epub
         print(f"⚠ 未找到 EPUB 构建脚本: {_build_epub}")
         return None
 
-    cmd = [
-        'node', _build_epub,
-        '--epub', epub_file,
-        '--folder', batch_folder,
-        '--output', output_dir,
-    ]
+    params = {'epub': epub_file, 'folder': batch_folder, 'output': output_dir}
     if batch_config.get('year'):
-        cmd.extend(['--year', str(batch_config['year'])])
+        params['year'] = str(batch_config['year'])
     if batch_config.get('season'):
-        cmd.extend(['--season', str(batch_config['season'])])
+        params['season'] = str(batch_config['season'])
 
     print(f"  调用 Node.js 解析 EPUB 文件...")
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-        )
-    except Exception as e:
-        print(f"✗ EPUB 解析进程异常: {e}")
-        return None
-
-    # stderr 输出人类可读日志
-    if result.stderr:
-        for line in result.stderr.strip().split('\n'):
-            print(f"  {line}")
-
-    if result.returncode != 0:
-        print(f"✗ EPUB 解析失败 (exit {result.returncode})")
-        if result.stdout:
-            print(f"  stdout: {result.stdout[:200]}")
-        return None
-
-    # stdout 是元数据 JSON
-    try:
-        meta = json.loads(result.stdout.strip())
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"✗ 无法解析 EPUB 脚本输出: {e}")
+    meta = call_node_worker('build-batch-epub', params, 'EPUB')
+    if meta is None:
         return None
 
     print(f"✓ EPUB 解析完成: {meta.get('chapter_count', 0)} 篇章")
@@ -735,43 +711,13 @@ def process_batch_epub(batch_folder, config, batch_config, safe_batch_name, epub
     _patch_hymn = os.path.join(os.path.dirname(__file__), 'tools', 'patch-hymn-from-word.py')
     if os.path.exists(_patch_hymn):
         print(f"\n  📖 从晨兴 Word 文档提取诗歌内容（补充 EPUB 缺失的编号和图片）...")
-        try:
-            _child_env = os.environ.copy()
-            _child_env['PYTHONIOENCODING'] = 'utf-8'
-            hymn_result = subprocess.run(
-                [sys.executable, _patch_hymn,
-                 '--output-dir', output_dir,
-                 '--batch-folder', batch_folder],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                timeout=180,
-                env=_child_env,
-            )
-            if hymn_result.stderr:
-                for line in hymn_result.stderr.strip().split('\n'):
-                    print(f"  {line}")
-            if hymn_result.returncode == 0 and hymn_result.stdout.strip():
-                _raw = hymn_result.stdout.strip()
-                _json_start = _raw.find('{')
-                _json_end = _raw.rfind('}')
-                if _json_start >= 0 and _json_end > _json_start:
-                    _json_str = _raw[_json_start:_json_end + 1]
-                    hymn_meta = json.loads(_json_str)
-                    patched = hymn_meta.get('patched_chapters', 0)
-                    if patched:
-                        print(f"  ✓ 诗歌数据已合并: {patched}/{hymn_meta.get('total_chapters', 0)} 篇")
-                    else:
-                        print(f"  ⚠ 无诗歌数据需要合并")
-                else:
-                    print(f"  ⚠ 诗歌补丁输出无 JSON，跳过")
-            elif hymn_result.returncode != 0:
-                print(f"  ⚠ 诗歌补丁失败 (exit {hymn_result.returncode})")
-        except subprocess.TimeoutExpired:
-            print(f"  ⚠ 诗歌补丁超时，跳过")
-        except Exception as e:
-            print(f"  ⚠ 诗歌补丁异常: {e}")
+        hymn_meta = run_hymn_patch(_patch_hymn, output_dir, batch_folder)
+        if hymn_meta is not None:
+            patched = hymn_meta.get('patched_chapters', 0)
+            if patched:
+                print(f"  ✓ 诗歌数据已合并: {patched}/{hymn_meta.get('total_chapters', 0)} 篇")
+            else:
+                print(f"  ⚠ 无诗歌数据需要合并")
     else:
         print(f"  ⚠ 未找到诗歌补丁脚本: {_patch_hymn}")
 
@@ -868,6 +814,9 @@ def process_batch(batch_folder, config, bible_dict: BibleDict = None):
     优先级：EPUB > TXT > Word 文档。
     标语诗歌图片始终从批次文件夹中的图片文件获取（不依赖 Word）。
 
+    bible_dict 为构建前由全部 Word 批次的经文文档汇总的只读字典（见 build_shared_bible_dict），
+    Word 解析使用它的副本：「从略」还原的来源对每个批次相同，与并行调度、构建缓存跳过了哪些批次无关。
+
     Returns:
         成功时返回批次信息 dict，失败返回 None。
     """
@@ -946,18 +895,19 @@ def process_batch(batch_folder, config, bible_dict: BibleDict = None):
 
     output_dir = os.path.join(batch_config['output_dir'], safe_batch_name)
     try:
-        training_data = parse_training_docs_improved(
-            outline_path=scripture_doc,
-            listen_path=listen_doc,
-            morning_revival_path=morning_revival_docs[0] if morning_revival_docs else None,
-            morning_revival_path2=morning_revival_docs[1] if len(morning_revival_docs) > 1 else None,
-            title='',
-            subtitle='',
-            year=batch_config['year'],
-            season=batch_config['season'],
-            output_dir=output_dir,
-            bible_dict=bible_dict
-        )
+        with profile_span('parse-docs'):
+            training_data = parse_training_docs_improved(
+                outline_path=scripture_doc,
+                listen_path=listen_doc,
+                morning_revival_path=morning_revival_docs[0] if morning_revival_docs else None,
+                morning_revival_path2=morning_revival_docs[1] if len(morning_revival_docs) > 1 else None,
+                title='',
+                subtitle='',
+                year=batch_config['year'],
+                season=batch_config['season'],
+                output_dir=output_dir,
+                bible_dict=bible_dict.copy() if bible_dict is not None else BibleDict()
+            )
         print(f"✓ 解析完成: {len(training_data.chapters)} 篇章")
     except Exception as e:
         print(f"✗ 文档解析失败: {e}")
@@ -967,7 +917,8 @@ def process_batch(batch_folder, config, bible_dict: BibleDict = None):
 
     training_version = ''
     try:
-        training_version = export_training_json(training_data, output_dir)
+        with profile_span('export-training-json'):
+            training_version = export_training_json(training_data, output_dir)
     except Exception as e:
         print(f"✗ training.json 生成失败: {e}")
         import traceback
@@ -996,9 +947,342 @@ def process_batch(batch_folder, config, bible_dict: BibleDict = None):
     }
 
 
+# ── 增量构建缓存 ──────────────────────────────────────────────────────────────
+# output/.build-cache.json 记录每个批次全部输入文件的内容哈希与上次的批次结果；
+# 输入未变且 training.json 与上次写出的内容一致（sha256）时直接复用结果，跳过 process_batch。
+
+BUILD_CACHE_FILE = '.build-cache.json'
+BUILD_CACHE_VERSION = 1
+
+# 所有批次共享的输入：批次处理代码（本文件与 _SHARED_BATCH_SOURCE_DIRS 下全部 .py）、
+# Node 常驻进程与构建脚本及其加载的前端模块、应用版本号。
+# 批次处理新增依赖（Node 脚本、前端模块、数据文件）时须同步加入此列表。
+_SHARED_BATCH_INPUTS = [
+    'app_config.json',
+    'main.py',
+    'tools/node-worker.js',
+    'tools/cx-env.js',
+    'tools/build-batch-txt.js',
+    'tools/build-batch-epub.js',
+    'tools/patch-hymn-from-word.py',
+    'src/static/js/txt-importer.js',
+    'src/static/js/epub-importer.js',
+    'src/static/js/ref-detector.js',
+    'src/static/js/training-enricher.js',
+]
+# 整体计入的 Python 源码目录：新增模块（docx_reader / verse_store / scripture_refs ...）自动纳入
+_SHARED_BATCH_SOURCE_DIRS = ['src']
+# 批次读取的圣经数据（output/data 下）：bible-text.bin 优先，缺失时回退 bible-text.json
+_BATCH_BIBLE_DATA = ['bible-text.bin', 'bible-text.json']
+
+
+def collect_batch_inputs(batch_folder, config):
+    """
+    列出一个批次实际读取的全部输入文件。
+
+    包括批次目录下的所有文件（听抄/经文/晨兴文档、EPUB/TXT、标语诗歌图片等）、
+    历史合辑中匹配的 TXT、output/data/bible-text.bin / .json（用于经文过滤）以及共享源码。
+    """
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    inputs = []
+    for fn in sorted(os.listdir(batch_folder)):
+        fp = os.path.join(batch_folder, fn)
+        if os.path.isfile(fp) and not fn.startswith(('.', '~$')):
+            inputs.append(fp)
+
+    resource_dir = config.get('resource_dir', config.get('resource_base_dir', 'resource'))
+    matched_txt = find_matching_txt_in_history(os.path.basename(batch_folder), resource_dir)
+    if matched_txt:
+        inputs.append(matched_txt)
+
+    data_dir = os.path.join(config.get('output_dir', 'output'), 'data')
+    for fn in _BATCH_BIBLE_DATA:
+        inputs.append(os.path.join(data_dir, fn))
+    for rel in _SHARED_BATCH_INPUTS:
+        inputs.append(os.path.join(project_root, rel))
+    for rel in _SHARED_BATCH_SOURCE_DIRS:
+        src_dir = os.path.join(project_root, rel)
+        inputs.extend(os.path.join(src_dir, fn) for fn in sorted(os.listdir(src_dir)) if fn.endswith('.py'))
+    return inputs
+
+
+def hash_input_files(paths):
+    """返回 {输入路径: sha256}；不存在的文件记为空串，使其出现/消失同样触发重建。
+
+    路径相对项目根目录，与运行时的工作目录无关。
+    """
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    hashes = {}
+    for fp in paths:
+        key = os.path.relpath(os.path.abspath(fp), project_root).replace(os.sep, '/')
+        hashes[key] = file_sha256(fp) if os.path.isfile(fp) else ''
+    return hashes
+
+
+def compute_batch_input_hashes(batch_folder, config):
+    """批次全部输入文件的哈希（见 collect_batch_inputs / hash_input_files）。"""
+    return hash_input_files(collect_batch_inputs(batch_folder, config))
+
+
+def find_word_outline_doc(batch_folder, config):
+    """
+    批次走 Word 解析时返回其经文文档路径，否则返回 None。
+
+    选择顺序与 process_batch 一致：EPUB、批次内 TXT、历史合辑中匹配的 TXT 优先。
+    """
+    if find_epub_files_in_folder(batch_folder) or find_txt_files_in_folder(batch_folder):
+        return None
+    resource_dir = config.get('resource_dir', config.get('resource_base_dir', 'resource'))
+    if find_matching_txt_in_history(os.path.basename(batch_folder), resource_dir):
+        return None
+    if not find_document_in_folder(batch_folder, '听抄'):
+        return None
+    return find_document_in_folder(batch_folder, '经文')
+
+
+def build_shared_bible_dict(outline_docs):
+    """
+    汇总全部 Word 批次经文文档中的经文行（按批次顺序，先出现者优先），供各批次「从略」还原。
+
+    字典内容只取决于 outline_docs 的内容，这些文件已计入每个 Word 批次的构建缓存输入，
+    因此结果与并行调度、构建缓存命中情况无关。
+    """
+    bible_dict = collect_outline_verses(outline_docs)
+    print(f"✓ 经文字典: {len(bible_dict)} 节（来自 {len(outline_docs)} 个经文文档）")
+    return bible_dict
+
+
+def load_build_cache(output_root):
+    """读取构建缓存；文件不存在、损坏或版本不符时返回空缓存。"""
+    path = os.path.join(output_root, BUILD_CACHE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == BUILD_CACHE_VERSION and isinstance(data.get('batches'), dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': BUILD_CACHE_VERSION, 'batches': {}}
+
+
+def save_build_cache(output_root, cache):
+    """原子写入构建缓存。"""
+    os.makedirs(output_root, exist_ok=True)
+    path = os.path.join(output_root, BUILD_CACHE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def training_output_hash(output_root, safe_batch_name):
+    """批次输出 training.json 的 sha256；文件不存在时返回空串。"""
+    path = os.path.join(output_root, safe_batch_name, 'training.json')
+    return file_sha256(path) if os.path.isfile(path) else ''
+
+
+def prune_stale_training_dirs(output_root, keep):
+    """删除 output 下不在 keep 中的训练目录（YYYY-NN），返回被删除的目录名。
+
+    generate_main_index 会把 output 下所有 YYYY-NN 目录发布为历史训练；增量构建沿用上次的
+    output 时，批次文件夹或历史年份移出 resource/ 后留下的目录须在此删除，否则会一直被发布。
+    """
+    removed = []
+    if not os.path.isdir(output_root):
+        return removed
+    for entry in sorted(os.listdir(output_root)):
+        if re.match(r'^\d{4}-\d{2}$', entry) and entry not in keep:
+            shutil.rmtree(os.path.join(output_root, entry), ignore_errors=True)
+            removed.append(entry)
+    return removed
+
+
+def lookup_build_cache(cache, safe_batch_name, input_hashes, output_root):
+    """输入哈希完全一致、且 training.json 与上次写出的内容一致时，返回缓存的批次结果，否则返回 None。
+
+    校验输出哈希：training.json 被其他步骤改写或删除（如历史合辑写到同名目录）时重新处理。
+    """
+    entry = cache['batches'].get(safe_batch_name)
+    if not entry or entry.get('inputs') != input_hashes:
+        return None
+    output_hash = entry.get('output')
+    if not output_hash or training_output_hash(output_root, safe_batch_name) != output_hash:
+        return None
+    return entry.get('result')
+
+
+# ── .doc 预转换 ──────────────────────────────────────────────────────────────
+
+def prefetch_doc_conversions(batch_folders):
+    """
+    在处理批次前，把所有待处理批次中的 .doc 一次性交给转换服务。
+
+    同名 .docx 已存在的 .doc 不会被读取，跳过；结果写入按内容哈希的转换缓存，
+    之后各批次（包括并行 worker）读取 .doc 时直接命中缓存，不再单独启动 LibreOffice。
+    """
+    from src.doc_converter import get_converter
+
+    docs = []
+    for folder in batch_folders:
+        for fn in sorted(os.listdir(folder)):
+            base, ext = os.path.splitext(fn)
+            if ext.lower() != '.doc' or fn.startswith('~$'):
+                continue
+            if os.path.exists(os.path.join(folder, base + '.docx')):
+                continue
+            docs.append(os.path.join(folder, fn))
+    if not docs:
+        return
+
+    converter = get_converter()
+    if not converter.soffice_path:
+        return
+    hits_before, conv_before = converter.hits, converter.conversions
+    try:
+        converted = converter.convert_many(docs)
+    except subprocess.TimeoutExpired:
+        print("⚠ .doc 预转换超时，将在解析时逐个转换")
+        return
+    except OSError as e:
+        print(f"⚠ .doc 预转换失败: {e}")
+        return
+    print(f"✓ .doc 转换: {len(converted)}/{len(docs)} 个可用"
+          f"（缓存命中 {converter.hits - hits_before}，新转换 {converter.conversions - conv_before}）")
+    get_profiler().record('doc_convert', hits=converter.hits, conversions=converter.conversions)
+
+
+# ── 并行批次处理 ──────────────────────────────────────────────────────────────
 
-def generate_main_index(config, batch_results):
-    """生成总主页（SPA 模式）：复制 SPA shell、生成 trainings.json 和所有静态资产。"""
+# 进程池 worker 共用的只读经文字典（由 initializer 传入，process_batch 使用其副本）
+_worker_bible_dict = None
+
+
+def _init_batch_worker(bible_dict):
+    """进程池 worker 初始化：接收主进程汇总的经文字典。"""
+    global _worker_bible_dict
+    _worker_bible_dict = bible_dict
+
+
+def profile_batch(batch_folder, config, bible_dict: BibleDict = None, profile_dir=None):
+    """
+    带计时区间执行 process_batch。
+
+    profile_dir 非空时同时用 cProfile 剖析，统计结果写入 <profile_dir>/<批次>.prof
+    （可用 python -m pstats 或 snakeviz 查看）。
+    """
+    batch_name = os.path.basename(batch_folder)
+    refs_before = ref_cache.stats()
+    with profile_span(f'batch:{batch_name}') as span:
+        try:
+            if not profile_dir:
+                return process_batch(batch_folder, config, bible_dict)
+            import cProfile
+            prof = cProfile.Profile()
+            try:
+                return prof.runcall(process_batch, batch_folder, config, bible_dict)
+            finally:
+                os.makedirs(profile_dir, exist_ok=True)
+                prof.dump_stats(os.path.join(profile_dir, url_safe_name(batch_name) + '.prof'))
+        finally:
+            # 本批次的经文引用缓存命中数（worker 进程的区间随 span 传回主进程）
+            refs_after = ref_cache.stats()
+            span.meta['ref_cache'] = {k: refs_after[k] - refs_before[k] for k in ('hits', 'misses')}
+
+
+def record_ref_cache_stats(batch_spans):
+    """汇总各批次区间中的经文引用缓存计数，记入构建剖析报告。"""
+    hits = misses = 0
+    for span in batch_spans:
+        counts = span.meta.get('ref_cache') or {}
+        hits += counts.get('hits', 0)
+        misses += counts.get('misses', 0)
+    if hits or misses:
+        get_profiler().record('scripture_ref_cache', hits=hits, misses=misses,
+                              hit_rate=round(hits / (hits + misses), 3))
+
+
+def _run_batch_captured(batch_folder, config, profile_dir=None):
+    """
+    在 worker 进程中执行 process_batch，并捕获其全部日志。
+
+    stdout/stderr 均写入缓冲区，由主进程按批次顺序整段输出，避免多批次日志交错。
+
+    Returns:
+        (result, log_text, span)：result 同 process_batch 返回值，log_text 为该批次完整日志，
+        span 为该批次的计时区间（dict），由主进程挂到自己的剖析报告中。
+    """
+    import io
+    import traceback
+    from contextlib import redirect_stdout, redirect_stderr
+
+    buf = io.StringIO()
+    result = None
+    profiler = reset_profiler()
+    with redirect_stdout(buf), redirect_stderr(buf):
+        try:
+            result = profile_batch(batch_folder, config, _worker_bible_dict, profile_dir)
+        except Exception as e:
+            print(f"✗ 批次处理异常: {e}")
+            traceback.print_exc()
+            result = None
+    return result, buf.getvalue(), profiler.roots[0].to_dict()
+
+
+def resolve_batch_workers(jobs, batch_config):
+    """
+    确定并行批次数：命令行 --jobs 优先，其次 batch_processing.workers，默认 1（串行）。
+
+    0 或负数表示使用 CPU 核数。
+    """
+    workers = jobs if jobs is not None else batch_config.get('workers', 1)
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        print(f"⚠ 无效的并行数 {workers!r}，改为串行处理")
+        return 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def run_batches(batch_folders, config, workers, bible_dict: BibleDict = None, profile_dir=None):
+    """
+    处理一组批次，返回与 batch_folders 一一对应的结果列表（失败为 None）。
+
+    workers > 1 时使用进程池并行；结果与日志始终按 batch_folders 的原始顺序输出，
+    保证 generate_main_index 得到的顺序与串行模式一致。
+    """
+    if workers <= 1 or len(batch_folders) <= 1:
+        return [profile_batch(folder, config, bible_dict, profile_dir) for folder in batch_folders]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(batch_folders))
+    print(f"ℹ 并行处理 {len(batch_folders)} 个批次（{workers} 个进程）")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(bible_dict,)) as pool:
+        futures = [pool.submit(_run_batch_captured, folder, config, profile_dir) for folder in batch_folders]
+        for folder, future in zip(batch_folders, futures):
+            try:
+                result, log_text, span = future.result()
+            except Exception as e:
+                # worker 进程异常退出（如被 OOM kill）
+                print(f"\n✗ 批次 {os.path.basename(folder)} 执行失败: {e}")
+                results.append(None)
+                continue
+            sys.stdout.write(log_text)
+            sys.stdout.flush()
+            get_profiler().attach(span)
+            results.append(result)
+    return results
+
+
+def generate_main_index(config, batch_results, pack_workers=1):
+    """生成总主页（SPA 模式）：复制 SPA shell、生成 trainings.json 和所有静态资产。
+
+    pack_workers: 资源包压缩的并行进程数
+    """
     if not batch_results:
         return
 
@@ -1065,6 +1349,32 @@ def generate_main_index(config, batch_results):
 
     trainings.sort(key=get_sort_key, reverse=True)
 
+    # ── 按篇分片：training-index.json + chapters/<n>.json ──────────────────
+    # 打开某一篇只需下载索引和该篇分片；training.json 未变的训练直接复用上次分片
+    with profile_span('training-shards', count=len(trainings)):
+        sharded = 0
+        for t in trainings:
+            try:
+                index_info = write_training_shards(os.path.join(output_dir, t['path']))
+            except OSError as e:
+                print(f"⚠ 训练分片失败 ({t['path']}): {e}")
+                continue
+            if index_info:
+                t['index'] = index_info
+                sharded += 1
+    print(f"✓ 训练分片索引: {sharded}/{len(trainings)} 个训练")
+
+    # ── 全文搜索索引：每个训练一个倒排分片（含历史合辑）────────────────────
+    with profile_span('search-index', count=len(trainings)):
+        try:
+            search_shards = generate_search_index_from_json(output_dir, trainings)
+        except OSError as e:
+            print(f"⚠ 搜索索引生成失败: {e}")
+            search_shards = {}
+    for t in trainings:
+        if t['path'] in search_shards:
+            t['search'] = search_shards[t['path']]
+
     # ── trainings.json ────────────────────────────────────────────────────
     trainings_json = {
         'version': datetime.now().strftime('%Y%m%d%H%M%S'),
@@ -1089,12 +1399,18 @@ def generate_main_index(config, batch_results):
                 _html = _f.read()
             _marker = "window.CX_ROOT = './';\n"
             _replacement = "window.CX_ROOT = './';\n    window.CX_MAX_LATEST_TRAININGS = " + str(_max_n) + ";\n"
+            # 圣经分卷索引的内容哈希：scripture-popup.js 以 ?v= 加载 data/bible/index.json，索引更新后不会读到旧缓存
+            _bible_index = os.path.join(output_dir, 'data', 'bible', 'index.json')
+            if os.path.isfile(_bible_index):
+                with open(_bible_index, 'rb') as _f:
+                    _index_hash = hashlib.sha256(_f.read()).hexdigest()[:16]
+                _replacement += "    window.CX_BIBLE_INDEX = '" + _index_hash + "';\n"
             if _marker in _html and _replacement not in _html:
                 _html = _html.replace(_marker, _replacement, 1)
             with open(spa_shell_dst, 'w', encoding='utf-8') as _f:
                 _f.write(_html)
         except Exception as _e:
-            print(f"⚠ 注入 CX_MAX_LATEST_TRAININGS 失败: {_e}")
+            print(f"⚠ 注入 CX_MAX_LATEST_TRAININGS / CX_BIBLE_INDEX 失败: {_e}")
         print(f"✓ SPA index.html 已复制")
     else:
         print(f"⚠ 未找到 src/static/index.html — SPA shell 缺失")
@@ -1192,7 +1508,8 @@ def generate_main_index(config, batch_results):
     if do_obfuscate:
         try:
             from encrypt_app_update import obfuscate_all
-            obfuscate_all(output_dir)
+            with profile_span('obfuscate'):
+                obfuscate_all(output_dir)
         except Exception:
             pass
     else:
@@ -1243,30 +1560,222 @@ def generate_main_index(config, batch_results):
         f.write('')
     print(f"✓ .nojekyll 已创建")
 
+    # ── 静态资源指纹 + SW 预缓存清单（须在 JS 混淆、CSS / sw.js 复制之后）──
+    with profile_span('asset-fingerprint'):
+        fingerprint_static_assets(output_dir)
+
     # ── 历史资源包 ────────────────────────────────────────────────────────
-    generate_resource_packs(output_dir, trainings)
+    with profile_span('resource-packs'):
+        generate_resource_packs(output_dir, trainings, workers=pack_workers)
 
     index_path = os.path.join(output_dir, 'index.html')
     print(f"\n✓ SPA 主页已生成: {index_path}")
 
 
-def generate_resource_packs(output_dir, all_trainings):
+# ── 资源包增量缓存 ────────────────────────────────────────────────────────────
+# output/.pack-cache.json 记录每个资源包的成员及其内容哈希与 zip 大小；
+# 成员完全一致且 zip 仍在时不重写该包（字节不变，CDN 缓存继续有效），
+# 需要重写时未变成员直接从旧包搬运已压缩数据，只压缩新增/变化的文件。
+
+PACK_CACHE_FILE = '.pack-cache.json'
+PACK_CACHE_VERSION = 1
+
+
+def load_pack_cache(output_root):
+    """读取资源包缓存；文件不存在、损坏或版本不符时返回空缓存。"""
+    path = os.path.join(output_root, PACK_CACHE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == PACK_CACHE_VERSION and isinstance(data.get('packs'), dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': PACK_CACHE_VERSION, 'packs': {}}
+
+
+def save_pack_cache(output_root, cache):
+    """原子写入资源包缓存。"""
+    path = os.path.join(output_root, PACK_CACHE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def collect_pack_members(output_dir, group):
+    """列出一个资源包的成员 [(包内路径, 文件路径)]，按包内路径排序。
+
+    跳过图片（images/）、预压缩兄弟文件（.br / .gz），以及与 training.json
+    内容重复的篇章分片与分片索引（前端分片缺失时回退到 training.json）。
+    """
+    members = []
+    for t in group:
+        training_dir = os.path.join(output_dir, t.get('path', ''))
+        if not os.path.isdir(training_dir):
+            continue
+        for root_w, dirs, files in os.walk(training_dir):
+            for fn in files:
+                abs_path = os.path.join(root_w, fn)
+                arc_name = os.path.relpath(abs_path, output_dir).replace(os.sep, '/')
+                if '/images/' in arc_name or arc_name.startswith('images/'):
+                    continue
+                if fn.endswith(('.br', '.gz')):
+                    continue
+                if arc_name.endswith('/' + TRAINING_INDEX_FILE) or \
+                        ('/' + TRAINING_SHARD_DIR + '/') in arc_name:
+                    continue
+                members.append((arc_name, abs_path))
+    members.sort()
+    return members
+
+
+def reuse_pack_members(members, hashes, cached_packs, packs_dir):
+    """从旧包搬运内容未变的成员（已压缩数据，不解压不重压）。
+
+    成员哈希与 cached_packs 中任一旧包记录一致、且该旧 zip 仍在时可搬运
+    （年份范围变化导致包改名时同样适用）。
+
+    Returns: {包内路径: PackMember}
+    """
+    import zipfile
+    from src.zip_pack import read_members
+
+    # 包内路径 → 内容哈希一致的旧包
+    sources = {}
+    for entry in cached_packs.values():
+        old_zip = os.path.join(packs_dir, entry.get('zip', ''))
+        for arc_name, digest in (entry.get('members') or {}).items():
+            if hashes.get(arc_name) == digest and arc_name not in sources:
+                sources[arc_name] = old_zip
+
+    opened = {}
+    reused = {}
+    for arc_name, _abs_path in members:
+        old_zip = sources.get(arc_name)
+        if not old_zip or not os.path.isfile(old_zip):
+            continue
+        if old_zip not in opened:
+            try:
+                opened[old_zip] = read_members(old_zip)
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                print(f"  ⚠ 旧资源包无法读取，改为重新压缩 ({os.path.basename(old_zip)}): {e}")
+                opened[old_zip] = {}
+        member = opened[old_zip].get(arc_name)
+        if member is not None:
+            reused[arc_name] = member
+    return reused
+
+
+def compress_pack_members(items):
+    """压缩一批 (包内路径, 文件路径)，返回 PackMember 列表（进程池 worker 入口）。"""
+    from src.zip_pack import compress_file
+    return [compress_file(abs_path, arc_name) for arc_name, abs_path in items]
+
+
+# 待压缩总量低于此值时不启动进程池（进程启动开销大于收益）
+PACK_PARALLEL_MIN_BYTES = 4 << 20
+
+
+def compress_members(items, workers):
+    """压缩全部待压缩成员；workers > 1 且数据量足够时按体积均分成批交给进程池。
+
+    Returns: {包内路径: PackMember}
+    """
+    sizes = [os.path.getsize(abs_path) for _arc, abs_path in items]
+    total = sum(sizes)
+    if workers <= 1 or len(items) <= 1 or total < PACK_PARALLEL_MIN_BYTES:
+        return {m.name: m for m in compress_pack_members(items)}
+
+    # 每批约 total / (workers * 4) 字节：大文件单独成批，小文件合批，减少进程间往返
+    target = max(total // (workers * 4), 1 << 20)
+    batches, batch, batch_bytes = [], [], 0
+    for item, size in sorted(zip(items, sizes), key=lambda x: -x[1]):
+        batch.append(item)
+        batch_bytes += size
+        if batch_bytes >= target:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(batches))
+    print(f"ℹ 并行压缩资源包成员: {len(items)} 个文件, {total/1024/1024:.1f} MB（{workers} 个进程）")
+    compressed = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(compress_pack_members, batches):
+            for m in result:
+                compressed[m.name] = m
+    return compressed
+
+
+# 每个资源包保留的历史版本数：为这些旧版本各生成一个到当前版本的增量包
+PACK_DELTA_HISTORY = 3
+# 增量包（压缩后）超过完整包的这个比例时不生成，客户端直接下载完整包
+PACK_DELTA_MAX_RATIO = 0.5
+# 增量包内的元数据成员：{"pack", "from", "to", "deleted": [包内路径, ...]}
+PACK_DELTA_META = '.delta.json'
+
+
+def pack_content_hash(hashes):
+    """资源包版本号：成员路径与内容哈希的整体哈希。"""
+    body = json.dumps(hashes, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+def write_pack_deltas(pack_id, new_hash, hashes, history, raw_members, full_size, delta_dir):
+    """为 history 中每个旧版本写出「旧版本 → new_hash」的增量包。
+
+    增量包含新增/变化的成员（直接复用完整包的压缩数据）与 PACK_DELTA_META
+    （删除列表）；体积超过完整包 PACK_DELTA_MAX_RATIO 的不生成。
+
+    Returns: [{'from', 'zip', 'size', 'changed', 'deleted'}]
+    """
+    from src.zip_pack import compress_bytes, write_zip
+
+    deltas = []
+    for old in history:
+        old_members = old.get('members') or {}
+        changed = [arc for arc, digest in hashes.items() if old_members.get(arc) != digest]
+        deleted = sorted(arc for arc in old_members if arc not in hashes)
+        if not changed and not deleted:
+            continue
+        if sum(len(raw_members[arc].data) for arc in changed) > full_size * PACK_DELTA_MAX_RATIO:
+            continue
+        meta = json.dumps({'pack': pack_id, 'from': old['hash'], 'to': new_hash, 'deleted': deleted},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        zip_name = f"{pack_id}-{old['hash']}-{new_hash}.zip"
+        os.makedirs(delta_dir, exist_ok=True)
+        size = write_zip(os.path.join(delta_dir, zip_name),
+                         [raw_members[arc] for arc in sorted(changed)] + [compress_bytes(meta, PACK_DELTA_META)])
+        deltas.append({'from': old['hash'], 'zip': zip_name, 'size': size,
+                       'changed': len(changed), 'deleted': len(deleted)})
+    return deltas
+
+
+def generate_resource_packs(output_dir, all_trainings, workers=1):
     """将历史训练分组打包成可下载的 ZIP 资源包，并生成 resource-packs.json 清单。
 
     分组策略：
     - 有图片的训练（由 Word 文档转换，访问时自然得到缓存）→ 单独列入 individuals，不打包
     - 其余历史训练 → 每 10 年一包，不打入图片文件
     - 包列表倒序排列（较新的在前）
-    """
-    import zipfile
 
+    增量：成员及内容未变的包保持原文件不动（见 .pack-cache.json）。
+    需要重写的包先汇总全部待压缩文件，按 workers 个进程并行压缩，再逐包组装。
+
+    版本：每个包带内容哈希 hash；包内容变化时，为最近 PACK_DELTA_HISTORY 个旧版本
+    各生成一个增量包（resource-packs/delta/），在清单的 deltas 中列出，
+    已安装旧版本的客户端只需下载对应的增量包。
+    """
     packs_dir = os.path.join(output_dir, 'resource-packs')
     os.makedirs(packs_dir, exist_ok=True)
-
-    # 清理旧 zip，防止分组策略变化后出现僵尸包
-    for _old in os.listdir(packs_dir):
-        if _old.endswith('.zip'):
-            os.remove(os.path.join(packs_dir, _old))
+    pack_cache = load_pack_cache(output_dir)
+    cached_packs = pack_cache['packs']
+    new_cached_packs = {}
+    reused = 0
 
     def _has_images(path):
         img_dir = os.path.join(output_dir, path, 'images')
@@ -1292,6 +1801,7 @@ def generate_resource_packs(output_dir, all_trainings):
             'season': t.get('season', ''),
             'year': t.get('year'),
             'chapter_count': t.get('chapter_count', 0),
+            'index': t.get('index'),
         }
         for t in individuals_raw
     ]
@@ -1303,7 +1813,8 @@ def generate_resource_packs(output_dir, all_trainings):
         year_start = ((year - 1997) // 10) * 10 + 1997
         groups.setdefault(year_start, []).append(t)
 
-    manifest_packs = []
+    # ── 第一遍：确定各包成员，找出需要重写的包 ──────────────────────────
+    plans = []
     for year_start in sorted(groups.keys(), reverse=True):  # 倒序：较新的包在前
         group = groups[year_start]
         actual_years = [t['year'] for t in group if isinstance(t.get('year'), int)]
@@ -1312,26 +1823,63 @@ def generate_resource_packs(output_dir, all_trainings):
         zip_name = f'{pack_id}.zip'
         zip_path = os.path.join(packs_dir, zip_name)
 
-        # 构建 zip：打包每个训练文件夹，跳过图片文件
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED,
-                             compresslevel=6, allowZip64=True) as zf:
-            for t in group:
-                path = t.get('path', '')
-                training_dir = os.path.join(output_dir, path)
-                if not os.path.isdir(training_dir):
-                    continue
-                for root_w, dirs, files in os.walk(training_dir):
-                    for fn in files:
-                        abs_path = os.path.join(root_w, fn)
-                        rel_path = os.path.relpath(abs_path, output_dir)
-                        arc_name = rel_path.replace(os.sep, '/')
-                        # 跳过图片文件（images/ 目录），减小包体积
-                        if '/images/' in arc_name.replace(os.sep, '/') or \
-                                arc_name.replace(os.sep, '/').startswith('images/'):
-                            continue
-                        zf.write(abs_path, arc_name)
-
-        size_bytes = os.path.getsize(zip_path)
+        members = collect_pack_members(output_dir, group)
+        hashes = {arc_name: file_sha256(abs_path)[:16] for arc_name, abs_path in members}
+        old = cached_packs.get(pack_id)
+        unchanged = (old and old.get('members') == hashes and os.path.isfile(zip_path)
+                     and os.path.getsize(zip_path) == old.get('size'))
+        plans.append({'id': pack_id, 'zip': zip_name, 'zip_path': zip_path, 'group': group,
+                      'year_start': year_start, 'year_end': actual_end,
+                      'members': members, 'hashes': hashes,
+                      'size': old['size'] if unchanged else None})
+
+    # ── 第二遍：搬运未变成员，其余成员并行压缩 ───────────────────────────
+    raw_members = {}
+    to_compress = []
+    for plan in plans:
+        if plan['size'] is not None:
+            continue
+        reused_members = reuse_pack_members(plan['members'], plan['hashes'], cached_packs, packs_dir)
+        raw_members.update(reused_members)
+        plan['copied'] = len(reused_members)
+        to_compress.extend(item for item in plan['members'] if item[0] not in reused_members)
+    if to_compress:
+        raw_members.update(compress_members(to_compress, workers))
+
+    # ── 第三遍：组装 zip 与增量包，生成清单 ─────────────────────────────
+    from src.zip_pack import write_zip
+
+    delta_dir = os.path.join(packs_dir, 'delta')
+    # 按起始年份找上一版本（年份范围变化时包名会变，起始年份不变）
+    previous = {entry.get('year_start'): entry for entry in cached_packs.values()}
+    manifest_packs = []
+    for plan in plans:
+        pack_id, zip_name, group = plan['id'], plan['zip'], plan['group']
+        year_start, actual_end = plan['year_start'], plan['year_end']
+        pack_hash = pack_content_hash(plan['hashes'])
+        prev = previous.get(year_start) or {}
+        if plan['size'] is not None:
+            size_bytes = plan['size']
+            reused += 1
+            status = '未变，保留'
+            history = prev.get('history') or []
+            deltas = prev.get('deltas') or []
+        else:
+            size_bytes = write_zip(plan['zip_path'], [raw_members[arc] for arc, _abs in plan['members']])
+            status = f"已生成（复用 {plan['copied']}/{len(plan['members'])} 个成员）"
+            history = []
+            if prev.get('hash') and prev['hash'] != pack_hash:
+                history.append({'hash': prev['hash'], 'members': prev.get('members') or {}})
+            history.extend(h for h in prev.get('history') or [] if h.get('hash') not in (pack_hash, prev.get('hash')))
+            history = history[:PACK_DELTA_HISTORY]
+            deltas = write_pack_deltas(pack_id, pack_hash, plan['hashes'], history,
+                                       raw_members, size_bytes, delta_dir)
+            if deltas:
+                status += f"，增量包 {len(deltas)} 个"
+        new_cached_packs[pack_id] = {'zip': zip_name, 'size': size_bytes, 'members': plan['hashes'],
+                                     'year_start': year_start, 'hash': pack_hash,
+                                     'history': history, 'deltas': deltas}
+
         manifest_packs.append({
             'id': pack_id,
             'label': f'{year_start}–{actual_end} 年训练',
@@ -1340,11 +1888,30 @@ def generate_resource_packs(output_dir, all_trainings):
             'training_count': len(group),
             'size_bytes': size_bytes,
             'path': f'resource-packs/{zip_name}',
-            'trainings': [{'path': t['path'], 'chapter_count': t['chapter_count']} for t in group],
+            'hash': pack_hash,
+            'deltas': [{'from': d['from'], 'path': f"resource-packs/delta/{d['zip']}",
+                        'size_bytes': d['size'], 'changed': d['changed'], 'deleted': d['deleted']}
+                       for d in deltas],
+            'trainings': [{'path': t['path'], 'chapter_count': t['chapter_count'], 'index': t.get('index')}
+                          for t in group],
         })
-        print(f"✓ 资源包已生成: {zip_name} "
+        print(f"✓ 资源包{status}: {zip_name} "
               f"({len(group)} 训练, {size_bytes/1024/1024:.1f} MB, 不含图片)")
 
+    # 清理不再属于任何分组的旧 zip（分组策略或年份范围变化后的僵尸包）
+    current_zips = {entry['zip'] for entry in new_cached_packs.values()}
+    for _old in os.listdir(packs_dir):
+        if _old.endswith(('.zip', '.zip.tmp')) and _old not in current_zips:
+            os.remove(os.path.join(packs_dir, _old))
+    current_deltas = {d['zip'] for entry in new_cached_packs.values() for d in entry['deltas']}
+    if os.path.isdir(delta_dir):
+        for _old in os.listdir(delta_dir):
+            if _old not in current_deltas:
+                os.remove(os.path.join(delta_dir, _old))
+    pack_cache['packs'] = new_cached_packs
+    save_pack_cache(output_dir, pack_cache)
+    get_profiler().record('resource_packs', reused=reused, rebuilt=len(new_cached_packs) - reused)
+
     # 写清单文件（包含 packs + individuals）
     manifest_path = os.path.join(output_dir, 'resource-packs.json')
     with open(manifest_path, 'w', encoding='utf-8') as f:
@@ -1357,8 +1924,139 @@ def generate_resource_packs(output_dir, all_trainings):
           f"{len(individuals)} 个独立训练)")
 
 
-def main():
+# ── _headers 自动生成段 ───────────────────────────────────────────────────────
+# output/_headers 可能来自模板，也可能是上次构建留下的；构建步骤各自维护一段
+# 以标记行包围的规则，重写时先删除同名旧段，模板或手写的规则保持不变。
+
+def write_headers_block(output_dir, block_name, lines):
+    """替换 output/_headers 中名为 block_name 的自动生成段（lines 为空时只删除）。"""
+    path = os.path.join(output_dir, '_headers')
+    begin = f'# ── {block_name}（自动生成，勿手动修改）──'
+    end = f'# ── {block_name} 结束 ──'
+    kept = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            inside = False
+            for line in f.read().splitlines():
+                if line == begin:
+                    inside = True
+                elif line == end and inside:
+                    inside = False
+                elif not inside:
+                    kept.append(line)
+    while kept and not kept[-1].strip():
+        kept.pop()
+    if lines:
+        if kept:
+            kept.append('')
+        kept += [begin] + list(lines) + [end]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(kept) + '\n' if kept else '')
+
+
+def fingerprint_static_assets(output_dir):
+    """为 js/ css/ vendor/ 生成带内容哈希的副本，改写 index.html 引用，
+    写出 precache-manifest.json 并把其版本写入 sw.js，_headers 中标记指纹文件为 immutable。
+
+    原文件名保留：epub-importer / resource-pack 动态加载 vendor/jszip.min.js，
+    APK 构建按 js/app-update.js 等固定路径校验混淆结果。
+    """
+    from src.asset_pipeline import (asset_header_rules, content_hash, fingerprint_assets,
+                                    is_fingerprinted, load_precache_manifest,
+                                    remove_stale_fingerprints, rewrite_asset_refs,
+                                    stamp_service_worker, write_precache_manifest)
+
+    index_path = os.path.join(output_dir, 'index.html')
+    if not os.path.isfile(index_path):
+        print("⚠ 未找到 index.html，跳过静态资源指纹")
+        return
+    previous = load_precache_manifest(output_dir)
+    assets = fingerprint_assets(output_dir)
+
+    with open(index_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    html, used = rewrite_asset_refs(html, assets)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    # 预缓存：index.html 引用的指纹资源 + 壳页面与 PWA manifest（无指纹，按内容哈希比对）
+    entries = [{'url': './' + assets[rel]['file'], 'hash': assets[rel]['hash'], 'size': assets[rel]['size']}
+               for rel in sorted(used)]
+    for url, fn in (('./', 'index.html'), ('./manifest.json', 'manifest.json')):
+        path = os.path.join(output_dir, fn)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            entries.append({'url': url, 'hash': content_hash(data), 'size': len(data)})
+    version = write_precache_manifest(output_dir, entries)
+
+    sw_path = os.path.join(output_dir, 'sw.js')
+    if os.path.isfile(sw_path) and not stamp_service_worker(sw_path, version):
+        print("⚠ sw.js 中未找到 PRECACHE_VERSION，Service Worker 不会按清单增量更新")
+
+    # 保留上一版清单引用的指纹文件：仍在使用旧 index.html 的客户端可继续加载
+    keep = {info['file'] for info in assets.values()}
+    keep.update(e['url'][2:] for e in previous['assets'] if is_fingerprinted(e['url']))
+    removed = remove_stale_fingerprints(output_dir, keep)
+
+    write_headers_block(output_dir, 'assets', asset_header_rules(info['file'] for info in assets.values()))
+    print(f"✓ 静态资源指纹: {len(assets)} 个文件（index.html 引用 {len(used)} 个），"
+          f"预缓存清单 {len(entries)} 项 [{version}]")
+    if removed:
+        print(f"  ✗ 已删除 {removed} 个旧指纹文件")
+
+
+def precompress_outputs(config, workers=1):
+    """构建后处理：为较大的文本产物生成 .br / .gz 兄弟文件，并写入 _headers 规则。"""
+    from src.precompress import brotli, clear_precompressed, precompress_header_rules, precompress_output
+
+    pc_config = config.get('precompress') or {}
+    output_dir = config.get('output_dir', 'output')
+    # 默认关闭：需要托管方按 Accept-Encoding 返回兄弟文件，Cloudflare Pages 不支持（见 config.yaml）
+    if not pc_config.get('enabled', False):
+        print("⏭  跳过预压缩（precompress.enabled = false）")
+        removed = clear_precompressed(output_dir)
+        if removed:
+            print(f"  ✗ 已删除 {removed} 个上次生成的预压缩文件")
+        write_headers_block(output_dir, 'precompress', [])
+        return
+    if brotli is None:
+        print("ℹ 未安装 brotli（pip install brotli），只生成 .gz 预压缩文件")
+
+    stats = precompress_output(output_dir, min_bytes=int(pc_config.get('min_bytes', 1024)),
+                               workers=workers)
+    write_headers_block(output_dir, 'precompress',
+                        precompress_header_rules(stats['extensions'], stats['encodings']))
+    get_profiler().record('precompress', reused=stats['reused'], compressed=stats['compressed'],
+                          removed=stats['removed'])
+
+    bytes_in = stats['bytes_in'] or 1
+    ratios = f"gz {stats['bytes_gz'] / bytes_in:.0%}"
+    if stats['bytes_br']:
+        ratios = f"br {stats['bytes_br'] / bytes_in:.0%}, " + ratios
+    print(f"✓ 预压缩完成: {stats['reused'] + stats['compressed']} 个文件, "
+          f"{stats['bytes_in']/1024/1024:.1f} MB → {ratios}"
+          f"（复用 {stats['reused']}，重新压缩 {stats['compressed']}）")
+    if stats['removed']:
+        print(f"  ✗ 已删除 {stats['removed']} 个过期的预压缩文件")
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Word文档静态网站生成器 (通用批量版)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='并行处理的批次数与资源包压缩进程数（覆盖 batch_processing.workers / pack_workers；0 表示使用全部 CPU 核）')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略增量构建缓存，重新处理所有批次')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'对每个批次运行 cProfile，结果写入 <output_dir>/{PROFILE_DIR}/<批次>.prof')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
     import sys as _sys
     if hasattr(_sys.stdout, 'reconfigure'):
         try:
@@ -1465,9 +2163,6 @@ def main():
         print(f"  - {os.path.basename(folder)}")
     print()
     
-    # 初始化经文字典（仅用于跨章节「从略」还原，不持久化到磁盘）
-    bible_dict = BibleDict()
-
     # 通过 SQL/CG.db 生成圣经数据 JSON 到 output/data/，确保 process_batch 能读到用于过滤
     _output_dir_early = config.get('output_dir', 'output')
     _data_dir_early = os.path.join(_output_dir_early, 'data')
@@ -1479,43 +2174,64 @@ def main():
         return 1
 
     print("\n正在从 CG.db 生成圣经数据 JSON ...")
-    _cmd = [sys.executable, _exporter, '--out-dir', _data_dir_early, '--normalize-xrefs']
-    _ret = subprocess.run(_cmd)
-    if _ret.returncode != 0:
-        print("✗ 圣经数据 JSON 生成失败")
-        return 1
-
-    # 压缩 JSON（去缩进）减少打包体积
-    for _df in ['bible-text.json', 'bible-notes.json', 'bible-xrefs.json']:
-        _dst = os.path.join(_data_dir_early, _df)
-        if os.path.exists(_dst):
-            with open(_dst, 'r', encoding='utf-8') as _rf:
-                _jdata = json.load(_rf)
-            with open(_dst, 'w', encoding='utf-8') as _wf:
-                json.dump(_jdata, _wf, ensure_ascii=False, separators=(',', ':'))
-    print(f"✓ 圣经数据 JSON 已生成并压缩到 {_data_dir_early}/")
+    with profile_span('bible-export'):
+        # 导出脚本直接写紧凑 JSON；CG.db 与导出器版本都未变化时自行跳过
+        _cmd = [sys.executable, _exporter, '--out-dir', _data_dir_early, '--normalize-xrefs']
+        if args.force:
+            _cmd.append('--force')
+        _ret = subprocess.run(_cmd)
+        if _ret.returncode != 0:
+            print("✗ 圣经数据 JSON 生成失败")
+            return 1
+    print(f"✓ 圣经数据 JSON 已就绪: {_data_dir_early}/")
 
     # ── 历史合辑：调用 build-trainings-json.js 生成 training.json ──
+    # 本次批次的输出目录由批次处理写出，历史合辑不得覆盖
+    _batch_dirs = sorted(url_safe_name(os.path.basename(f)) for f in batch_folders)
+    # 历史合辑当前对应的输出目录；未知（脚本缺失或执行失败）时不清理旧目录
+    _history_dirs = None
     _build_js = os.path.join(os.path.dirname(__file__), 'tools', 'build-trainings-json.js')
     if os.path.exists(_build_js):
         print("\n正在解析历史合辑（training.json）...")
-        _split_ret = subprocess.run(
-            ['node', _build_js],
-            cwd=os.path.dirname(_build_js),
-        )
-        if _split_ret.returncode == 0:
-            print("✓ 历史合辑 training.json 生成完成")
-        else:
-            print("⚠ 历史合辑 training.json 生成失败")
+        with profile_span('history-trainings'):
+            try:
+                _history, _log = get_node_worker().call('build-trainings-json',
+                                                        {'force': args.force, 'exclude': _batch_dirs})
+                _history_dirs = (_history or {}).get('outputs')
+                for _line in _log:
+                    print(_line)
+                print("✓ 历史合辑 training.json 生成完成")
+            except NodeWorkerError as e:
+                for _line in e.log:
+                    print(_line)
+                print(f"⚠ 历史合辑 training.json 生成失败: {e}")
 
     # 处理每个批次
     success_count = 0
     failed_count = 0
     skip_existing = batch_config.get('skip_existing', False)
     strict_exit_on_batch_failure = batch_config.get('strict_exit_on_batch_failure', False)
-    batch_results = []
-
-    for batch_folder in batch_folders:
+    workers = resolve_batch_workers(args.jobs, batch_config)
+    # 资源包压缩：--jobs 优先，其次 batch_processing.pack_workers，默认全部 CPU 核
+    pack_workers = resolve_batch_workers(args.jobs, {'workers': batch_config.get('pack_workers', 0)})
+    use_build_cache = batch_config.get('build_cache', True) and not args.force
+    build_cache = load_build_cache(config['output_dir']) if use_build_cache else None
+    input_hashes = {}
+
+    # 每个批次占一个槽位，保证结果顺序与 batch_folders 一致
+    slots = [None] * len(batch_folders)
+    pending = []
+
+    # Word 批次的「从略」还原共用全部 Word 批次经文文档汇总的经文字典：
+    # 这些文档计入每个 Word 批次的缓存输入，任一变化时所有 Word 批次重新处理
+    outline_docs = {}
+    for idx, batch_folder in enumerate(batch_folders):
+        doc = find_word_outline_doc(batch_folder, config)
+        if doc:
+            outline_docs[idx] = doc
+    outline_hashes = hash_input_files(outline_docs.values()) if use_build_cache and outline_docs else {}
+
+    for idx, batch_folder in enumerate(batch_folders):
         batch_name = os.path.basename(batch_folder)
         safe_batch_name = url_safe_name(batch_name)
         output_dir = os.path.join(config['output_dir'], safe_batch_name)
@@ -1533,7 +2249,7 @@ def main():
                     for fn in os.listdir(images_dir):
                         if fn.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
                             images.append(f"images/{fn}")
-                batch_results.append({
+                slots[idx] = {
                     'name': batch_name,
                     'year': tdata.get('year', 2025),
                     'season': tdata.get('season', ''),
@@ -1541,29 +2257,94 @@ def main():
                     'chapter_count': len(tdata.get('chapters', [])),
                     'path': safe_batch_name,
                     'images': images,
-                })
+                }
                 success_count += 1
             except Exception:
                 pass
             continue
 
-        result = process_batch(batch_folder, config, bible_dict)
+        # 增量构建：输入内容未变则复用上次结果
+        if use_build_cache:
+            input_hashes[idx] = compute_batch_input_hashes(batch_folder, config)
+            if idx in outline_docs:
+                input_hashes[idx].update(outline_hashes)
+            cached = lookup_build_cache(build_cache, safe_batch_name, input_hashes[idx], config['output_dir'])
+            if cached is not None:
+                print(f"⏭ 跳过 {batch_name}: 输入未变化（构建缓存命中）")
+                slots[idx] = cached
+                success_count += 1
+                continue
+
+        pending.append(idx)
+
+    profile_dir = os.path.join(config['output_dir'], PROFILE_DIR) if args.profile else None
+
+    with profile_span('doc-prefetch'):
+        prefetch_doc_conversions([batch_folders[i] for i in pending])
+
+    bible_dict = None
+    if any(i in outline_docs for i in pending):
+        with profile_span('bible-dict'):
+            bible_dict = build_shared_bible_dict(list(outline_docs.values()))
+
+    with profile_span('batches', count=len(pending)) as batches_span:
+        pending_results = run_batches([batch_folders[i] for i in pending], config, workers,
+                                      bible_dict, profile_dir)
+    record_ref_cache_stats(batches_span.children)
+    for idx, result in zip(pending, pending_results):
         if result is not None:
             success_count += 1
-            batch_results.append(result)
+            slots[idx] = result
+            if use_build_cache:
+                build_cache['batches'][result['path']] = {
+                    'inputs': input_hashes[idx],
+                    'output': training_output_hash(config['output_dir'], result['path']),
+                    'result': result,
+                }
         else:
             failed_count += 1
 
+    if use_build_cache:
+        # 已移出 resource/ 的批次不再保留缓存条目
+        _stale = [k for k in build_cache['batches'] if k not in _batch_dirs]
+        for k in _stale:
+            del build_cache['batches'][k]
+    if use_build_cache and (pending or _stale):
+        try:
+            save_build_cache(config['output_dir'], build_cache)
+        except OSError as e:
+            print(f"⚠ 构建缓存写入失败: {e}")
+    if use_build_cache:
+        get_profiler().record('build_cache', hits=len(input_hashes) - len(pending), misses=len(pending))
+
+    batch_results = [r for r in slots if r is not None]
+    # 批次解析结束，关闭常驻 Node 进程
+    close_node_worker()
+
+    # 清理已下线的训练目录：既不属于当前批次、也不在历史合辑当前输出中
+    if _history_dirs is not None:
+        _pruned = prune_stale_training_dirs(config['output_dir'], set(_batch_dirs) | set(_history_dirs))
+        if _pruned:
+            print(f"✗ 已删除 {len(_pruned)} 个已下线的训练目录: {', '.join(_pruned)}")
+
     
     # 生成总主页
     if batch_results:
         try:
-            generate_main_index(config, batch_results)
+            with profile_span('main-index'):
+                generate_main_index(config, batch_results, pack_workers=pack_workers)
         except Exception as e:
             print(f"⚠ 生成总主页失败: {e}")
             import traceback
             traceback.print_exc()
-    
+
+        # 预压缩（.br / .gz 兄弟文件），进程数同资源包压缩
+        try:
+            with profile_span('precompress'):
+                precompress_outputs(config, workers=pack_workers)
+        except Exception as e:
+            print(f"⚠ 预压缩失败: {e}")
+
     # 总结
     print("\n" + "="*60)
     print(" 批量生成完成")
@@ -1577,11 +2358,20 @@ def main():
     if generate_version_file:
         try:
             print("\n生成版本信息...")
-            generate_version_file(config['output_dir'])
+            with profile_span('version-file'):
+                generate_version_file(config['output_dir'])
         except Exception as e:
             print(f"⚠ 版本信息生成失败: {e}")
     
     print("="*60)
+
+    # 构建耗时报告
+    profiler = get_profiler()
+    try:
+        profiler.write(os.path.join(config['output_dir'], PROFILE_FILE))
+    except OSError as e:
+        print(f"⚠ 构建耗时报告写入失败: {e}")
+    profiler.print_summary()
     
     # 退出码策略：
     # 1) 全部成功 -> 0
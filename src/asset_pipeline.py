@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+静态资源指纹 — 为 js/ css/ vendor/ 下的脚本与样式生成带内容哈希的副本，并生成 SW 预缓存清单
+
+    output/js/renderer.js                   原文件保留（动态加载、APK 构建校验等仍按固定文件名引用）
+    output/js/renderer.3f2a9c1b7d.js        指纹副本：内容变化 → 文件名变化，可长期 immutable 缓存
+    output/precache-manifest.json           {format, version, assets: [{url, hash, size}]}
+
+index.html 中对这些文件的引用（<script src> / <link href> / 字符串字面量）改写为指纹文件名；
+sw.js 安装时按清单逐项比对哈希，只下载变化的资源（见 main_sw.js precacheChanged）。
+
+    assets = fingerprint_assets('output')                 # {'js/renderer.js': {'file', 'hash', 'size'}}
+    html, used = rewrite_asset_refs(html, assets)
+    version = write_precache_manifest('output', entries)
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+ASSET_DIRS = ('js', 'css', 'vendor')
+ASSET_EXTS = ('.js', '.css')
+FINGERPRINT_LEN = 10
+
+PRECACHE_MANIFEST_FILE = 'precache-manifest.json'
+PRECACHE_FORMAT = 1
+
+# 指纹副本文件名：<名>.<10 位十六进制>.<扩展名>
+_FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{%d}\.(?:js|css)$' % FINGERPRINT_LEN)
+# 引号内的资源路径（可带 ./ 前缀，其后可接 ?query / #hash）
+_ASSET_REF_RE = re.compile(r'''(?<=["'])(\./)?((?:%s)/[\w.\-]+)(?=["'?#])''' % '|'.join(ASSET_DIRS))
+# main_sw.js 中由构建写入的预缓存版本
+_SW_VERSION_RE = re.compile(r"^const PRECACHE_VERSION = '[^']*';$", re.M)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def fingerprint_name(name: str, digest: str) -> str:
+    """renderer.js → renderer.<hash>.js；localforage.min.js → localforage.min.<hash>.js"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest[:FINGERPRINT_LEN]}{ext}'
+
+
+def is_fingerprinted(name: str) -> bool:
+    return bool(_FINGERPRINTED_RE.search(name))
+
+
+def fingerprint_assets(output_dir: str) -> Dict[str, dict]:
+    """为 ASSET_DIRS 下的 .js / .css 写出指纹副本（已存在则不重写）。
+
+    Returns: {原相对路径: {'file': 指纹相对路径, 'hash': 内容哈希, 'size': 字节数}}
+    """
+    assets = {}
+    for dir_name in ASSET_DIRS:
+        dir_path = os.path.join(output_dir, dir_name)
+        if not os.path.isdir(dir_path):
+            continue
+        for fn in sorted(os.listdir(dir_path)):
+            src = os.path.join(dir_path, fn)
+            if not fn.endswith(ASSET_EXTS) or is_fingerprinted(fn) or not os.path.isfile(src):
+                continue
+            with open(src, 'rb') as f:
+                data = f.read()
+            digest = content_hash(data)
+            hashed = fingerprint_name(fn, digest)
+            dst = os.path.join(dir_path, hashed)
+            if not (os.path.isfile(dst) and os.path.getsize(dst) == len(data)):
+                with open(dst + '.tmp', 'wb') as f:
+                    f.write(data)
+                os.replace(dst + '.tmp', dst)
+            assets[f'{dir_name}/{fn}'] = {'file': f'{dir_name}/{hashed}', 'hash': digest, 'size': len(data)}
+    return assets
+
+
+def rewrite_asset_refs(text: str, assets: Dict[str, dict]) -> Tuple[str, Set[str]]:
+    """把引号内的 js/ css/ vendor/ 资源路径改写为指纹路径，返回 (新文本, 被引用的原相对路径)。"""
+    used = set()
+
+    def repl(m):
+        info = assets.get(m.group(2))
+        if info is None:
+            return m.group(0)
+        used.add(m.group(2))
+        return (m.group(1) or '') + info['file']
+
+    return _ASSET_REF_RE.sub(repl, text), used
+
+
+def remove_stale_fingerprints(output_dir: str, keep: Iterable[str]) -> int:
+    """删除不在 keep（指纹相对路径）中的旧指纹副本，返回删除数。"""
+    keep = set(keep)
+    removed = 0
+    for dir_name in ASSET_DIRS:
+        dir_path = os.path.join(output_dir, dir_name)
+        if not os.path.isdir(dir_path):
+            continue
+        for fn in os.listdir(dir_path):
+            if is_fingerprinted(fn) and f'{dir_name}/{fn}' not in keep:
+                os.remove(os.path.join(dir_path, fn))
+                removed += 1
+    return removed
+
+
+# ── 预缓存清单 ────────────────────────────────────────────────────────────
+
+def load_precache_manifest(output_dir: str) -> dict:
+    path = os.path.join(output_dir, PRECACHE_MANIFEST_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') == PRECACHE_FORMAT and isinstance(data.get('assets'), list):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'format': PRECACHE_FORMAT, 'version': '', 'assets': []}
+
+
+def write_precache_manifest(output_dir: str, entries: List[dict]) -> str:
+    """写出预缓存清单；version 为全部条目的整体哈希（条目不变则 version 不变）。"""
+    entries = sorted(entries, key=lambda e: e['url'])
+    version = content_hash(json.dumps(entries, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    path = os.path.join(output_dir, PRECACHE_MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'format': PRECACHE_FORMAT, 'version': version, 'assets': entries},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+    return version
+
+
+def stamp_service_worker(sw_path: str, version: str) -> bool:
+    """把预缓存版本写入 sw.js：清单变化时 sw.js 字节随之变化，浏览器才会安装新 SW。"""
+    with open(sw_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    stamped, n = _SW_VERSION_RE.subn(f"const PRECACHE_VERSION = '{version}';", text, count=1)
+    if not n:
+        return False
+    with open(sw_path, 'w', encoding='utf-8') as f:
+        f.write(stamped)
+    return True
+
+
+# ── _headers 规则 ─────────────────────────────────────────────────────────
+
+def asset_header_rules(fingerprinted: Iterable[str]) -> List[str]:
+    """指纹文件长期缓存；sw.js 与预缓存清单每次校验。
+
+    规则以 * 结尾，同时覆盖预压缩生成的 .br / .gz 兄弟文件。
+    """
+    lines = []
+    for rel in sorted(fingerprinted):
+        lines += [f'/{rel}*', '  Cache-Control: public, max-age=31536000, immutable', '']
+    for rel in ('sw.js', PRECACHE_MANIFEST_FILE):
+        lines += [f'/{rel}', '  Cache-Control: no-cache', '']
+    return lines
@@ -4,10 +4,16 @@
 
 格式：{ "太5:3": "太5:3　灵里贫穷的人有福了，因为天国是他们的。" }
 随每次 build 增量累积，全本圣经数据可后续导入。
+
+内部按 (书卷, 章) 存放按节号下标的数组（书卷名驻留在书卷表中），
+get_range() 直接切片；半节（上/下）等无法按节号定位的条目另存一张小表。
 """
 import json
 import os
 import re
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # 复用与 parser_improved.py 相同的经文行识别正则
 _VERSE_LINE_RE = re.compile(
@@ -15,6 +21,21 @@ _VERSE_LINE_RE = re.compile(
     r'(?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+):\d+[上下]?)[　\s\t]+(.+)'
 )
 
+# 引用键拆分：书卷 + 章 : 节（书卷部分不含数字，如 "约壹1:9" → 约壹 / 1 / 9）
+_REF_RE = re.compile(r'^(\D+)(\d+):(\d+)$')
+_BOOK_CH_RE = re.compile(r'^(\D+)(\d+)$')
+
+# 二进制持久化格式（小端）:
+#   magic 'CXBD' | version u16 | 书卷数 u16 | 书卷名 × (u16 长度 + UTF-8)
+#   u32 条数 | 条目 × (书卷号 u16 | 章 u16 | 节 u16 | u32 长度 + UTF-8 经文行)
+#   u32 条数 | 其他条目 × (u16 长度 + UTF-8 键 | u32 长度 + UTF-8 经文行)
+_MAGIC = b'CXBD'
+_FORMAT_VERSION = 1
+_HEAD = struct.Struct('<4sHH')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_SLOT = struct.Struct('<HHHI')
+
 
 class BibleDict:
     """持久化经文字典。
@@ -24,7 +45,35 @@ class BibleDict:
     """
 
     def __init__(self):
-        self._data: dict = {}
+        self._books: List[str] = []                 # 书卷表（驻留字符串）
+        self._book_ids: Dict[str, int] = {}
+        self._chapters: Dict[Tuple[int, int], List[Optional[str]]] = {}  # (书卷号, 章) → 下标为节号
+        self._other: Dict[str, str] = {}            # 半节等其他条目
+        self._count = 0
+
+    def _book_id(self, book: str, create: bool = False) -> Optional[int]:
+        bid = self._book_ids.get(book)
+        if bid is None and create:
+            bid = len(self._books)
+            self._books.append(sys.intern(book))
+            self._book_ids[self._books[bid]] = bid
+        return bid
+
+    def _slot(self, ref: str, create: bool = False):
+        """ref → (章数组, 节号)；不是 "书卷章:节" 形式时返回 None。"""
+        m = _REF_RE.match(ref)
+        if not m:
+            return None
+        bid = self._book_id(m.group(1), create)
+        if bid is None:
+            return [], 0
+        key = (bid, int(m.group(2)))
+        verses = self._chapters.get(key)
+        if verses is None:
+            if not create:
+                return [], 0
+            verses = self._chapters[key] = []
+        return verses, int(m.group(3))
 
     # ------------------------------------------------------------------
     # 写入
@@ -32,8 +81,20 @@ class BibleDict:
 
     def add(self, ref: str, full_line: str):
         """存入一节经文（full_line 含 ref 前缀）。已有条目不覆盖。"""
-        if ref and ref not in self._data:
-            self._data[ref] = full_line
+        if not ref:
+            return
+        slot = self._slot(ref, create=True)
+        if slot is None:
+            if ref not in self._other:
+                self._other[ref] = full_line
+                self._count += 1
+            return
+        verses, verse = slot
+        if verse >= len(verses):
+            verses.extend([None] * (verse + 1 - len(verses)))
+        if verses[verse] is None:
+            verses[verse] = full_line
+            self._count += 1
 
     def add_line(self, line: str):
         """从完整经文行（如 '太5:3　...') 提取 ref 并存储。"""
@@ -47,49 +108,130 @@ class BibleDict:
 
     def get(self, ref: str):
         """返回完整经文行，找不到返回 None。"""
-        return self._data.get(ref)
+        slot = self._slot(ref)
+        if slot is None:
+            return self._other.get(ref)
+        verses, verse = slot
+        return verses[verse] if verse < len(verses) else None
 
     def get_range(self, book_ch: str, start: int, end: int) -> str:
         """获取 book_ch（如 "腓2"）从 start 节到 end 节的经文，拼成多行文本。"""
-        verses = []
-        for verse_num in range(start, end + 1):
-            text = self._data.get(f"{book_ch}:{verse_num}")
-            if text:
-                verses.append(text)
-        return '\n'.join(verses)
+        m = _BOOK_CH_RE.match(book_ch)
+        if not m or end < max(start, 0):
+            return ''
+        bid = self._book_ids.get(m.group(1))
+        verses = self._chapters.get((bid, int(m.group(2)))) if bid is not None else None
+        if not verses:
+            return ''
+        return '\n'.join(v for v in verses[max(start, 0):end + 1] if v)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """产出全部 (ref, 经文行)：各章按加入顺序、章内按节号，其他条目在最后。"""
+        for (bid, chapter), verses in self._chapters.items():
+            for verse, line in enumerate(verses):
+                if line is not None:
+                    yield f"{self._books[bid]}{chapter}:{verse}", line
+        yield from self._other.items()
 
     # ------------------------------------------------------------------
     # 持久化
     # ------------------------------------------------------------------
 
     def load(self, path: str):
-        """从 JSON 文件增量加载（不覆盖已有条目）。"""
+        """从文件增量加载（不覆盖已有条目）；支持二进制格式与旧版 JSON。"""
         if not os.path.exists(path):
             return
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                loaded = json.load(f)
-            for ref, text in loaded.items():
-                if ref not in self._data:
-                    self._data[ref] = text
-            print(f"  ✓ 加载经文字典: {len(loaded)} 节 ({path})")
+            with open(path, 'rb') as f:
+                raw = f.read()
+            if raw[:4] == _MAGIC:
+                loaded = self._load_binary(raw)
+            else:
+                data = json.loads(raw.decode('utf-8'))
+                for ref, text in data.items():
+                    self.add(ref, text)
+                loaded = len(data)
+            print(f"  ✓ 加载经文字典: {loaded} 节 ({path})")
         except Exception as e:
             print(f"  ⚠ 加载经文字典失败 ({path}): {e}")
 
+    def _load_binary(self, raw: bytes) -> int:
+        _magic, version, n_books = _HEAD.unpack_from(raw, 0)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f'不支持的经文字典版本: {version}')
+        pos = _HEAD.size
+        books = []
+        for _ in range(n_books):
+            (n,) = _U16.unpack_from(raw, pos)
+            pos += _U16.size
+            books.append(raw[pos:pos + n].decode('utf-8'))
+            pos += n
+        loaded = 0
+        (n_slots,) = _U32.unpack_from(raw, pos)
+        pos += _U32.size
+        for _ in range(n_slots):
+            bid, chapter, verse, n = _SLOT.unpack_from(raw, pos)
+            pos += _SLOT.size
+            self.add(f"{books[bid]}{chapter}:{verse}", raw[pos:pos + n].decode('utf-8'))
+            pos += n
+            loaded += 1
+        (n_other,) = _U32.unpack_from(raw, pos)
+        pos += _U32.size
+        for _ in range(n_other):
+            (nk,) = _U16.unpack_from(raw, pos)
+            pos += _U16.size
+            ref = raw[pos:pos + nk].decode('utf-8')
+            pos += nk
+            (n,) = _U32.unpack_from(raw, pos)
+            pos += _U32.size
+            self.add(ref, raw[pos:pos + n].decode('utf-8'))
+            pos += n
+            loaded += 1
+        return loaded
+
     def save(self, path: str):
-        """将字典持久化到 JSON 文件（按引用键排序）。"""
+        """将字典持久化为紧凑二进制文件（按书卷、章、节排序）。"""
         dirpart = os.path.dirname(path)
         if dirpart:
             os.makedirs(dirpart, exist_ok=True)
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        parts = [_HEAD.pack(_MAGIC, _FORMAT_VERSION, len(self._books))]
+        for book in self._books:
+            data = book.encode('utf-8')
+            parts.append(_U16.pack(len(data)) + data)
+        slots = []
+        for (bid, chapter) in sorted(self._chapters):
+            for verse, line in enumerate(self._chapters[(bid, chapter)]):
+                if line is not None:
+                    data = line.encode('utf-8')
+                    slots.append(_SLOT.pack(bid, chapter, verse, len(data)) + data)
+        parts.append(_U32.pack(len(slots)))
+        parts.extend(slots)
+        parts.append(_U32.pack(len(self._other)))
+        for ref in sorted(self._other):
+            key = ref.encode('utf-8')
+            data = self._other[ref].encode('utf-8')
+            parts.append(_U16.pack(len(key)) + key + _U32.pack(len(data)) + data)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp, path)
 
     # ------------------------------------------------------------------
     # 辅助
     # ------------------------------------------------------------------
 
+    def copy(self) -> 'BibleDict':
+        """独立副本：之后对任一方 add() 不影响另一方。"""
+        other = BibleDict()
+        other._books = list(self._books)
+        other._book_ids = dict(self._book_ids)
+        other._chapters = {key: list(verses) for key, verses in self._chapters.items()}
+        other._other = dict(self._other)
+        other._count = self._count
+        return other
+
     def __len__(self):
-        return len(self._data)
+        return self._count
 
     def __contains__(self, ref: str):
-        return ref in self._data
+        return self.get(ref) is not None
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+构建计时与剖析 — 嵌套计时区间（span），记录墙钟时间、CPU 时间与内存峰值
+
+    from src.build_profile import profile_span, get_profiler
+
+    with profile_span('bible-export'):
+        ...
+    get_profiler().write(os.path.join(output_dir, '.build-profile.json'))
+    get_profiler().print_summary()
+
+- CPU 时间为本进程的 user+sys（不含 node / soffice 等子进程）；
+- 内存取自 ru_maxrss，只统计本进程（不含子进程），Windows 上不可用时为 None：
+    peak_rss_mb    区间结束时本进程自启动以来的峰值 RSS（MB），并非该区间内的峰值；
+    rss_growth_mb  区间内峰值 RSS 的抬升量（结束时峰值 − 开始时峰值），
+                   为 0 表示该区间没有超过之前阶段已达到的峰值；
+- 进程池 worker 中的区间通过 to_dict() 传回主进程，再用 attach() 挂到当前区间下；
+- stats 收集各模块的计数器（如缓存命中率），随报告一同写出。
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_FILE = '.build-profile.json'
+PROFILE_DIR = '.profile'          # --profile 时 cProfile 结果（<批次>.prof）所在目录
+PROFILE_VERSION = 2
+
+
+def peak_rss_mb() -> Optional[float]:
+    """本进程自启动以来的峰值 RSS（MB，不含子进程）；平台不支持时返回 None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+class Span:
+    """一个计时区间。"""
+
+    __slots__ = ('name', 'meta', 'wall', 'cpu', 'peak_rss_mb', 'rss_growth_mb', 'children')
+
+    def __init__(self, name: str, meta: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.meta = meta or {}
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+        self.children = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {
+            'name': self.name,
+            'wall': round(self.wall, 4),
+            'cpu': round(self.cpu, 4),
+            'peak_rss_mb': self.peak_rss_mb,
+            'rss_growth_mb': self.rss_growth_mb,
+        }
+        if self.meta:
+            d['meta'] = self.meta
+        if self.children:
+            d['children'] = [c.to_dict() for c in self.children]
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> 'Span':
+        span = cls(d['name'], d.get('meta'))
+        span.wall = d.get('wall', 0.0)
+        span.cpu = d.get('cpu', 0.0)
+        span.peak_rss_mb = d.get('peak_rss_mb')
+        span.rss_growth_mb = d.get('rss_growth_mb')
+        span.children = [cls.from_dict(c) for c in d.get('children', [])]
+        return span
+
+
+class BuildProfiler:
+    """收集一次构建的全部计时区间与计数器。"""
+
+    def __init__(self):
+        self.started = datetime.now()
+        self.roots: List[Span] = []
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[Span] = []
+
+    @contextmanager
+    def span(self, name: str, **meta):
+        """计时区间；可嵌套，内层区间挂在外层下面。"""
+        span = Span(name, meta)
+        (self._stack[-1].children if self._stack else self.roots).append(span)
+        self._stack.append(span)
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        rss0 = peak_rss_mb()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - wall0
+            span.cpu = time.process_time() - cpu0
+            span.peak_rss_mb = peak_rss_mb()
+            if rss0 is not None:
+                span.rss_growth_mb = round(span.peak_rss_mb - rss0, 1)
+            self._stack.pop()
+
+    def attach(self, span_dict: Dict[str, Any]):
+        """把其他进程传回的区间（to_dict 结果）挂到当前区间下。"""
+        span = Span.from_dict(span_dict)
+        (self._stack[-1].children if self._stack else self.roots).append(span)
+
+    def record(self, group: str, **values):
+        """记录（覆盖）一组计数器，如 record('build_cache', hits=3, misses=1)。"""
+        self.stats.setdefault(group, {}).update(values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': PROFILE_VERSION,
+            'started': self.started.strftime('%Y-%m-%d %H:%M:%S'),
+            'total_wall': round(sum(s.wall for s in self.roots), 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'spans': [s.to_dict() for s in self.roots],
+            'stats': self.stats,
+        }
+
+    def write(self, path: str):
+        """写出 JSON 报告（原子替换）。"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def print_summary(self, max_depth: int = 2):
+        """打印各阶段耗时汇总表（默认展示两层）。"""
+        rows = []
+
+        def walk(spans, depth):
+            for s in spans:
+                rows.append(('  ' * depth + s.name, s))
+                if depth + 1 < max_depth:
+                    walk(s.children, depth + 1)
+
+        walk(self.roots, 0)
+        if not rows:
+            return
+        total = sum(s.wall for s in self.roots) or 1e-9
+        width = max(_display_width(name) for name, _ in rows)
+        print("\n" + "=" * 60)
+        print(" 构建耗时")
+        print("=" * 60)
+        print('阶段' + ' ' * (width - 4) + ''.join(
+            '  ' + _rjust(title, w) for title, w in
+            (('墙钟(s)', 8), ('CPU(s)', 8), ('占比', 6), ('峰值增长(MB)', 12), ('进程峰值(MB)', 12))
+        ))
+        for name, s in rows:
+            growth = '-' if s.rss_growth_mb is None else f"{s.rss_growth_mb:+.1f}"
+            rss = '-' if s.peak_rss_mb is None else f"{s.peak_rss_mb:.1f}"
+            pad = ' ' * (width - _display_width(name))
+            print(f"{name}{pad}  {s.wall:8.2f}  {s.cpu:8.2f}  {s.wall / total:6.1%}  {growth:>12}  {rss:>12}")
+        print("ℹ 进程峰值为区间结束时本进程自启动以来的峰值 RSS（不含 node / soffice 子进程）")
+        for group, values in self.stats.items():
+            items = ', '.join(f"{k}={v}" for k, v in values.items())
+            print(f"ℹ {group}: {items}")
+
+
+def _display_width(text: str) -> int:
+    """终端显示宽度（中文字符占两列）。"""
+    return sum(2 if ord(ch) > 0x2E7F else 1 for ch in text)
+
+
+def _rjust(text: str, width: int) -> str:
+    return ' ' * max(0, width - _display_width(text)) + text
+
+
+_profiler = None
+
+
+def get_profiler() -> BuildProfiler:
+    """返回本进程的构建剖析器。"""
+    global _profiler
+    if _profiler is None:
+        _profiler = BuildProfiler()
+    return _profiler
+
+
+def reset_profiler() -> BuildProfiler:
+    """丢弃当前记录，重新开始（进程池 worker 处理每个批次前调用）。"""
+    global _profiler
+    _profiler = BuildProfiler()
+    return _profiler
+
+
+def profile_span(name: str, **meta):
+    """get_profiler().span(...) 的简写。"""
+    return get_profiler().span(name, **meta)
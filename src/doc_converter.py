@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+.doc → .docx 转换服务 — 基于 LibreOffice，带内容寻址的磁盘缓存
+
+- 转换结果按源文件 SHA-256 存放在缓存目录（<sha>.docx），同一内容的 .doc 永远只转换一次；
+- 待转换的多个文件合并为一次 soffice 调用，整次构建只付一次启动开销；
+- 使用缓存目录下固定的 LibreOffice 用户配置（profile），避免每次启动都重新初始化配置。
+
+缓存目录默认为 <项目根>/.cache/doc-convert，可通过环境变量 CX_DOC_CACHE_DIR 覆盖。
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .hashing import file_sha256
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(_PROJECT_ROOT, '.cache', 'doc-convert')
+
+SOFFICE_COMMANDS = [
+    'soffice',           # Linux/Mac
+    'libreoffice',       # Linux
+    r'C:\Program Files\LibreOffice\program\soffice.exe',  # Windows
+    r'C:\Program Files (x86)\LibreOffice\program\soffice.exe',
+]
+
+# 单次 soffice 调用的超时：基础 60 秒，每多一个文件再加 30 秒
+_BASE_TIMEOUT = 60
+_PER_FILE_TIMEOUT = 30
+
+
+def find_soffice() -> Optional[str]:
+    """查找 LibreOffice/soffice 命令，未安装返回 None。"""
+    for cmd in SOFFICE_COMMANDS:
+        if shutil.which(cmd) or os.path.exists(cmd):
+            return cmd
+    return None
+
+
+class DocConverter:
+    """
+    .doc → .docx 转换器（整次构建共用一个实例，见 get_converter）
+
+    convert() / convert_many() 返回缓存目录中的 .docx 路径；缓存文件长期保留，调用方无需清理。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, soffice_path: Optional[str] = None):
+        self.cache_dir = cache_dir or os.environ.get('CX_DOC_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.soffice_path = soffice_path or find_soffice()
+        self._hash_memo = {}  # abspath -> ((mtime_ns, size), sha256)
+        self.hits = 0
+        self.conversions = 0
+
+    # ------------------------------------------------------------------
+    # 缓存
+    # ------------------------------------------------------------------
+
+    def _sha256(self, doc_path: str) -> str:
+        st = os.stat(doc_path)
+        key = os.path.abspath(doc_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        memo = self._hash_memo.get(key)
+        if memo and memo[0] == stamp:
+            return memo[1]
+        digest = file_sha256(doc_path)
+        self._hash_memo[key] = (stamp, digest)
+        return digest
+
+    def cached_path(self, doc_path: str) -> str:
+        """返回该 .doc 内容对应的缓存 .docx 路径（不保证已存在）。"""
+        return os.path.join(self.cache_dir, self._sha256(doc_path) + '.docx')
+
+    # ------------------------------------------------------------------
+    # 转换
+    # ------------------------------------------------------------------
+
+    def convert(self, doc_path: str) -> str:
+        """转换单个 .doc，返回 .docx 路径；失败时抛出 RuntimeError。"""
+        result = self.convert_many([doc_path])
+        if doc_path not in result:
+            raise RuntimeError(f"LibreOffice 转换失败: {os.path.basename(doc_path)}")
+        return result[doc_path]
+
+    def convert_many(self, doc_paths: Iterable[str]) -> Dict[str, str]:
+        """
+        批量转换，返回 {源路径: .docx 路径}（转换失败的文件不在结果中）。
+
+        缓存命中的文件直接返回；其余文件以 <sha>.doc 为名复制到临时目录，
+        由一次 soffice 调用全部转换后移入缓存目录。
+        """
+        result = {}
+        pending = {}  # sha -> [源路径]（同内容只转换一次）
+        for doc_path in doc_paths:
+            target = self.cached_path(doc_path)
+            if os.path.exists(target):
+                result[doc_path] = target
+                self.hits += 1
+            else:
+                pending.setdefault(os.path.basename(target)[:-5], []).append(doc_path)
+
+        if not pending:
+            return result
+        if not self.soffice_path:
+            return result
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 临时目录放在缓存目录内，转换结果可直接原子移动到位
+        work_dir = tempfile.mkdtemp(prefix='tmp-', dir=self.cache_dir)
+        try:
+            in_dir = os.path.join(work_dir, 'in')
+            out_dir = os.path.join(work_dir, 'out')
+            os.makedirs(in_dir)
+            os.makedirs(out_dir)
+            inputs = []
+            for sha, paths in pending.items():
+                staged = os.path.join(in_dir, sha + '.doc')
+                shutil.copyfile(paths[0], staged)
+                inputs.append(staged)
+
+            print(f"    ⏳ 正在转换 {len(inputs)} 个 .doc 文件...", file=sys.stderr)
+            cmd = [
+                self.soffice_path,
+                f'-env:UserInstallation={Path(self._profile_dir(work_dir)).as_uri()}',
+                '--headless', '--norestore',
+                '--convert-to', 'docx', '--outdir', out_dir,
+            ] + inputs
+            subprocess.run(
+                cmd,
+                capture_output=True,
+                timeout=_BASE_TIMEOUT + _PER_FILE_TIMEOUT * (len(inputs) - 1),
+            )
+
+            for sha, paths in pending.items():
+                produced = os.path.join(out_dir, sha + '.docx')
+                if not os.path.exists(produced):
+                    continue
+                target = os.path.join(self.cache_dir, sha + '.docx')
+                os.replace(produced, target)
+                self.conversions += 1
+                for doc_path in paths:
+                    result[doc_path] = target
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return result
+
+    def _profile_dir(self, work_dir: str) -> str:
+        """
+        LibreOffice 用户配置目录。
+
+        主进程固定使用缓存目录下的配置，首次启动后复用（省去配置初始化）；
+        并行 worker 进程改用本次临时目录，避免多个 soffice 争用同一配置导致转换静默失败。
+        """
+        if _in_worker():
+            return os.path.join(work_dir, 'profile')
+        return os.path.join(self.cache_dir, 'profile')
+
+
+def _in_worker() -> bool:
+    """是否运行在 multiprocessing 子进程中。"""
+    import multiprocessing
+    return multiprocessing.parent_process() is not None
+
+
+_converter = None
+
+
+def get_converter() -> DocConverter:
+    """返回本进程共用的转换器实例。"""
+    global _converter
+    if _converter is None:
+        _converter = DocConverter()
+    return _converter
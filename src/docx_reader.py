@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+轻量 OOXML 段落读取器 — 直接从 .docx 压缩包中流式解析 word/document.xml
+
+不构建 python-docx 的完整对象模型，只产出解析器实际用到的字段：
+段落文本、段落样式名、段落内引用的图片 rId。
+文本与样式名的取值规则与 python-docx 的 ``Paragraph.text`` / ``Paragraph.style.name`` 一致。
+"""
+import posixpath
+import zipfile
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from xml.etree.ElementTree import iterparse, parse
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PR = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+W_BODY = _W + 'body'
+W_P = _W + 'p'
+W_R = _W + 'r'
+W_HYPERLINK = _W + 'hyperlink'
+W_PPR = _W + 'pPr'
+W_PSTYLE = _W + 'pStyle'
+W_VAL = _W + 'val'
+A_BLIP = _A + 'blip'
+R_EMBED = _R + 'embed'
+
+# w:r 内参与 Paragraph.text 的子元素（与 python-docx 1.x 的 CT_R.text 相同）
+_RUN_CHAR = {
+    _W + 'tab': '\t',
+    _W + 'ptab': '\t',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-',
+}
+_W_T = _W + 't'
+_W_BR = _W + 'br'
+_W_TYPE = _W + 'type'
+
+# python-docx 对内置样式名做的 UI 名称映射（BabelFish）
+_BUILTIN_STYLE_NAMES = {'caption': 'Caption', 'footer': 'Footer', 'header': 'Header'}
+_BUILTIN_STYLE_NAMES.update({f'heading {n}': f'Heading {n}' for n in range(1, 10)})
+
+
+class DocParagraph(NamedTuple):
+    """一个 w:p 段落的精简记录。"""
+    index: int                  # 段落在正文中的绝对序号（含表格/文本框内的嵌套段落，文档顺序）
+    text: str                   # 与 python-docx Paragraph.text 相同（未 strip）
+    style_name: Optional[str]   # 段落样式名；无样式定义时为 None
+    image_rids: Tuple[str, ...] # 段落（含其嵌套内容）中 a:blip 引用的 rId，按出现顺序
+    top_level: bool             # 是否为 w:body 的直接子段落（即 python-docx 的 doc.paragraphs）
+
+
+# ── 样式与关系表 ──────────────────────────────────────────────────────────────
+
+def _read_paragraph_styles(zf: zipfile.ZipFile):
+    """读取 word/styles.xml，返回 ({styleId: name}, 默认段落样式名)。"""
+    try:
+        with zf.open('word/styles.xml') as f:
+            root = parse(f).getroot()
+    except KeyError:
+        return {}, None
+
+    names = {}
+    default_name = None
+    for style in root.iter(_W + 'style'):
+        if style.get(_W_TYPE) != 'paragraph':
+            continue
+        name_el = style.find(_W + 'name')
+        name = name_el.get(W_VAL) if name_el is not None else None
+        if name is not None:
+            name = _BUILTIN_STYLE_NAMES.get(name, name)
+        style_id = style.get(_W + 'styleId')
+        if style_id is not None:
+            names[style_id] = name
+        if style.get(_W + 'default') in ('1', 'true', 'on') and default_name is None:
+            default_name = name
+    return names, default_name
+
+
+def read_image_blobs(docx_path: str) -> Dict[str, bytes]:
+    """读取正文关系表中所有内嵌图片，返回 {rId: 图片字节}（外链图片忽略）。"""
+    blobs = {}
+    with zipfile.ZipFile(docx_path) as zf:
+        try:
+            with zf.open('word/_rels/document.xml.rels') as f:
+                root = parse(f).getroot()
+        except KeyError:
+            return blobs
+        members = set(zf.namelist())
+        for rel in root.iter(_PR + 'Relationship'):
+            if 'image' not in (rel.get('Type') or '') or rel.get('TargetMode') == 'External':
+                continue
+            target = rel.get('Target') or ''
+            if target.startswith('/'):
+                part = target.lstrip('/')
+            else:
+                part = posixpath.normpath(posixpath.join('word', target))
+            if part in members:
+                blobs[rel.get('Id')] = zf.read(part)
+    return blobs
+
+
+# ── 段落流 ────────────────────────────────────────────────────────────────────
+
+def _run_text(run) -> str:
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W_T:
+            parts.append(child.text or '')
+        elif tag == _W_BR:
+            if child.get(_W_TYPE, 'textWrapping') == 'textWrapping':
+                parts.append('\n')
+        else:
+            ch = _RUN_CHAR.get(tag)
+            if ch:
+                parts.append(ch)
+    return ''.join(parts)
+
+
+def _paragraph_text(p) -> str:
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            for run in child:
+                if run.tag == W_R:
+                    parts.append(_run_text(run))
+    return ''.join(parts)
+
+
+def iter_paragraphs(docx_path: str) -> Iterator[DocParagraph]:
+    """
+    按文档顺序流式产出正文中的全部段落（包括表格、文本框内的嵌套段落）。
+
+    每个正文顶层块（段落/表格）结束后即释放其 XML 元素，内存占用与文档大小无关。
+    只需要 python-docx ``doc.paragraphs`` 语义时，按 ``top_level`` 过滤即可（见 read_paragraphs）。
+    """
+    with zipfile.ZipFile(docx_path) as zf:
+        style_names, default_style = _read_paragraph_styles(zf)
+
+        def _style_of(p) -> Optional[str]:
+            ppr = p.find(W_PPR)
+            pstyle = ppr.find(W_PSTYLE) if ppr is not None else None
+            style_id = pstyle.get(W_VAL) if pstyle is not None else None
+            if style_id is None or style_id not in style_names:
+                return default_style
+            return style_names[style_id]
+
+        with zf.open('word/document.xml') as f:
+            depth = 0
+            body = None
+            body_depth = None
+            next_index = 0
+            open_paras = []   # [(index, top_level)]，与 w:p 的 start/end 嵌套对应
+            finished = {}     # index -> DocParagraph，等待顶层块结束后按序产出
+            for event, elem in iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if elem.tag == W_BODY:
+                        body, body_depth = elem, depth
+                    elif elem.tag == W_P and body_depth is not None:
+                        open_paras.append((next_index, depth == body_depth + 1))
+                        next_index += 1
+                    continue
+
+                # end 事件
+                if elem.tag == W_P and open_paras:
+                    index, top_level = open_paras.pop()
+                    rids = tuple(
+                        rid for rid in (b.get(R_EMBED) for b in elem.iter(A_BLIP)) if rid
+                    )
+                    finished[index] = DocParagraph(
+                        index, _paragraph_text(elem), _style_of(elem), rids, top_level
+                    )
+
+                if body_depth is not None and depth == body_depth + 1:
+                    # 顶层块结束：按序产出其中的段落并释放元素
+                    for index in sorted(finished):
+                        yield finished[index]
+                    finished.clear()
+                    body.clear()
+                elif depth == body_depth:
+                    body_depth = None
+                depth -= 1
+
+
+def read_paragraphs(docx_path: str) -> List[DocParagraph]:
+    """返回正文顶层段落列表（等价于 python-docx 的 ``doc.paragraphs``）。"""
+    return [p for p in iter_paragraphs(docx_path) if p.top_level]
+
+
+class DocxContent:
+    """一份 .docx 的完整读取结果：全部段落记录、段落样式统计与内嵌图片。"""
+
+    __slots__ = ('paragraphs', 'top_level_paragraphs', 'image_blobs')
+
+    def __init__(self, paragraphs: List[DocParagraph], image_blobs: Dict[str, bytes]):
+        self.paragraphs = paragraphs                      # 全部段落（含嵌套），按 index 排序
+        self.top_level_paragraphs = [p for p in paragraphs if p.top_level]
+        self.image_blobs = image_blobs                    # rId -> 图片字节
+
+    def style_counts(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """统计前 limit 个非空顶层段落的样式使用次数。"""
+        counts = {}
+        for para in self.top_level_paragraphs[:limit]:
+            if para.style_name and para.text.strip():
+                counts[para.style_name] = counts.get(para.style_name, 0) + 1
+        return counts
+
+
+def load_docx(docx_path: str) -> DocxContent:
+    """一次性读取 .docx 的段落与图片（解压、解析各一次）。"""
+    return DocxContent(list(iter_paragraphs(docx_path)), read_image_blobs(docx_path))
@@ -2,6 +2,7 @@
 """
 HTML生成器
 """
+import hashlib
 import json
 import os
 import re
@@ -9,6 +10,11 @@ import shutil
 from jinja2 import Environment, FileSystemLoader
 from .models import TrainingData, Chapter
 from .parser_improved import ImprovedParser
+from .verse_store import VerseStore
+from .scripture_refs import LEADING_TOKEN_RE, REF_KEY_RE
+from .json_stream import JsonStreamWriter
+from .build_profile import get_profiler
+from .search_index import SEARCH_DIR, SEARCH_INDEX_FORMAT, SEARCH_MANIFEST_FILE, build_search_shard
 
 
 def _normalize_source_abbr(text: str) -> str:
@@ -120,13 +126,13 @@ class HTMLGenerator:
         cur_chapter = ImprovedParser._extract_primary_chapter(chapter_scripture)
         result = []
         for text in scriptures:
-            m = re.match(r'^(\S+)', text.strip())
+            m = LEADING_TOKEN_RE.match(text.strip())
             ref_part = m.group(1).rstrip('，、；。') if m else ''
             refs = ImprovedParser._expand_cn_scripture_refs(ref_part, cur_book, cur_chapter)
             if refs:
                 # 从最后一个 ref 更新上下文
                 last_ref = refs[-1]
-                bm = re.match(r'^(.+?)(\d+):(\d+)', last_ref)
+                bm = REF_KEY_RE.match(last_ref)
                 if bm:
                     cur_book = bm.group(1)
                     cur_chapter = int(bm.group(2))
@@ -247,38 +253,51 @@ class HTMLGenerator:
 
         return scriptures
 
-    _bible_text_keys_cache: set = None   # 类级缓存，避免每个训练重复解析
-    _bible_text_cache: dict = None        # 类级缓存（带 {N}/[a] 标记的完整数据）
+    _bible_text_cache = None   # 类级缓存：VerseStore（或旧输出的 dict），同一进程内多个训练共用
 
     @classmethod
-    def _load_bible_text_keys(cls, output_root: str) -> set:
-        """读取 output/data/bible-text.json 中所有经文 key，用于过滤补充数据。
-        结果缓存在类变量中，同一进程内多个训练只解析一次。
-        """
-        if cls._bible_text_keys_cache is not None:
-            return cls._bible_text_keys_cache
-        path = os.path.join(output_root, 'data', 'bible-text.json')
-        if not os.path.isfile(path):
-            cls._bible_text_keys_cache = set()
-            return cls._bible_text_keys_cache
-        with open(path, encoding='utf-8') as f:
-            data = json.load(f)
-        cls._bible_text_keys_cache = set(data.keys())
-        return cls._bible_text_keys_cache
+    def _load_bible_text(cls, output_root: str):
+        """打开全本圣经经文（带 {N}/[a] 标记），用于过滤补充数据与半节标记补全。
 
-    @classmethod
-    def _load_bible_text_data(cls, output_root: str) -> dict:
-        """读取 bible-text.json 的完整键值对（带 {N}/[a] 标记），用于半节标记补全。"""
+        优先 mmap 打开导出脚本生成的 output/data/bible-text.bin（只读、进程间共享页缓存，
+        无需整本解析）；没有时退回 json.load bible-text.json。返回值支持 in / get / len。
+        """
         if cls._bible_text_cache is not None:
             return cls._bible_text_cache
-        path = os.path.join(output_root, 'data', 'bible-text.json')
-        if not os.path.isfile(path):
-            cls._bible_text_cache = {}
-            return cls._bible_text_cache
-        with open(path, encoding='utf-8') as f:
-            cls._bible_text_cache = json.load(f)
+        data_dir = os.path.join(output_root, 'data')
+        store = VerseStore.open(os.path.join(data_dir, 'bible-text.bin'))
+        if store is None:
+            store = {}
+            path = os.path.join(data_dir, 'bible-text.json')
+            if os.path.isfile(path):
+                with open(path, encoding='utf-8') as f:
+                    store = json.load(f)
+        cls._bible_text_cache = store
         return cls._bible_text_cache
 
+    _bible_books_re_cache: tuple = None   # 类级缓存：(书卷列表, 引用正则)
+
+    @classmethod
+    def _bible_books_pattern(cls, output_root: str) -> tuple:
+        """返回 (书卷列表, 引用正则)：书卷按 data/bible/index.json 中的顺序。
+
+        用于找出训练 JSON 中引用到的书卷，前端据此只预加载这些书卷的分卷；
+        索引不存在时返回 ([], None)。
+        """
+        if cls._bible_books_re_cache is None:
+            books = []
+            path = os.path.join(output_root, 'data', 'bible', 'index.json')
+            if os.path.isfile(path):
+                with open(path, encoding='utf-8') as f:
+                    books = list((json.load(f).get('books') or {}).keys())
+            pattern = None
+            if books:
+                alts = '|'.join(re.escape(b) for b in sorted(books, key=len, reverse=True))
+                # 书卷 + 章:节 或 书卷 + 中文章号 + 节号（太5:3 / 太五3）
+                pattern = re.compile(r'(' + alts + r')(?:\d+:\d|[一二三四五六七八九十百]+\d)')
+            cls._bible_books_re_cache = (books, pattern)
+        return cls._bible_books_re_cache
+
     @staticmethod
     def _enrich_half_verse(half_text: str, full_marked: str, half_type: str):
         """从整节带标记文本中截取半节对应的带标记片段。
@@ -339,21 +358,19 @@ class HTMLGenerator:
 
         # ── 过滤：只保留全本圣经中没有的经文 ──────────────────────────
         output_root = os.path.normpath(os.path.join(self.output_dir, '..'))
-        bible_keys = self._load_bible_text_keys(output_root)
-        bible_data = self._load_bible_text_data(output_root)
-        if bible_keys:
+        bible_text = self._load_bible_text(output_root)
+        if len(bible_text):
             total = len(scriptures)
             # 过滤整节已在 bible-text.json 的条目
-            scriptures = {k: v for k, v in scriptures.items() if k not in bible_keys}
+            scriptures = {k: v for k, v in scriptures.items() if k not in bible_text}
             # 对半节（上/中/下）用整节带标记文本补全 {N}/[a]，仍保留在 scriptures-data.json
-            if bible_data:
-                for k in list(scriptures.keys()):
-                    if k and k[-1] in '上中下':
-                        full_marked = bible_data.get(k[:-1])
-                        if full_marked:
-                            enriched = self._enrich_half_verse(scriptures[k], full_marked, k[-1])
-                            if enriched:
-                                scriptures[k] = enriched
+            for k in list(scriptures.keys()):
+                if k and k[-1] in '上中下':
+                    full_marked = bible_text.get(k[:-1])
+                    if full_marked:
+                        enriched = self._enrich_half_verse(scriptures[k], full_marked, k[-1])
+                        if enriched:
+                            scriptures[k] = enriched
             filtered = total - len(scriptures)
             if filtered:
                 print(f'  ℹ scriptures-data.json: 已过滤 {filtered} 条（全本圣经中已有），'
@@ -387,6 +404,12 @@ def export_training_json(training_data, output_dir: str) -> str:
       output_dir/training.json        — full training data with precomputed contexts
       output_dir/js/scriptures-data.json — supplementary verse texts not in bible-text.json
 
+    training.json also lists the Bible books it references (bible_books), so the
+    popup only preloads those per-book shards from data/bible/.
+
+    training.json is streamed chapter by chapter (see json_stream.JsonStreamWriter);
+    source abbreviations are normalized per string field.
+
     Returns: version string (timestamp) written into training.json
     """
     os.makedirs(output_dir, exist_ok=True)
@@ -395,25 +418,55 @@ def export_training_json(training_data, output_dir: str) -> str:
     gen = HTMLGenerator.__new__(HTMLGenerator)
     gen.output_dir = output_dir
 
-    # Build full training dict. Section ctx is no longer pre-computed; the JS
-    # renderer passes chapter.scripture as fallback context to wrapRefs().
-    training_dict = training_data.to_dict()
-
-    # Enrich with feeding_refs — stored as pure text strings in JSON, used by JS renderer.
-    # Section contexts (morning_feeding_contexts, message_reading_contexts) are now
-    # computed at render time in renderer.js using scanCtxBox().
-    for ch_dict in training_dict.get('chapters', []):
-        gen._enrich_chapter_feeding_refs(ch_dict)
-
     from datetime import datetime as _dt
     version = _dt.now().strftime('%Y%m%d%H%M%S')
-    training_dict['version'] = version
 
-    # Write training.json (compact, no indent)
+    output_root = os.path.normpath(os.path.join(output_dir, '..'))
+    books, books_re = HTMLGenerator._bible_books_pattern(output_root)
+    found_books = set()
+
+    def _normalize(s: str) -> str:
+        # 出处缩写逐字段归一，同时收集引用到的书卷
+        s = _normalize_source_abbr(s)
+        if books_re is not None:
+            hits = books_re.findall(s)
+            if hits:
+                found_books.update(hits)
+        return s
+
+    # Stream training.json (compact, no indent) one chapter at a time, so only the
+    # current chapter's dict is held in memory. Section ctx is no longer pre-computed;
+    # the JS renderer passes chapter.scripture as fallback context to wrapRefs().
     json_path = os.path.join(output_dir, 'training.json')
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json_text = json.dumps(training_dict, ensure_ascii=False, separators=(',', ':'))
-        f.write(_normalize_source_abbr(json_text))
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        w = JsonStreamWriter(f, string_hook=_normalize)
+        w.raw('{')
+        for key, value in training_data.header_dict().items():
+            w.string(key)
+            w.raw(':')
+            w.value(value)
+            w.raw(',')
+        w.raw('"chapters":[')
+        for i, chapter in enumerate(training_data.chapters):
+            if i:
+                w.raw(',')
+            ch_dict = chapter.to_dict()
+            # Enrich with feeding_refs — stored as pure text strings in JSON, used by JS renderer.
+            # Section contexts (morning_feeding_contexts, message_reading_contexts) are
+            # computed at render time in renderer.js using scanCtxBox().
+            gen._enrich_chapter_feeding_refs(ch_dict)
+            w.value(ch_dict)
+        w.raw('],"version":')
+        w.value(version)
+        bible_books = [b for b in books if b in found_books]
+        if bible_books:
+            # 最后一个字段：引用到的书卷
+            w.raw(',"bible_books":')
+            w.value(bible_books)
+        w.raw('}')
+        w.flush()
+    os.replace(tmp_path, json_path)
     print(f"  ✓ training.json 已写出 ({len(training_data.chapters)} 篇章)")
 
     # Write supplementary scripture data (for popup, excludes bible-text.json entries)
@@ -425,121 +478,217 @@ def export_training_json(training_data, output_dir: str) -> str:
     return version
 
 
-def generate_search_index_from_json(output_root: str, trainings: list) -> None:
-    """Build search-index.json by reading training.json files (SPA mode).
+TRAINING_INDEX_FILE = 'training-index.json'
+TRAINING_SHARD_DIR = 'chapters'
+TRAINING_INDEX_FORMAT = 2
+
+
+def _write_bytes_atomic(path: str, data: bytes) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_training_shards(training_dir: str):
+    """Split training.json into per-chapter shards plus a lightweight manifest.
 
-    Replaces generate_search_index() which relied on parsed HTML files.
-    URL format: '{path}/{num}/{view}' (hash-routable in the SPA).
+    Generates:
+      training_dir/training-index.json — top-level fields + per-chapter title, counts,
+                                         shard file, byte size and content hash
+      training_dir/chapters/<n>.json   — one chapter of training.json (compact)
+
+    The SPA renders the table of contents from the index and a chapter view from
+    the index plus a single shard; training.json stays for search and offline packs.
+    Works on any training.json (Word / TXT / EPUB / history collections) and is
+    skipped when training.json is unchanged since the last split.
+
+    The index always carries bible_books (books referenced by the training, used by
+    the popup's idle preload): taken from training.json when export_training_json
+    wrote it, otherwise scanned from the training.json text (TXT / EPUB / history
+    trainings are written by Node and never have it).
+
+    Returns: {'file', 'hash', 'size'} describing training-index.json, or None when
+    training.json is missing or unreadable.
     """
-    from datetime import datetime as _dt
+    json_path = os.path.join(training_dir, 'training.json')
+    index_path = os.path.join(training_dir, TRAINING_INDEX_FILE)
+    if not os.path.isfile(json_path):
+        return None
+    with open(json_path, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).hexdigest()[:16]
+
+    # training.json 未变且分片齐全 → 直接复用
+    if os.path.isfile(index_path):
+        try:
+            with open(index_path, 'rb') as f:
+                index_raw = f.read()
+            old = json.loads(index_raw.decode('utf-8'))
+            if (old.get('format') == TRAINING_INDEX_FORMAT and old.get('source') == source_hash
+                    and all(os.path.isfile(os.path.join(training_dir, ch['file']))
+                            for ch in old.get('chapters', []))):
+                return {'file': TRAINING_INDEX_FILE,
+                        'hash': hashlib.sha256(index_raw).hexdigest()[:16],
+                        'size': len(index_raw)}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
 
-    TYPE_MAP = [
-        ('h',  '听抄',   lambda ch: ch.get('message_content', [])),
-        ('ts', '详情',   None),   # sections — handled separately
-        ('cv', '纲目',   None),   # sections — handled separately
-        ('zs', '职事摘录', lambda ch: [ch.get('ministry_excerpt', '')] if ch.get('ministry_excerpt') else []),
-    ]
-
-    def flatten_sections(sections, buf):
-        for sec in sections:
-            t = (sec.get('level', '') + ' ' + sec.get('title', '')).strip()
-            if t:
-                buf.append(t)
-            for para in sec.get('content', []):
-                if para:
-                    buf.append(para)
-            flatten_sections(sec.get('children', []), buf)
-
-    def flatten_sections_content_only(sections, buf):
-        """ts 视图专用：只收内容段落，跳过标题。
-        DOM 中标题渲染为 .section-levelN，内容才是 .content-text，
-        pi 必须只计内容段才能与 querySelectorAll('.content-text') 对齐。
-        """
-        for sec in sections:
-            for para in sec.get('content', []):
-                if para:
-                    buf.append(para)
-            flatten_sections_content_only(sec.get('children', []), buf)
+    try:
+        data = json.loads(raw.decode('utf-8'))
+    except ValueError as e:
+        print(f"  ⚠ training.json 无法解析，跳过分片 ({training_dir}): {e}")
+        return None
+    chapters = data.get('chapters') or []
+
+    shard_dir = os.path.join(training_dir, TRAINING_SHARD_DIR)
+    os.makedirs(shard_dir, exist_ok=True)
+    numbers = [ch.get('number') for ch in chapters]
+    unique_numbers = len(set(numbers)) == len(numbers) and all(isinstance(n, int) for n in numbers)
 
     entries = []
-    total_files = 0
+    written = set()
+    for i, ch in enumerate(chapters):
+        name = f"{ch['number'] if unique_numbers else i + 1}.json"
+        body = json.dumps(ch, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        _write_bytes_atomic(os.path.join(shard_dir, name), body)
+        written.add(name)
+        entries.append({
+            'number': ch.get('number'),
+            'title': ch.get('title', ''),
+            'outline_count': len(ch.get('outline_sections') or []),
+            'detail_count': len(ch.get('detail_sections') or []),
+            'message_count': len(ch.get('message_content') or []),
+            'morning_revival_count': len(ch.get('morning_revivals') or []),
+            'file': f'{TRAINING_SHARD_DIR}/{name}',
+            'size': len(body),
+            'hash': hashlib.sha256(body).hexdigest()[:16],
+        })
+
+    # 清理篇章数减少后遗留的旧分片
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name not in written:
+            os.remove(os.path.join(shard_dir, name))
+
+    index = {k: v for k, v in data.items() if k != 'chapters'}
+    if not index.get('bible_books'):
+        output_root = os.path.dirname(os.path.normpath(training_dir))
+        books, books_re = HTMLGenerator._bible_books_pattern(output_root)
+        if books_re is not None:
+            found = set(books_re.findall(_normalize_source_abbr(raw.decode('utf-8'))))
+            bible_books = [b for b in books if b in found]
+            if bible_books:
+                index['bible_books'] = bible_books
+    index.update({
+        'format': TRAINING_INDEX_FORMAT,
+        'source': source_hash,
+        'chapter_count': len(entries),
+        'chapters': entries,
+    })
+    index_raw = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    _write_bytes_atomic(index_path, index_raw)
+    return {'file': TRAINING_INDEX_FILE,
+            'hash': hashlib.sha256(index_raw).hexdigest()[:16],
+            'size': len(index_raw)}
+
+
+def generate_search_index_from_json(output_root: str, trainings: list) -> dict:
+    """Build the full-text search index by reading training.json files (SPA mode).
+
+    Generates one inverted-index shard per training (see src/search_index.py):
+      output_root/data/search/<path>.json — bigram postings + paragraph locators
+                                            (text is read from training.json)
+      output_root/data/search/index.json  — shard manifest (path, title, year,
+                                            version, doc count, hash)
+    History collections (is_collection) are indexed like any other training.
+    The legacy flat data/search-index.json is removed.
+
+    Incremental: each shard is a segment keyed on the training's `version`
+    (trainings[i]['version'], else the version field of its training.json).
+    A training whose version matches the previous manifest entry, with the
+    shard file still in place, keeps its shard untouched — its training.json
+    is not even read; the manifest is then rewritten from reused + rebuilt entries.
+
+    Returns: {path: {'file', 'hash', 'size', 'docs'}} for every shard written.
+    """
+    from datetime import datetime as _dt
 
-    for training in trainings:
-        path          = training.get('path', '')
-        title         = training.get('title', '')
-        year          = training.get('year', '')
-        season        = training.get('season', '')
-        season_label  = f"{year}-{season}" if year and season else path
+    data_dir = os.path.join(output_root, 'data')
+    search_dir = os.path.join(data_dir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
 
+    manifest_path = os.path.join(search_dir, SEARCH_MANIFEST_FILE)
+    previous = {}
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            old_index = json.load(f)
+        if old_index.get('format') == SEARCH_INDEX_FORMAT:
+            previous = {e['path']: e for e in old_index.get('shards', []) if e.get('path')}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    shards = {}
+    manifest = []
+    total_docs = 0
+    reused = 0
+    for training in trainings:
+        path = training.get('path', '')
         json_path = os.path.join(output_root, path, 'training.json')
-        if not os.path.isfile(json_path):
+        if not path or not os.path.isfile(json_path):
+            continue
+
+        # 版本未变且分片文件仍在 → 直接复用该段
+        version = training.get('version') or ''
+        old = previous.get(path)
+        if version and old and old.get('version') == version:
+            shard_file = os.path.join(output_root, old.get('file', ''))
+            if os.path.isfile(shard_file) and os.path.getsize(shard_file) == old.get('size'):
+                info = {k: old[k] for k in ('file', 'hash', 'size', 'docs')}
+                shards[path] = info
+                total_docs += info['docs']
+                manifest.append(dict(old, is_collection=bool(training.get('is_collection'))))
+                reused += 1
+                continue
+
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                tdata = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  ⚠ 搜索索引跳过 {path}: {e}")
             continue
 
-        total_files += 1
-        with open(json_path, encoding='utf-8') as f:
-            tdata = json.load(f)
-
-        for chapter in tdata.get('chapters', []):
-            num = chapter.get('number', 0)
-            ch_title = f"第{num}篇 {chapter.get('title', '')}"
-
-            # message content (h)
-            for pi, para in enumerate(chapter.get('message_content', [])):
-                if len(para) >= 10:
-                    entries.append({'url': f"{path}/{num}/h", 'training': title,
-                                    'season_label': season_label, 'chapter': num,
-                                    'type': 'h', 'type_label': '听抄',
-                                    'chapter_title': ch_title, 'pi': pi,
-                                    'selector': 'content-text', 'text': para[:200]})
-
-            # outline sections (cv)
-            cv_buf = []; flatten_sections(chapter.get('outline_sections', []), cv_buf)
-            for pi, para in enumerate(cv_buf):
-                if len(para) >= 10:
-                    entries.append({'url': f"{path}/{num}/cv", 'training': title,
-                                    'season_label': season_label, 'chapter': num,
-                                    'type': 'cv', 'type_label': '纲目',
-                                    'chapter_title': ch_title, 'pi': pi,
-                                    'selector': 'outline-item', 'text': para[:200]})
-
-            # morning revival (cx) — day_index 记录第几天，前端在对应 day-page 内按 pi 定位
-            # DOM 顺序：morning_feeding(.content-text) → message_reading(.content-text)
-            for day_idx, revival in enumerate(chapter.get('morning_revivals', [])):
-                mf = revival.get('morning_feeding', [])
-                for pi, para in enumerate(mf):
-                    if len(para) >= 10:
-                        entries.append({'url': f"{path}/{num}/cx", 'training': title,
-                                        'season_label': season_label, 'chapter': num,
-                                        'type': 'cx', 'type_label': '晨兴喂养',
-                                        'chapter_title': ch_title, 'pi': pi,
-                                        'day_index': day_idx,
-                                        'selector': 'content-text', 'text': para[:200]})
-                mf_len = len(mf)
-                for mri, para in enumerate(revival.get('message_reading', [])):
-                    if len(para) >= 10:
-                        entries.append({'url': f"{path}/{num}/cx", 'training': title,
-                                        'season_label': season_label, 'chapter': num,
-                                        'type': 'cx', 'type_label': '信息选读',
-                                        'chapter_title': ch_title, 'pi': mf_len + mri,
-                                        'day_index': day_idx,
-                                        'selector': 'content-text', 'text': para[:200]})
-
-            # ministry excerpt (zs)
-            zs_text = chapter.get('ministry_excerpt', '')
-            if len(zs_text) >= 10:
-                entries.append({'url': f"{path}/{num}/zs", 'training': title,
-                                'season_label': season_label, 'chapter': num,
-                                'type': 'zs', 'type_label': '职事摘录',
-                                'chapter_title': ch_title, 'pi': 0,
-                                'selector': 'content-text', 'text': zs_text[:200]})
+        shard = build_search_shard(training, tdata)
+        body = json.dumps(shard, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        name = f'{path}.json'
+        _write_bytes_atomic(os.path.join(search_dir, name), body)
+        info = {'file': f'data/{SEARCH_DIR}/{name}',
+                'hash': hashlib.sha256(body).hexdigest()[:16],
+                'size': len(body),
+                'docs': len(shard['docs'])}
+        shards[path] = info
+        total_docs += info['docs']
+        manifest.append(dict(info, path=path, title=shard['training'],
+                             year=tdata.get('year') or training.get('year', ''),
+                             season_label=shard['season_label'], version=version or shard['version'],
+                             is_collection=bool(training.get('is_collection'))))
+
+    # 清理已不在训练列表中的旧分片
+    for name in os.listdir(search_dir):
+        if name.endswith('.json') and name != SEARCH_MANIFEST_FILE and name[:-5] not in shards:
+            os.remove(os.path.join(search_dir, name))
+    legacy = os.path.join(data_dir, 'search-index.json')
+    if os.path.isfile(legacy):
+        os.remove(legacy)
 
     index_data = {
+        'format':  SEARCH_INDEX_FORMAT,
         'version': _dt.now().strftime('%Y%m%d%H%M%S'),
-        'count':   len(entries),
-        'entries': entries,
+        'count':   total_docs,
+        'shards':  manifest,
     }
-    out_path = os.path.join(output_root, 'data', 'search-index.json')
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    with open(out_path, 'w', encoding='utf-8') as fh:
-        json.dump(index_data, fh, ensure_ascii=False, separators=(',', ':'))
-    print(f"✓ search-index.json 已生成: {len(entries)} 条索引（{total_files} 个 training.json）")
+    _write_bytes_atomic(manifest_path,
+                        json.dumps(index_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+    get_profiler().record('search_index', reused=reused, rebuilt=len(shards) - reused)
+    print(f"✓ 搜索索引已生成: {total_docs} 个段落，{len(shards)} 个分片"
+          f"（复用 {reused}，重建 {len(shards) - reused}）")
+    return shards
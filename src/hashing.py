@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+"""
+文件内容哈希 — 构建缓存、资源包、预压缩、.doc 转换缓存与圣经导出共用
+
+    file_sha256('output/data/bible-text.bin')    # 64 位十六进制
+"""
+import hashlib
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的 SHA-256（分块读取）。"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+流式 JSON 写出 — 边序列化边写文件，输出与 json.dumps(ensure_ascii=False, separators=(',', ':')) 相同
+
+    with open(path, 'w', encoding='utf-8') as f:
+        w = JsonStreamWriter(f, string_hook=_normalize_source_abbr)
+        w.raw('{"title":')
+        w.value(title)
+        w.raw(',"chapters":[')
+        for i, ch in enumerate(chapters):
+            w.raw(',' if i else '')
+            w.value(ch.to_dict())
+        w.raw(']}')
+        w.flush()
+
+string_hook 作用于每个字符串（含对象键），用于逐字段替换（如出处缩写归一），
+代替对整段 JSON 文本做替换；写出内容先积累到缓冲区，超过 chunk_size 时写盘。
+"""
+import json
+from typing import Callable, Optional, TextIO
+
+try:
+    from json.encoder import c_encode_basestring as _encode_str
+except ImportError:  # 无 C 加速时退回纯 Python 实现
+    from json.encoder import py_encode_basestring as _encode_str
+if _encode_str is None:
+    from json.encoder import py_encode_basestring as _encode_str
+
+_float_repr = float.__repr__
+
+
+class JsonStreamWriter:
+    """把 Python 值（dict / list / tuple / str / int / float / bool / None）写成紧凑 JSON。"""
+
+    def __init__(self, f: TextIO, string_hook: Optional[Callable[[str], str]] = None,
+                 chunk_size: int = 1 << 16):
+        self.f = f
+        self.string_hook = string_hook
+        self.chunk_size = chunk_size
+        self._parts = []
+        self._pending = 0
+
+    def raw(self, text: str) -> None:
+        """原样写入一段 JSON 文本（调用方保证格式正确）。"""
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def string(self, s: str) -> None:
+        if self.string_hook is not None:
+            s = self.string_hook(s)
+        self.raw(_encode_str(s))
+
+    def value(self, v) -> None:
+        """写入一个值；整个值编码完成后才检查是否写盘（单个值不会被拆开）。"""
+        parts = self._parts
+        start = len(parts)
+        self._encode(v, parts.append, self.string_hook or _identity)
+        self._pending += sum(map(len, parts[start:]))
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def _encode(self, v, emit, hook) -> None:
+        if isinstance(v, str):
+            emit(_encode_str(hook(v)))
+        elif isinstance(v, dict):
+            if not v:
+                emit('{}')
+                return
+            sep = '{'
+            for k, item in v.items():
+                emit(sep + _encode_str(hook(k if isinstance(k, str) else _key_str(k))) + ':')
+                sep = ','
+                if isinstance(item, str):
+                    emit(_encode_str(hook(item)))
+                else:
+                    self._encode(item, emit, hook)
+            emit('}')
+        elif isinstance(v, (list, tuple)):
+            if all(isinstance(item, str) for item in v):
+                # 字符串列表（段落、经文）：一次拼接
+                emit('[' + ','.join([_encode_str(hook(item)) for item in v]) + ']')
+                return
+            sep = '['
+            for item in v:
+                emit(sep)
+                sep = ','
+                self._encode(item, emit, hook)
+            emit(']')
+        elif v is None:
+            emit('null')
+        elif v is True:
+            emit('true')
+        elif v is False:
+            emit('false')
+        elif isinstance(v, int):
+            emit(int.__repr__(v))
+        elif isinstance(v, float):
+            emit(json.dumps(v) if v != v or v in (float('inf'), float('-inf')) else _float_repr(v))
+        else:
+            raise TypeError(f'Object of type {type(v).__name__} is not JSON serializable')
+
+    def flush(self) -> None:
+        if self._parts:
+            self.f.write(''.join(self._parts))
+            self._parts = []
+            self._pending = 0
+
+
+def _identity(s: str) -> str:
+    return s
+
+
+def _key_str(k) -> str:
+    """与 json.dumps 相同的非字符串键转换。"""
+    if k is True:
+        return 'true'
+    if k is False:
+        return 'false'
+    if k is None:
+        return 'null'
+    if isinstance(k, float):
+        return _float_repr(k)
+    if isinstance(k, int):
+        return int.__repr__(k)
+    raise TypeError(f'keys must be str, int, float, bool or None, not {type(k).__name__}')
@@ -5,6 +5,8 @@
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+from .scripture_refs import FEEDING_FULL_RE, FEEDING_SHORT_RE, FEEDING_VERSE_RE
+
 
 @dataclass
 class Content:
@@ -105,22 +107,13 @@ class Chapter:
         Returns:
             (scriptures, content) 元组
         """
-        import re
         scriptures = []
         content = []
         
-        # 经文格式1：完整格式（书卷+章节）
-        # 匹配：路十一11 或 路十一11~13 或 约壹一6~7 或 林后十三14
-        # 书卷名：1-2个字（如：路、约壹、林后）
-        full_pattern = re.compile(r'^[创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提多门彼雅犹启壹贰叁前后来]{1,2}[一二三四五六七八九十\d]+[:：]?\d+([~～\-]\d+)?[\s　]+')
-        
-        # 经文格式2：省略书卷名（只有章节，第二处经文可能省略书卷名）
-        # 匹配：二1 或 十三14 或 二二1
-        short_pattern = re.compile(r'^[一二三四五六七八九十\d]+[:：]?\d+([~～\-]\d+)?[\s　]+')
-        
-        # 经文格式3：只有节号（同一章的不同节）
-        # 匹配：5 或 11 或 13~15（开头是数字+空格）
-        verse_pattern = re.compile(r'^\d+([~～\-]\d+)?[\s　]+')
+        # 经文格式：完整格式（路十一11）、省略书卷名（二1）、只有节号（13~15），见 scripture_refs
+        full_pattern = FEEDING_FULL_RE
+        short_pattern = FEEDING_SHORT_RE
+        verse_pattern = FEEDING_VERSE_RE
         
         # 经文段落的最大长度（超过这个长度可能包含了正文内容）
         MAX_SCRIPTURE_LENGTH = 800
@@ -217,8 +210,8 @@ class TrainingData:
                 return chapter
         return None
     
-    def to_dict(self):
-        """转换为字典"""
+    def header_dict(self):
+        """顶层字段（不含篇章），流式导出时先写出这部分"""
         return {
             'title': self.title,
             'subtitle': self.subtitle,
@@ -227,5 +220,10 @@ class TrainingData:
             'mottos': self.mottos,
             'motto_song_image': self.motto_song_image,
             'motto_song_images': self.motto_song_images if self.motto_song_images else ([self.motto_song_image] if self.motto_song_image else []),
-            'chapters': [ch.to_dict() for ch in self.chapters]
         }
+
+    def to_dict(self):
+        """转换为字典"""
+        d = self.header_dict()
+        d['chapters'] = [ch.to_dict() for ch in self.chapters]
+        return d
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+常驻 Node 构建进程客户端 — 与 tools/node-worker.js 通过 stdin/stdout 逐行 JSON 通信
+
+整次构建只启动一次 node：TXT/EPUB 批次解析、training.json 富化、历史合辑生成
+都作为请求发给同一个进程，前端 JS 模块只加载一次。
+
+    worker = get_node_worker()
+    meta, log = worker.call('build-batch-txt', {'folder': ..., 'output': ...})
+
+多个请求可同时在途（submit 返回 Future），由 Node 端线程池并发执行。
+call() 默认最多等待 CX_NODE_TIMEOUT 秒（默认 1800，0 表示不限）；超时视为 Node 端卡死，
+终止该进程并抛出 NodeWorkerError，下次 get_node_worker() 会重新启动。
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_SCRIPT = os.path.join(_PROJECT_ROOT, 'tools', 'node-worker.js')
+
+# call() 的默认超时（秒）；0 表示不限
+DEFAULT_CALL_TIMEOUT = float(os.environ.get('CX_NODE_TIMEOUT') or 1800)
+
+
+class NodeWorkerError(RuntimeError):
+    """Node 端执行失败；log 为该请求执行期间的日志行。"""
+
+    def __init__(self, message: str, log: Optional[List[str]] = None):
+        super().__init__(message)
+        self.log = log or []
+
+
+class NodeWorker:
+    """tools/node-worker.js 进程的客户端（线程安全）。"""
+
+    def __init__(self, threads: Optional[int] = None, node: str = 'node'):
+        cmd = [node, WORKER_SCRIPT]
+        if threads:
+            cmd.extend(['--threads', str(threads)])
+        self._proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+        )
+        self._lock = threading.Lock()
+        self._pending = {}  # id -> Future
+        self._next_id = 0
+        self._dead = None   # 进程退出后的错误信息
+        self._reader = threading.Thread(target=self._read_loop, name='node-worker-reader', daemon=True)
+        self._reader.start()
+
+    # ------------------------------------------------------------------
+    # 请求
+    # ------------------------------------------------------------------
+
+    def submit(self, method: str, params: Dict[str, Any]) -> Future:
+        """发送请求，返回 Future；结果为 (result, log)，失败时抛出 NodeWorkerError。"""
+        future = Future()
+        with self._lock:
+            if self._dead:
+                raise NodeWorkerError(self._dead)
+            self._next_id += 1
+            req_id = self._next_id
+            self._pending[req_id] = future
+            try:
+                self._proc.stdin.write(json.dumps(
+                    {'id': req_id, 'method': method, 'params': params}, ensure_ascii=False
+                ) + '\n')
+                self._proc.stdin.flush()
+            except OSError as e:
+                del self._pending[req_id]
+                raise NodeWorkerError(f'Node 构建进程不可用: {e}')
+        return future
+
+    def call(self, method: str, params: Dict[str, Any],
+             timeout: Optional[float] = None) -> Tuple[Any, List[str]]:
+        """同步调用，返回 (result, log)。
+
+        timeout 为 None 时使用 DEFAULT_CALL_TIMEOUT；超时后终止 Node 进程（其他在途请求随之失败）
+        并抛出 NodeWorkerError。
+        """
+        if timeout is None:
+            timeout = DEFAULT_CALL_TIMEOUT
+        future = self.submit(method, params)
+        try:
+            return future.result(timeout=timeout or None)
+        except FutureTimeoutError:
+            with self._lock:
+                self._dead = f'Node 构建进程在 {method} 请求上超时（{timeout:g} 秒），已终止'
+            self._proc.kill()
+            raise NodeWorkerError(self._dead)
+
+    @property
+    def alive(self) -> bool:
+        return self._dead is None
+
+    # ------------------------------------------------------------------
+    # 响应
+    # ------------------------------------------------------------------
+
+    def _read_loop(self):
+        for line in self._proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            with self._lock:
+                future = self._pending.pop(reply.get('id'), None)
+            if future is None:
+                continue
+            log = reply.get('log') or []
+            if 'error' in reply:
+                future.set_exception(NodeWorkerError(reply['error'].get('message', ''), log))
+            else:
+                future.set_result((reply.get('result'), log))
+
+        # stdout 关闭：进程已退出，未完成的请求全部失败
+        code = self._proc.wait()
+        with self._lock:
+            self._dead = self._dead or f'Node 构建进程已退出 (exit {code})'
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(NodeWorkerError(self._dead))
+
+    def close(self):
+        """关闭 stdin，等待在途请求完成后进程退出。"""
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._reader.join(timeout=5)
+
+
+_worker = None
+_worker_pid = None
+
+
+def get_node_worker() -> NodeWorker:
+    """
+    返回本进程共用的 NodeWorker（首次调用时、或上一个进程已退出/超时被终止时启动 node）。
+
+    multiprocessing 子进程各自启动自己的 node（不复用父进程继承来的管道），
+    且只开 1 个线程，并发度由 Python 端的进程池决定。
+    """
+    global _worker, _worker_pid
+    if _worker is None or _worker_pid != os.getpid() or not _worker.alive:
+        threads = 1 if multiprocessing.parent_process() is not None else None
+        _worker = NodeWorker(threads=threads)
+        _worker_pid = os.getpid()
+    return _worker
+
+
+def close_node_worker():
+    """关闭本进程的 NodeWorker（未启动时无操作）。"""
+    global _worker
+    if _worker is not None and _worker_pid == os.getpid():
+        _worker.close()
+    _worker = None
+
+
+atexit.register(close_node_worker)
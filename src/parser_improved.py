@@ -7,21 +7,29 @@ import os
 import sys
 import shutil
 import subprocess
-from docx import Document
+from contextlib import contextmanager
 from typing import List, Optional
+from .docx_reader import DocParagraph, DocxContent, load_docx
+from .doc_converter import get_converter
 from .models import Chapter, Content, TrainingData, MorningRevival
 from .bible_dict import BibleDict
+from . import scripture_refs as sr
+from .scripture_refs import BookNameTrie, cn_to_int
 
 
-def load_document(doc_path: str):
+@contextmanager
+def docx_source(doc_path: str):
     """
-    加载Word文档,自动识别 .doc 和 .docx 格式
-    
+    提供可直接读取的 .docx 路径，自动识别 .doc 和 .docx 格式
+
+    .docx 原样返回；.doc 经转换服务（src/doc_converter.py）转换，结果按内容哈希缓存，
+    同一内容的 .doc 只转换一次。
+
     Args:
         doc_path: 文档路径
-    
-    Returns:
-        Document 对象或 None
+
+    Yields:
+        .docx 文件路径
     """
     if not os.path.exists(doc_path):
         raise FileNotFoundError(f"文档不存在: {doc_path}")
@@ -30,88 +38,87 @@ def load_document(doc_path: str):
     ext = os.path.splitext(doc_path)[1].lower()
     
     if ext == '.docx':
-        # 使用 python-docx 解析 .docx
-        return Document(doc_path)
+        yield doc_path
     elif ext == '.doc':
         # .doc格式需要先转换为.docx
-        # 尝试使用LibreOffice进行转换（跨平台方案）
-        try:
-            import tempfile
-            
-            # 创建临时目录
-            temp_dir = tempfile.mkdtemp()
-            abs_path = os.path.abspath(doc_path)
-            
-            # 尝试找到LibreOffice/soffice命令
-            soffice_commands = [
-                'soffice',           # Linux/Mac
-                'libreoffice',       # Linux
-                r'C:\Program Files\LibreOffice\program\soffice.exe',  # Windows
-                r'C:\Program Files (x86)\LibreOffice\program\soffice.exe',
-            ]
-            
-            soffice_path = None
-            for cmd in soffice_commands:
-                if shutil.which(cmd) or os.path.exists(cmd):
-                    soffice_path = cmd
-                    break
-            
-            if soffice_path:
-                print(f"    ⏳ 正在转换 .doc 文件...", file=sys.stderr)
-                # 使用LibreOffice转换
-                result = subprocess.run(
-                    [soffice_path, '--headless', '--convert-to', 'docx', '--outdir', temp_dir, abs_path],
-                    capture_output=True,
-                    timeout=60
-                )
-                
-                if result.returncode == 0:
-                    # 查找转换后的文件
-                    docx_name = os.path.splitext(os.path.basename(doc_path))[0] + '.docx'
-                    temp_docx = os.path.join(temp_dir, docx_name)
-                    
-                    if os.path.exists(temp_docx):
-                        print(f"    ✓ 转换成功，继续处理...", file=sys.stderr)
-                        doc = Document(temp_docx)
-                        # 清理临时文件
-                        shutil.rmtree(temp_dir, ignore_errors=True)
-                        return doc
-            
-            # LibreOffice不可用或转换失败
-            shutil.rmtree(temp_dir, ignore_errors=True)
-            
-            # 提供友好的错误提示
-            print("\n" + "="*60, file=sys.stderr)
-            print("⚠ 无法自动转换 .doc 文件", file=sys.stderr)
-            print("="*60, file=sys.stderr)
-            print("\n请选择以下解决方案之一：", file=sys.stderr)
-            print("\n方案 1: 手动转换（最快）", file=sys.stderr)
-            print(f"  1. 在 Word 中打开: {doc_path}", file=sys.stderr)
-            print("  2. 另存为 .docx 格式", file=sys.stderr)
-            print("  3. 重新运行此程序", file=sys.stderr)
-            print("\n方案 2: 安装 LibreOffice（自动化）", file=sys.stderr)
-            print("  运行转换工具: python convert_doc_to_docx.py", file=sys.stderr)
-            print("  工具会自动检测系统并引导安装", file=sys.stderr)
-            print("\n方案 3: 使用在线转换", file=sys.stderr)
-            print("  https://www.online-convert.com/", file=sys.stderr)
-            print("  https://www.zamzar.com/", file=sys.stderr)
-            print("\n" + "="*60, file=sys.stderr)
-            
-            raise ImportError(
-                f"无法转换 .doc 文件: {os.path.basename(doc_path)}\n"
-                "请安装 LibreOffice 或手动转换为 .docx 格式"
-            )
-            
-        except subprocess.TimeoutExpired:
-            raise Exception("LibreOffice 转换超时（60秒）")
-        except Exception as e:
-            if isinstance(e, ImportError):
-                raise
-            raise Exception(f"解析 .doc 文件失败: {e}")
+        yield _convert_doc_to_docx(doc_path)
     else:
         raise ValueError(f"不支持的文件格式: {ext}")
 
 
+def _convert_doc_to_docx(doc_path: str) -> str:
+    """使用 LibreOffice 转换服务将 .doc 转换为 .docx（带缓存），返回 .docx 路径。"""
+    converter = get_converter()
+    try:
+        if converter.soffice_path or os.path.exists(converter.cached_path(doc_path)):
+            docx_path = converter.convert_many([doc_path]).get(doc_path)
+            if docx_path:
+                return docx_path
+        
+        # LibreOffice不可用或转换失败
+        # 提供友好的错误提示
+        print("\n" + "="*60, file=sys.stderr)
+        print("⚠ 无法自动转换 .doc 文件", file=sys.stderr)
+        print("="*60, file=sys.stderr)
+        print("\n请选择以下解决方案之一：", file=sys.stderr)
+        print("\n方案 1: 手动转换（最快）", file=sys.stderr)
+        print(f"  1. 在 Word 中打开: {doc_path}", file=sys.stderr)
+        print("  2. 另存为 .docx 格式", file=sys.stderr)
+        print("  3. 重新运行此程序", file=sys.stderr)
+        print("\n方案 2: 安装 LibreOffice（自动化）", file=sys.stderr)
+        print("  运行转换工具: python convert_doc_to_docx.py", file=sys.stderr)
+        print("  工具会自动检测系统并引导安装", file=sys.stderr)
+        print("\n方案 3: 使用在线转换", file=sys.stderr)
+        print("  https://www.online-convert.com/", file=sys.stderr)
+        print("  https://www.zamzar.com/", file=sys.stderr)
+        print("\n" + "="*60, file=sys.stderr)
+        
+        raise ImportError(
+            f"无法转换 .doc 文件: {os.path.basename(doc_path)}\n"
+            "请安装 LibreOffice 或手动转换为 .docx 格式"
+        )
+        
+    except subprocess.TimeoutExpired:
+        raise Exception("LibreOffice 转换超时（60秒）")
+    except Exception as e:
+        if isinstance(e, ImportError):
+            raise
+        raise Exception(f"解析 .doc 文件失败: {e}")
+
+
+class DocumentCache:
+    """
+    Word 文档缓存 — 按 路径 + mtime 缓存已读取的文档内容
+
+    同一批次内各解析阶段共用，保证每份文档只解压、解析一次（.doc 只转换一次）。
+    文件被修改（mtime/大小变化）后自动重新读取。
+    """
+
+    def __init__(self):
+        self._entries = {}  # abspath -> ((mtime_ns, size), DocxContent)
+
+    def get(self, doc_path: str) -> DocxContent:
+        """返回文档内容（段落记录、样式、图片），必要时读取并缓存。"""
+        if not os.path.exists(doc_path):
+            raise FileNotFoundError(f"文档不存在: {doc_path}")
+        st = os.stat(doc_path)
+        key = os.path.abspath(doc_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        with docx_source(doc_path) as docx_path:
+            content = load_docx(docx_path)
+        self._entries[key] = (stamp, content)
+        return content
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class ImprovedParser:
     """改进的解析器"""
     
@@ -140,29 +147,29 @@ class ImprovedParser:
     LEVEL1_PATTERN = re.compile(r'^([壹贰叁肆伍陆柒捌玖拾])[　\s]+(.*)')
     LEVEL2_PATTERN = re.compile(r'^([一二三四五六七八九十百]+)[　\s]+(.*)')
     LEVEL3_PATTERN = re.compile(r'^(\d+)[　\s]+(.*)')
+    # 层级标识（壹、一、1、a、㈠）：_extract_level_marker 取标识，_clean_title 去标识
+    LEVEL_MARKER_PATTERNS = (
+        re.compile(r'^([壹贰叁肆伍陆柒捌玖拾]+)\s'),
+        re.compile(r'^([一二三四五六七八九十]+)\s'),
+        re.compile(r'^(\d+)\s'),
+        re.compile(r'^([a-z])\s'),
+        re.compile(r'^([\u3220-\u3229㈠㈡㈢㈣㈤㈥㈦㈧㈨㈩])'),  # level-5: ㈠㈡㈢
+    )
+    TITLE_MARKER_PATTERNS = (
+        re.compile(r'^[壹贰叁肆伍陆柒捌玖拾]+\s+'),
+        re.compile(r'^[一二三四五六七八九十]+\s+'),
+        re.compile(r'^\d+\s+'),
+        re.compile(r'^[a-z]\s+'),
+        re.compile(r'^[\u3220-\u3229㈠㈡㈢㈣㈤㈥㈦㈧㈨㈩]\s*'),  # level-5 括号数字
+    )
     # 经文格式：太5:3	经文内容... 或 腓2:5	经文内容... 或 太五3	经文内容...
     # 支持两种格式: 1) 书卷+中文数字+阿拉伯数字 (太五3), 2) 书卷+阿拉伯数字 (腓2:5)
     VERSE_PATTERN = re.compile(r'^([创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多来雅彼约犹启](?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+):\d+[上中下]?)[　\s\t]+(.+)')
 
     # ── 中文章节引用解析常量 ──────────────────────────────────────────
-    _BOOK_BASE_PAT = r'[创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多来雅彼犹启]'
-    _BOOK_MOD_PAT = r'[后前上下壹贰叁]'
-    _CN_CHAP_PAT = (
-        r'(?:一百五十'
-        r'|一百[一二三四][十][一二三四五六七八九]'
-        r'|一百[一二三四][十]'
-        r'|一百零[一二三四五六七八九]'
-        r'|一百'
-        r'|[三四五六七八九][十][一二三四五六七八九]'
-        r'|[三四五六七八九][十]'
-        r'|二十[一二三四五六七八九]'
-        r'|二十'
-        r'|十[一二三四五六七八九]'
-        r'|十'
-        r'|[一二三四五六七八九][一二三四五六七八九][一二三四五六七八九○零]'
-        r'|[二三四五六七八九][一二三四五六七八九]'
-        r'|[一二三四五六七八九])'
-    )
+    _BOOK_BASE_PAT = sr.BOOK_BASE_PAT
+    _BOOK_MOD_PAT = sr.BOOK_MOD_PAT
+    _CN_CHAP_PAT = sr.CN_CHAP_PAT
     # 全称引用：书卷(+可选修饰) + 中文章 + 阿拉伯节[~节][上下]
     _FULL_REF_RE = re.compile(
         r'^(' + _BOOK_BASE_PAT + _BOOK_MOD_PAT + r'?)'
@@ -233,8 +240,8 @@ class ImprovedParser:
 
     # ── 合并映射（正式全名优先；供现有代码统一使用）──────────────────────
     _FULL_BOOK_MAP = {**_CANONICAL_BOOK_MAP, **_ALIAS_BOOK_MAP}
-    # 预排序（从长到短），避免前缀误替换，仅计算一次
-    _FULL_BOOK_MAP_SORTED = sorted(_FULL_BOOK_MAP.items(), key=lambda x: -len(x[0]))
+    # 书名前缀树：单遍最长匹配归一化
+    _BOOK_NAME_TRIE = BookNameTrie(_FULL_BOOK_MAP)
 
     # 章/节 引用（书卷 + 中文章 + 章 + 中文节 + 节）
     _CN_NUM = r'[一二三四五六七八九十百]+'
@@ -274,9 +281,11 @@ class ImprovedParser:
         r'^(' + _CN_CHAP_PAT + r')[~～\-—]+(' + _CN_CHAP_PAT + r')$'
     )
 
-    def __init__(self, output_dir: str = 'output', bible_dict: BibleDict = None):
+    def __init__(self, output_dir: str = 'output', bible_dict: BibleDict = None,
+                 doc_cache: Optional[DocumentCache] = None):
         self.output_dir = output_dir
         self.bible_dict = bible_dict  # 外部传入的持久化经文字典（可选）
+        self.doc_cache = doc_cache if doc_cache is not None else DocumentCache()  # 批次内共享的文档缓存
         self.training_title = ""  # 训练主标题
         self.training_subtitle = ""  # 训练副标题
         self.first_week_number = None  # 记录第一个晨兴文档的起始周数
@@ -314,7 +323,7 @@ class ImprovedParser:
         返回: (book, start_verse, end_verse, is_omitted)
         """
         # 匹配 "腓2:5~11 从略。" 或 "腓2:5~11" - 支持两种格式
-        range_match = re.match(r'^([创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多彼约犹启来](?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+)):(\d+)~(\d+)', text)
+        range_match = sr.VERSE_RANGE_RE.match(text)
         if range_match:
             book = range_match.group(1)
             start = int(range_match.group(2))
@@ -323,7 +332,7 @@ class ImprovedParser:
             return (book, start, end, is_omitted)
         
         # 匹配单节 "腓2:5"
-        single_match = re.match(r'^([创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多彼约犹启来](?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+)):(\d+)', text)
+        single_match = sr.VERSE_SINGLE_RE.match(text)
         if single_match:
             book = single_match.group(1)
             verse = int(single_match.group(2))
@@ -369,7 +378,7 @@ class ImprovedParser:
         解析纲目文档（经文.docx/.doc）- 提取大纲结构和职事信息摘录
         """
         # print(f"  解析纲目结构（{os.path.basename(docx_path)}）...")
-        doc = load_document(docx_path)
+        paragraphs = self.doc_cache.get(docx_path).top_level_paragraphs
         chapters = []
         self.reset_state()
         in_content_section = False
@@ -388,7 +397,7 @@ class ImprovedParser:
         # 首先在文档开头提取标题信息和标语
         title_parts = []
         subtitle_found = False
-        for i, para in enumerate(doc.paragraphs[:60]):  # 扩大检查范围以包含标语
+        for i, para in enumerate(paragraphs[:60]):  # 扩大检查范围以包含标语
             text = para.text.strip()
             # Normalize spaces in chapter markers
             text = re.sub(r'^第\s+([一二三四五六七八九十百]+)\s+篇', r'第\1篇', text)
@@ -447,8 +456,8 @@ class ImprovedParser:
                     title_parts.append(title_part)
                 parts = [inline_content] if inline_content else []
                 _stop_re = re.compile(r'目\s*录|^第[一二三四五六七八九十]+篇|^标[\u3000\s]*语|^\d+$')
-                for _j in range(i + 1, min(i + 6, len(doc.paragraphs))):
-                    _next = doc.paragraphs[_j].text.strip()
+                for _j in range(i + 1, min(i + 6, len(paragraphs))):
+                    _next = paragraphs[_j].text.strip()
                     if not _next:
                         break
                     if _stop_re.match(_next):
@@ -465,8 +474,8 @@ class ImprovedParser:
                 parts = [inline_content] if inline_content else []
                 # 继续收集后续行，直到空行/目录/章节标记（最多再收集4行）
                 _stop_re = re.compile(r'目\s*录|^第[一二三四五六七八九十]+篇|^标[　\s]*语|^\d+$')
-                for _j in range(i + 1, min(i + 6, len(doc.paragraphs))):
-                    _next = doc.paragraphs[_j].text.strip()
+                for _j in range(i + 1, min(i + 6, len(paragraphs))):
+                    _next = paragraphs[_j].text.strip()
                     if not _next:
                         break  # 空行表示副标题结束
                     if _stop_re.match(_next):
@@ -534,13 +543,13 @@ class ImprovedParser:
                 self.training_title = "训练"
                 print(f"  ⚠ 无法识别训练类型，使用通用标题: {self.training_title}")
 
-        for para in doc.paragraphs:
+        for para in paragraphs:
             text = para.text.strip()
             # Normalize spaces in chapter markers
             text = re.sub(r'^第\s+([一二三四五六七八九十百]+)\s+篇', r'第\1篇', text)
             
             # 如果是verses样式或经文格式，添加到当前节点的scripture
-            is_verse_by_style = para.style and (para.style.name == 'verses' or para.style.name == '０c 經節')
+            is_verse_by_style = para.style_name in ('verses', '０c 經節')
             is_verse_by_format = self._is_verse_line(text)
             
             if (is_verse_by_style or is_verse_by_format) and current_node and text:
@@ -730,7 +739,7 @@ class ImprovedParser:
             # 处理经文内容（verses样式或经文格式）
             if self.current_chapter:
                 # 方式1：通过样式名识别 (支持'verses'和'０c 經節')
-                is_verse_by_style = para.style and (para.style.name == 'verses' or para.style.name == '０c 經節')
+                is_verse_by_style = para.style_name in ('verses', '０c 經節')
                 # 方式2：通过内容格式识别（如：腓2:5	经文内容...）
                 is_verse_by_format = self._is_verse_line(text)
                 
@@ -791,11 +800,11 @@ class ImprovedParser:
         - 听抄的实际内容
         """
         # print(f"  解析详细内容（{os.path.basename(docx_path)}）...")
-        doc = load_document(docx_path)
+        paragraphs = self.doc_cache.get(docx_path).top_level_paragraphs
         current_chapter_num = 0
         self.reset_state()
         
-        for para in doc.paragraphs:
+        for para in paragraphs:
             text = para.text.strip()
             # Normalize spaces in chapter markers
             text = re.sub(r'^第\s+([一二三四五六七八九十百]+)\s+篇', r'第\1篇', text)
@@ -804,7 +813,7 @@ class ImprovedParser:
                 continue
             
             # 获取样式类型（支持样式名称映射或直接匹配）
-            style_type = self.STYLE_MAP.get(para.style.name) if para.style and para.style.name else None
+            style_type = self.STYLE_MAP.get(para.style_name) if para.style_name else None
             
             # 如果样式映射失败，尝试通过文本特征判断
             if not style_type:
@@ -976,16 +985,8 @@ class ImprovedParser:
     
     def _extract_level_marker(self, text: str) -> str:
         """提取层级标识"""
-        patterns = [
-            r'^([壹贰叁肆伍陆柒捌玖拾]+)\s',
-            r'^([一二三四五六七八九十]+)\s',
-            r'^(\d+)\s',
-            r'^([a-z])\s',
-            r'^([\u3220-\u3229㈠㈡㈢㈣㈤㈥㈦㈧㈨㈩])',  # level-5: ㈠㈡㈢
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, text)
+        for pattern in self.LEVEL_MARKER_PATTERNS:
+            match = pattern.match(text)
             if match:
                 return match.group(1)
         
@@ -1004,95 +1005,25 @@ class ImprovedParser:
         """
         # print(f"  解析晨兴内容（{os.path.basename(docx_path)}）...")
         
-        # 检查文件格式
-        is_doc_format = docx_path.endswith('.doc') and not docx_path.endswith('.docx')
-        
-        # 加载文档进行文本解析
-        doc = load_document(docx_path)
-        
-        # 对于.doc文件，需要先转换为临时.docx才能提取图片
-        # 使用LibreOffice转换（跨平台方案）
-        temp_docx_path = None
-        if is_doc_format:
-            import tempfile
-            import subprocess
-            import shutil
-            
-            temp_dir = tempfile.mkdtemp()
-            abs_path = os.path.abspath(docx_path)
-            
-            try:
-                # 尝试找到LibreOffice/soffice命令
-                soffice_commands = [
-                    'soffice',
-                    'libreoffice',
-                    r'C:\Program Files\LibreOffice\program\soffice.exe',
-                    r'C:\Program Files (x86)\LibreOffice\program\soffice.exe',
-                ]
-                
-                soffice_path = None
-                for cmd in soffice_commands:
-                    if shutil.which(cmd) or os.path.exists(cmd):
-                        soffice_path = cmd
-                        break
-                
-                if soffice_path:
-                    # 使用LibreOffice转换
-                    result = subprocess.run(
-                        [soffice_path, '--headless', '--convert-to', 'docx', '--outdir', temp_dir, abs_path],
-                        capture_output=True,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        timeout=30
-                    )
-                    
-                    if result.returncode == 0:
-                        docx_name = os.path.splitext(os.path.basename(docx_path))[0] + '.docx'
-                        temp_docx_path = os.path.join(temp_dir, docx_name)
-                        
-                        if os.path.exists(temp_docx_path):
-                            # 从临时docx提取图片
-                            print("  提取诗歌图片...", file=sys.stderr)
-                            doc_id = os.path.basename(docx_path).replace('.doc', '').replace('.docx', '')
-                            self._extract_hymn_images(temp_docx_path, chapters, doc_id)
-                            temp_docx_path = temp_docx_path  # 保存路径供后续使用
-                        else:
-                            print("    ⚠ LibreOffice转换失败，跳过图片提取", file=sys.stderr)
-                else:
-                    print("    ⚠ 未找到LibreOffice，跳过图片提取", file=sys.stderr)
-                    print("    提示: 安装LibreOffice或手动将.doc转换为.docx", file=sys.stderr)
-                
-            except subprocess.TimeoutExpired:
-                print("    ⚠ LibreOffice转换超时", file=sys.stderr)
-            except Exception as e:
-                print(f"    ⚠ 提取诗歌图片失败: {e}", file=sys.stderr)
-            finally:
-                # 清理临时文件
-                shutil.rmtree(temp_dir, ignore_errors=True)
-        else:
-            # .docx文件可以直接提取图片
-            print("  提取诗歌图片...", file=sys.stderr)
-            doc_id = os.path.basename(docx_path).replace('.doc', '').replace('.docx', '')
-            self._extract_hymn_images(docx_path, chapters, doc_id)
+        # 文本解析和诗歌图片提取共用同一份缓存的文档内容（.doc 只转换一次）
+        doc = self.doc_cache.get(docx_path)
+        print("  提取诗歌图片...", file=sys.stderr)
+        doc_id = os.path.basename(docx_path).replace('.doc', '').replace('.docx', '')
+        self._extract_hymn_images(doc, chapters, doc_id)
+        paragraphs = doc.top_level_paragraphs
         
         # 统计样式使用情况，判断使用哪种解析策略
-        style_counts = {}
-        for para in doc.paragraphs[:200]:  # 检查前200段
-            if para.text.strip():
-                if para.style and para.style.name:
-                    style_counts[para.style.name] = style_counts.get(para.style.name, 0) + 1
+        style_counts = doc.style_counts(200)  # 检查前200段
         
         # 夏季样式标记
         has_summer_styles = any(s in style_counts for s in ['第一周', '第一周右', '周期', '１綱要大點壹'])
         
         if has_summer_styles:
             # 使用基于样式的解析（夏季）
-            self._parse_morning_revival_by_styles(doc, chapters)
+            self._parse_morning_revival_by_styles(paragraphs, chapters)
         else:
             # 使用基于文本的解析（秋季）
-            paragraphs = [para.text.strip() for para in doc.paragraphs]
-            self._parse_morning_revival_by_text(paragraphs, chapters)
+            self._parse_morning_revival_by_text([para.text.strip() for para in paragraphs], chapters)
     
     def _parse_morning_revival_by_text(self, paragraphs: List[str], chapters: List[Chapter]):
         """
@@ -1347,7 +1278,7 @@ class ImprovedParser:
                         # 使用前一天的纲目
                         revival.outline = self._parse_outline_content(last_outline_lines)
     
-    def _parse_morning_revival_by_styles(self, doc, chapters: List[Chapter]):
+    def _parse_morning_revival_by_styles(self, paragraphs: List[DocParagraph], chapters: List[Chapter]):
         """
         基于样式的晨兴文档解析（夏季 .doc）
         
@@ -1388,12 +1319,12 @@ class ImprovedParser:
         # 跨周续接：记录换周前最后一个未完整结尾的纲目位置，供下一行续拼
         carry_incomplete = None  # (week_num, day_key) or None
         
-        for para in doc.paragraphs:
+        for para in paragraphs:
             text = para.text.strip()
             if not text:
                 continue
             
-            style = para.style.name
+            style = para.style_name
             
             # 检测周纲目（第X周 • 纲目）
             # 只处理"第一周"样式，忽略"第一周右"
@@ -1962,7 +1893,7 @@ class ImprovedParser:
         可正确处理一篇信息含多张诗歌图片的情形。
         
         Args:
-            doc_or_docx: docx文件路径
+            doc_or_docx: 已读取的 DocxContent，或 docx 文件路径（经文档缓存读取）
             chapters: 章节列表
             doc_identifier: 文档标识符（用于区分多文档时的图片来源）
         """
@@ -1972,22 +1903,25 @@ class ImprovedParser:
 
         try:
             from PIL import Image
-            from docx import Document as DocxDocument
 
             # 创建图片输出目录
             output_dir = os.path.join(self.output_dir, 'images')
             os.makedirs(output_dir, exist_ok=True)
 
-            docx_path = doc_or_docx
-            if not os.path.exists(docx_path):
-                print(f"    ⚠ 文件不存在: {docx_path}", file=sys.stderr)
-                return
-
-            doc = DocxDocument(docx_path)
+            if isinstance(doc_or_docx, DocxContent):
+                doc = doc_or_docx
+            else:
+                if not os.path.exists(doc_or_docx):
+                    print(f"    ⚠ 文件不存在: {doc_or_docx}", file=sys.stderr)
+                    return
+                doc = self.doc_cache.get(doc_or_docx)
+            paragraphs = doc.paragraphs
 
             # ── 1. 检测周数，计算章节偏移 ─────────────────────────────────
             week_numbers = []
-            for para in doc.paragraphs:
+            for para in paragraphs:
+                if not para.top_level:
+                    continue
                 text = para.text.strip()
                 match = re.search(r'第([一二三四五六七八九十百]+)周', text)
                 if match:
@@ -2006,32 +1940,17 @@ class ImprovedParser:
             week_offset = (self.first_week_number or 1) - 1
 
             # ── 2. 建立 rId → blob 映射（通过关系表直接读取图片数据）──────
-            W_P    = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p'
-            A_BLIP = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
-            R_EMBED = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed'
-
-            img_blobs = {}  # rId -> bytes
-            for rId, rel in doc.part.rels.items():
-                if 'image' in rel.reltype:
-                    try:
-                        img_blobs[rId] = rel.target_part.blob
-                    except Exception:
-                        pass
+            img_blobs = doc.image_blobs  # rId -> bytes
 
             if not img_blobs:
                 return
 
             # ── 3. 按段落顺序收集所有图片引用及其段落绝对索引 ────────────
             all_image_positions = []  # [(abs_para_idx, rId), ...]
-            abs_idx = 0
-            for elem in doc.element.body.iter():
-                if elem.tag == W_P:
-                    for child in elem.iter():
-                        if child.tag == A_BLIP:
-                            rId = child.get(R_EMBED)
-                            if rId and rId in img_blobs:
-                                all_image_positions.append((abs_idx, rId))
-                    abs_idx += 1
+            for para in paragraphs:
+                for rId in para.image_rids:
+                    if rId in img_blobs:
+                        all_image_positions.append((para.index, rId))
 
             if not all_image_positions:
                 return
@@ -2196,57 +2115,21 @@ class ImprovedParser:
     def _clean_title(self, text: str) -> str:
         """清理标题，去掉层级标记后的内容"""
         # 去掉开头的层级标记（壹、一、1、a、㈠等）
-        text = re.sub(r'^[壹贰叁肆伍陆柒捌玖拾]+\s+', '', text)
-        text = re.sub(r'^[一二三四五六七八九十]+\s+', '', text)
-        text = re.sub(r'^\d+\s+', '', text)
-        text = re.sub(r'^[a-z]\s+', '', text)
-        text = re.sub(r'^[\u3220-\u3229㈠㈡㈢㈣㈤㈥㈦㈧㈨㈩]\s*', '', text)  # level-5 括号数字
+        for pattern in self.TITLE_MARKER_PATTERNS:
+            text = pattern.sub('', text)
         return text.strip()
     
     # ── 中文章节引用辅助方法 ──────────────────────────────────────────
 
     @classmethod
     def _cn_to_int(cls, s: str) -> int:
-        """将中文数字字符串转为整数，支持 1-999（章节通用）。"""
-        if not s:
-            return 0
-        units = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-                 '六': 6, '七': 7, '八': 8, '九': 9}
-        if s == '十':
-            return 10
-        if '百' in s:
-            i = s.index('百')
-            hundreds = (units.get(s[:i], 0) or 1) * 100
-            rest = s[i + 1:]
-            return hundreds + (cls._cn_to_int(rest) if rest else 0)
-        if '十' in s:
-            i = s.index('十')
-            tens = (units.get(s[:i], 0) or 1) * 10
-            rest = s[i + 1:]
-            return tens + (units.get(rest, 0) if rest else 0)
-        # 缩写两字形式：如 三八=38、五七=57（无十字、无百字，两字均为个位数字）
-        if len(s) == 2 and '十' not in s and '百' not in s:
-            t = units.get(s[0], 0)
-            u = units.get(s[1], 0)
-            if t and u:
-                return t * 10 + u
-        # 缩写三字形式：如 一一九=119、一五○=150（三个数字依次为百、十、个，支持○/零作为0）
-        if len(s) == 3 and '十' not in s and '百' not in s:
-            ZERO_CHARS = {'○', '零'}
-            h = units.get(s[0], 0)
-            t = 0 if s[1] in ZERO_CHARS else units.get(s[1], 0)
-            u = 0 if s[2] in ZERO_CHARS else units.get(s[2], 0)
-            if h and (s[1] in ZERO_CHARS or s[1] in units) and (s[2] in ZERO_CHARS or s[2] in units):
-                return h * 100 + t * 10 + u
-        return units.get(s, 0)
+        """将中文数字字符串转为整数，支持 1-999（章节通用；委托给 scripture_refs.cn_to_int）。"""
+        return cn_to_int(s)
 
     @classmethod
     def _normalize_book_names(cls, text: str) -> str:
-        """将文本中的完整书名替换为缩写（从长到短，避免前缀误替换）。"""
-        for full, abbrev in cls._FULL_BOOK_MAP_SORTED:
-            if full in text:
-                text = text.replace(full, abbrev)
-        return text
+        """将文本中的完整书名替换为缩写（前缀树逐位置取最长匹配，避免前缀误替换）。"""
+        return cls._BOOK_NAME_TRIE.normalize(text)
 
     @classmethod
     def _extract_primary_book(cls, reading_scripture: str) -> str:
@@ -2254,7 +2137,7 @@ class ImprovedParser:
         if not reading_scripture:
             return ''
         s = cls._normalize_book_names(reading_scripture)
-        m = re.match(r'^(' + cls._BOOK_BASE_PAT + cls._BOOK_MOD_PAT + r'?)', s)
+        m = sr.PRIMARY_BOOK_RE.match(s)
         return m.group(1) if m else ''
 
     @classmethod
@@ -2264,14 +2147,14 @@ class ImprovedParser:
             return 0
         s = cls._normalize_book_names(reading_scripture)
         # 跳过书名
-        m = re.match(r'^(?:' + cls._BOOK_BASE_PAT + cls._BOOK_MOD_PAT + r'?)(.+)', s)
+        m = sr.PRIMARY_REST_RE.match(s)
         rest = m.group(1) if m else s
         # 先试中文章号
-        cm = re.match(r'(' + cls._CN_CHAP_PAT + r')', rest)
+        cm = sr.CN_CHAP_LEAD_RE.match(rest)
         if cm:
             return cls._cn_to_int(cm.group(1)) or 0
         # 再试阿拉伯章号（如 4:1）
-        cm = re.match(r'(\d+)', rest)
+        cm = sr.ARABIC_LEAD_RE.match(rest)
         return int(cm.group(1)) if cm else 0
 
     @staticmethod
@@ -2288,7 +2171,16 @@ class ImprovedParser:
             out.append(f'{book}{chap}:{v}{mod}')
 
     @classmethod
-    def _expand_cn_scripture_refs(cls, ref_text: str, default_book: str = '', default_chapter: int = 0) -> list:
+    def _expand_cn_scripture_refs(cls, ref_text: str, default_book: str = '', default_chapter: int = 0) -> tuple:
+        """将中文章节引用文字解析为标准化 ref 元组（不可变，经 sr.ref_cache 记忆化；
+        解析规则见 _expand_cn_scripture_refs_uncached）。"""
+        return sr.ref_cache.get_or_compute(
+            (ref_text, default_book, default_chapter),
+            lambda: tuple(cls._expand_cn_scripture_refs_uncached(ref_text, default_book, default_chapter)),
+        )
+
+    @classmethod
+    def _expand_cn_scripture_refs_uncached(cls, ref_text: str, default_book: str = '', default_chapter: int = 0) -> list:
         """
         将中文章节引用文字解析为标准化 ref 列表。
 
@@ -2306,13 +2198,13 @@ class ImprovedParser:
         current_book = default_book
         current_chapter = default_chapter
 
-        parts = re.split(r'[,，、；。]', ref_text.strip().rstrip('：:；;。'))
+        parts = sr.REF_SPLIT_RE.split(ref_text.strip().rstrip('：:；;。'))
         for part in parts:
             part = part.strip()
             if not part:
                 continue
             # 去掉「参」/「参看」/「参阅」前缀（例：参路六20 → 路六20）
-            part = re.sub(r'^参[看阅]?\s*', '', part).strip()
+            part = sr.REF_PREFIX_RE.sub('', part).strip()
             if not part:
                 continue
 
@@ -2489,7 +2381,7 @@ class ImprovedParser:
                         cls._emit_verse_range(current_book, current_chapter, v1, '', v2, '', refs)
         return refs
 
-    def _extract_title_inline_refs(self, title: str, default_book: str) -> list:
+    def _extract_title_inline_refs(self, title: str, default_book: str) -> tuple:
         """从标题最后一个经文破折号后，提取中文章节引用。
         支持阿拉伯数字（腓四5）和纯中文章节（彼前三章十九节）两种格式。"""
         split_pos = None
@@ -2500,7 +2392,7 @@ class ImprovedParser:
                 split_pos = m.start()
                 break
         if split_pos is None:
-            return []
+            return ()
         ref_part = title[split_pos + 1:].rstrip('：:；;。')
         return self._expand_cn_scripture_refs(ref_part, default_book)
 
@@ -2625,6 +2517,32 @@ def _fill_scripture(sections, scripture_map):
             _fill_scripture(section.children, scripture_map)
 
 
+def collect_outline_verses(outline_paths: List[str], bible_dict: BibleDict = None) -> BibleDict:
+    """
+    按给定顺序扫描纲目文档（经文.docx），收录其中的经文行，返回 BibleDict。
+
+    收录规则与 parse_outline_doc 中的 _cache_verse 相同（VERSE_PATTERN 格式、不含「从略」），
+    供构建前一次性汇总全部批次的经文，作为各批次「从略」还原的共同来源；已有条目不覆盖。
+    """
+    bible_dict = bible_dict if bible_dict is not None else BibleDict()
+    doc_cache = DocumentCache()
+    for path in outline_paths:
+        try:
+            paragraphs = doc_cache.get(path).top_level_paragraphs
+        except Exception as e:
+            print(f"  ⚠ 读取经文文档失败 ({path}): {e}")
+            continue
+        for para in paragraphs:
+            text = para.text.strip()
+            if '从略' in text:
+                continue
+            m = ImprovedParser.VERSE_PATTERN.match(text)
+            if m:
+                bible_dict.add(m.group(1), text)
+        doc_cache.clear()
+    return bible_dict
+
+
 def parse_training_docs_improved(outline_path: str, listen_path: str, 
                                  morning_revival_path: Optional[str] = None,
                                  morning_revival_path2: Optional[str] = None,
@@ -2714,7 +2632,6 @@ def parse_training_docs_improved(outline_path: str, listen_path: str,
         if os.path.splitext(f)[1].lower() in ('.png', '.jpg', '.jpeg', '.webp', '.gif')
     ])
     if song_files:
-        import shutil
         os.makedirs(output_dir, exist_ok=True)
         dest_images_dir = os.path.join(output_dir, "images")
         os.makedirs(dest_images_dir, exist_ok=True)
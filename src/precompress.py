@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+预压缩 — 为 output/ 下较大的文本产物写出 .br / .gz 兄弟文件，静态托管可直接返回
+
+    output/1997-01/training.json
+    output/1997-01/training.json.br     Brotli（最高质量 11）
+    output/1997-01/training.json.gz     gzip（级别 9，mtime=0，内容确定）
+
+增量：output/.precompress-cache.json 记录每个源文件的内容哈希与已生成的编码；
+哈希未变且兄弟文件仍在时跳过，源文件删除或低于阈值时删除其兄弟文件。
+
+    stats = precompress_output('output', min_bytes=1024, workers=4)
+    rules = precompress_header_rules(stats['extensions'], stats['encodings'])
+
+Brotli 依赖可选的 brotli 包（pip install brotli）；未安装时只写 .gz。
+
+兄弟文件只有在托管方按请求的 Accept-Encoding 改为返回 x.br / x.gz 时才有意义
+（nginx gzip_static / brotli_static 等）；Cloudflare Pages 不做这种协商，
+所以 config.yaml 中 precompress 默认关闭，关闭时用 clear_precompressed 清掉旧产物。
+"""
+import gzip
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from .hashing import file_sha256
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：没有时只生成 gzip
+    brotli = None
+
+PRECOMPRESS_CACHE_FILE = '.precompress-cache.json'
+PRECOMPRESS_CACHE_VERSION = 1
+
+# 扩展名 → Content-Type（_headers 中压缩版本需显式声明原类型）
+TEXT_TYPES = {
+    '.json': 'application/json; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+    '.svg': 'image/svg+xml',
+    '.txt': 'text/plain; charset=utf-8',
+    '.xml': 'application/xml; charset=utf-8',
+    '.webmanifest': 'application/manifest+json',
+}
+ENCODINGS = {'.br': 'br', '.gz': 'gzip'}
+
+# 不参与预压缩的顶层目录（资源包本身是 zip）；以 . 开头的目录与文件（构建缓存、耗时报告）同样跳过
+SKIP_DIRS = {'resource-packs', 'images'}
+
+# 待压缩总量低于此值时不启动进程池
+PRECOMPRESS_PARALLEL_MIN_BYTES = 2 << 20
+
+
+def available_suffixes() -> List[str]:
+    return ['.br', '.gz'] if brotli is not None else ['.gz']
+
+
+# ── 缓存 ──────────────────────────────────────────────────────────────────
+
+def load_precompress_cache(output_dir: str) -> dict:
+    """读取预压缩缓存；文件不存在、损坏或版本不符时返回空缓存。"""
+    path = os.path.join(output_dir, PRECOMPRESS_CACHE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == PRECOMPRESS_CACHE_VERSION and isinstance(data.get('files'), dict):
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': PRECOMPRESS_CACHE_VERSION, 'files': {}}
+
+
+def save_precompress_cache(output_dir: str, cache: dict) -> None:
+    path = os.path.join(output_dir, PRECOMPRESS_CACHE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ── 文件收集与压缩 ────────────────────────────────────────────────────────
+
+def collect_text_assets(output_dir: str, min_bytes: int) -> List[Tuple[str, str, int]]:
+    """列出需要预压缩的文本文件 [(相对路径, 文件路径, 字节数)]，按相对路径排序。"""
+    assets = []
+    for root, dirs, files in os.walk(output_dir):
+        if root == output_dir:
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        for fn in files:
+            if fn.startswith('.') or os.path.splitext(fn)[1].lower() not in TEXT_TYPES:
+                continue
+            abs_path = os.path.join(root, fn)
+            size = os.path.getsize(abs_path)
+            if size >= min_bytes:
+                assets.append((os.path.relpath(abs_path, output_dir).replace(os.sep, '/'), abs_path, size))
+    assets.sort()
+    return assets
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def compress_assets(items: Iterable[Tuple[str, str]]) -> List[Tuple[str, Dict[str, int]]]:
+    """为一批 (相对路径, 文件路径) 写出兄弟文件（进程池 worker 入口）。
+
+    Returns: [(相对路径, {后缀: 压缩后字节数})]
+    """
+    results = []
+    for rel, abs_path in items:
+        with open(abs_path, 'rb') as f:
+            data = f.read()
+        sizes = {}
+        packed = gzip.compress(data, 9, mtime=0)
+        _write_atomic(abs_path + '.gz', packed)
+        sizes['.gz'] = len(packed)
+        if brotli is not None:
+            packed = brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+            _write_atomic(abs_path + '.br', packed)
+            sizes['.br'] = len(packed)
+        results.append((rel, sizes))
+    return results
+
+
+def _run_compress(items: List[Tuple[str, str]], sizes: List[int], workers: int):
+    total = sum(sizes)
+    if workers <= 1 or len(items) <= 1 or total < PRECOMPRESS_PARALLEL_MIN_BYTES:
+        return compress_assets(items)
+
+    # 与资源包压缩相同的分批方式：按体积从大到小装批，每批约 total / (workers * 4) 字节
+    target = max(total // (workers * 4), 256 << 10)
+    batches, batch, batch_bytes = [], [], 0
+    for item, size in sorted(zip(items, sizes), key=lambda x: -x[1]):
+        batch.append(item)
+        batch_bytes += size
+        if batch_bytes >= target:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(batches))
+    print(f"ℹ 并行预压缩: {len(items)} 个文件, {total/1024/1024:.1f} MB（{workers} 个进程）")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(compress_assets, batches):
+            results.extend(part)
+    return results
+
+
+def _remove_siblings(abs_path: str) -> int:
+    removed = 0
+    for suffix in ENCODINGS:
+        if os.path.isfile(abs_path + suffix):
+            os.remove(abs_path + suffix)
+            removed += 1
+    return removed
+
+
+def precompress_output(output_dir: str, min_bytes: int = 1024, workers: int = 1) -> dict:
+    """为 output_dir 下不小于 min_bytes 的文本文件生成 .br / .gz 兄弟文件。
+
+    Returns: {'reused', 'compressed', 'removed', 'bytes_in', 'bytes_gz', 'bytes_br',
+              'extensions': 实际有压缩版本的扩展名, 'encodings': 实际生成的后缀}
+    """
+    cache = load_precompress_cache(output_dir)
+    old_files = cache['files']
+    suffixes = available_suffixes()
+    assets = collect_text_assets(output_dir, min_bytes)
+
+    new_files = {}
+    pending, pending_sizes = [], []
+    for rel, abs_path, size in assets:
+        digest = file_sha256(abs_path)
+        entry = old_files.get(rel)
+        if entry and entry.get('sha256') == digest and \
+                sorted(entry.get('sizes') or {}) == sorted(suffixes) and \
+                all(os.path.isfile(abs_path + s) for s in suffixes):
+            new_files[rel] = entry
+            continue
+        new_files[rel] = {'sha256': digest, 'size': size}
+        pending.append((rel, abs_path))
+        pending_sizes.append(size)
+
+    for rel, sizes in _run_compress(pending, pending_sizes, workers):
+        new_files[rel]['sizes'] = sizes
+        # brotli 不可用时清掉上次留下的旧 .br，避免与新内容不一致
+        stale_br = os.path.join(output_dir, rel) + '.br'
+        if '.br' not in sizes and os.path.isfile(stale_br):
+            os.remove(stale_br)
+
+    # 源文件已删除或低于阈值：删除其兄弟文件（只删缓存中记录过的）
+    removed = 0
+    for rel in old_files:
+        if rel not in new_files:
+            removed += _remove_siblings(os.path.join(output_dir, rel))
+
+    cache['files'] = new_files
+    save_precompress_cache(output_dir, cache)
+
+    exts = sorted({os.path.splitext(rel)[1].lower() for rel in new_files})
+    return {
+        'reused': len(assets) - len(pending),
+        'compressed': len(pending),
+        'removed': removed,
+        'bytes_in': sum(e['size'] for e in new_files.values()),
+        'bytes_gz': sum((e.get('sizes') or {}).get('.gz', 0) for e in new_files.values()),
+        'bytes_br': sum((e.get('sizes') or {}).get('.br', 0) for e in new_files.values()),
+        'extensions': exts,
+        'encodings': suffixes,
+    }
+
+
+def clear_precompressed(output_dir: str) -> int:
+    """删除缓存中记录过的全部兄弟文件及预压缩缓存本身，返回删除的兄弟文件数。"""
+    cache_path = os.path.join(output_dir, PRECOMPRESS_CACHE_FILE)
+    if not os.path.isfile(cache_path):
+        return 0
+    removed = 0
+    for rel in load_precompress_cache(output_dir)['files']:
+        removed += _remove_siblings(os.path.join(output_dir, rel))
+    os.remove(cache_path)
+    return removed
+
+
+# ── _headers 规则 ─────────────────────────────────────────────────────────
+
+def precompress_header_rules(extensions: Iterable[str], suffixes: Iterable[str]) -> List[str]:
+    """压缩兄弟文件的 _headers 规则：声明 Content-Encoding 并保留原 Content-Type。"""
+    lines = []
+    for ext in extensions:
+        for suffix in suffixes:
+            lines += [
+                f'/*{ext}{suffix}',
+                f'  Content-Encoding: {ENCODINGS[suffix]}',
+                f'  Content-Type: {TEXT_TYPES[ext]}',
+                '  Vary: Accept-Encoding',
+                '',
+            ]
+    return lines
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+经文引用引擎 — 解析器、数据模型与生成器共用的预编译正则与书名匹配
+
+所有经文相关正则在模块加载时编译一次；完整书名 → 缩写的归一化
+由 BookNameTrie 单遍扫描完成（逐位置最长匹配），不再逐个书名 str.replace。
+
+    trie = BookNameTrie({'彼得前书': '彼前', '腓立比书': '腓'})
+    trie.normalize('彼得前书三章十九节')   # '彼前三章十九节'
+    cn_to_int('一百五十')                  # 150
+
+引用展开结果由 RefCache 记忆化：同一段引用文字（如 腓四5~9、一19~21上）
+在纲目、晨兴、喂养经文中反复出现，只解析一次。
+"""
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable
+
+# ── 书卷 / 章号字符类 ──────────────────────────────────────────────
+BOOK_BASE_PAT = r'[创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多来雅彼犹启]'
+BOOK_MOD_PAT = r'[后前上下壹贰叁]'
+BOOK_PAT = BOOK_BASE_PAT + BOOK_MOD_PAT + r'?'
+CN_CHAP_PAT = (
+    r'(?:一百五十'
+    r'|一百[一二三四][十][一二三四五六七八九]'
+    r'|一百[一二三四][十]'
+    r'|一百零[一二三四五六七八九]'
+    r'|一百'
+    r'|[三四五六七八九][十][一二三四五六七八九]'
+    r'|[三四五六七八九][十]'
+    r'|二十[一二三四五六七八九]'
+    r'|二十'
+    r'|十[一二三四五六七八九]'
+    r'|十'
+    r'|[一二三四五六七八九][一二三四五六七八九][一二三四五六七八九○零]'
+    r'|[二三四五六七八九][一二三四五六七八九]'
+    r'|[一二三四五六七八九])'
+)
+
+# ── 经文行 / 经文范围（归一化格式，如 腓2:5~11）────────────────────
+_VERSE_BOOK_PAT = (
+    r'[创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多彼约犹启来]'
+    r'(?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+)'
+)
+VERSE_RANGE_RE = re.compile(r'^(' + _VERSE_BOOK_PAT + r'):(\d+)~(\d+)')
+VERSE_SINGLE_RE = re.compile(r'^(' + _VERSE_BOOK_PAT + r'):(\d+)')
+
+# ── 引用文字切分 ────────────────────────────────────────────────────
+REF_SPLIT_RE = re.compile(r'[,，、；。]')
+REF_PREFIX_RE = re.compile(r'^参[看阅]?\s*')                 # 参 / 参看 / 参阅
+PRIMARY_BOOK_RE = re.compile(r'^(' + BOOK_PAT + r')')
+PRIMARY_REST_RE = re.compile(r'^(?:' + BOOK_PAT + r')(.+)')
+CN_CHAP_LEAD_RE = re.compile(r'(' + CN_CHAP_PAT + r')')
+ARABIC_LEAD_RE = re.compile(r'(\d+)')
+LEADING_TOKEN_RE = re.compile(r'^(\S+)')                     # 段首引用（到第一个空白）
+REF_KEY_RE = re.compile(r'^(.+?)(\d+):(\d+)')                 # 标准化 ref → 书卷 / 章 / 节
+
+# ── 晨兴喂养经文段落 ────────────────────────────────────────────────
+# 格式1：完整格式（书卷+章节），如 路十一11、约壹一6~7、林后十三14
+FEEDING_FULL_RE = re.compile(r'^[创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提多门彼雅犹启壹贰叁前后来]{1,2}[一二三四五六七八九十\d]+[:：]?\d+([~～\-]\d+)?[\s　]+')
+# 格式2：省略书卷名，如 二1、十三14、二二1
+FEEDING_SHORT_RE = re.compile(r'^[一二三四五六七八九十\d]+[:：]?\d+([~～\-]\d+)?[\s　]+')
+# 格式3：只有节号（同一章的不同节），如 5、13~15
+FEEDING_VERSE_RE = re.compile(r'^\d+([~～\-]\d+)?[\s　]+')
+
+
+# ── 中文数字 ────────────────────────────────────────────────────────
+
+_CN_UNITS = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
+             '六': 6, '七': 7, '八': 8, '九': 9}
+_CN_ZERO = {'○', '零'}
+
+
+@lru_cache(maxsize=4096)
+def cn_to_int(s: str) -> int:
+    """将中文数字字符串转为整数，支持 1-999（章节通用）；无法识别时返回 0。"""
+    if not s:
+        return 0
+    units = _CN_UNITS
+    if s == '十':
+        return 10
+    if '百' in s:
+        i = s.index('百')
+        hundreds = (units.get(s[:i], 0) or 1) * 100
+        rest = s[i + 1:]
+        return hundreds + (cn_to_int(rest) if rest else 0)
+    if '十' in s:
+        i = s.index('十')
+        tens = (units.get(s[:i], 0) or 1) * 10
+        rest = s[i + 1:]
+        return tens + (units.get(rest, 0) if rest else 0)
+    # 缩写两字形式：如 三八=38、五七=57（两字均为个位数字）
+    if len(s) == 2:
+        t = units.get(s[0], 0)
+        u = units.get(s[1], 0)
+        if t and u:
+            return t * 10 + u
+    # 缩写三字形式：如 一一九=119、一五○=150（依次为百、十、个，支持○/零作为0）
+    if len(s) == 3:
+        h = units.get(s[0], 0)
+        if h and (s[1] in _CN_ZERO or s[1] in units) and (s[2] in _CN_ZERO or s[2] in units):
+            return h * 100 + units.get(s[1], 0) * 10 + units.get(s[2], 0)
+    return units.get(s, 0)
+
+
+# ── 书名归一化 ──────────────────────────────────────────────────────
+
+class BookNameTrie:
+    """完整书名 → 缩写的前缀树，normalize() 单遍扫描、逐位置取最长匹配。"""
+
+    _END = ''
+
+    def __init__(self, mapping: Dict[str, str]):
+        self._root: dict = {}
+        for full, abbrev in mapping.items():
+            if not full:
+                continue
+            node = self._root
+            for ch in full:
+                node = node.setdefault(ch, {})
+            node[self._END] = abbrev
+        # 书名首字集合：快速跳过不可能命中的位置
+        self._first_re = re.compile('[' + re.escape(''.join(self._root)) + ']') if self._root else None
+
+    def normalize(self, text: str) -> str:
+        if not text or self._first_re is None:
+            return text
+        m = self._first_re.search(text)
+        if not m:
+            return text
+        root, end_key = self._root, self._END
+        out = []
+        pos = 0                       # 已输出到的位置
+        i = m.start()
+        n = len(text)
+        while i < n:
+            node = root.get(text[i])
+            if node is None:
+                m = self._first_re.search(text, i + 1)
+                if not m:
+                    break
+                i = m.start()
+                continue
+            best, best_end = None, i
+            j = i + 1
+            while True:
+                if end_key in node:
+                    best, best_end = node[end_key], j
+                if j >= n:
+                    break
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+            if best is None:
+                i += 1
+                continue
+            out.append(text[pos:i])
+            out.append(best)
+            pos = i = best_end
+        if pos == 0:
+            return text
+        out.append(text[pos:])
+        return ''.join(out)
+
+
+# ── 引用展开缓存 ────────────────────────────────────────────────────
+
+class RefCache:
+    """有界 LRU 缓存（线程安全），记录命中/未命中次数。
+
+    值应为不可变对象（如 tuple），调用方共享同一份结果。
+    进程池中每个 worker 进程各有一份，计数器按批次取差值汇总（见 stats()）。
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        # 计算放在锁外；并发下同一键可能重复计算，结果相同，后写入者覆盖
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# _expand_cn_scripture_refs 的结果缓存，键为 (ref_text, default_book, default_chapter)
+ref_cache = RefCache()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+全文搜索索引 — 每个训练一个倒排索引分片（字符二元组 → 段落号）
+
+    output/data/search/index.json       分片清单（训练路径、标题、年份、版本、段落数、哈希）
+    output/data/search/<path>.json      单个训练的分片
+
+分片结构：
+    strings   字符串表：类型只存一次
+    docs      段落定位 [篇号, 类型, pi, day_index]（类型为 strings 下标，day_index 无时为 -1）
+    postings  二元组 → 段落号升序列表，差分后按 VLQ 编成 base64 字符串
+
+分片不含正文：段落正文、篇题等仍取自该训练的 training.json（阅读时已被 SW 缓存），
+按与 search.js _buildSearchEntries 相同的规则抽取，段落号即抽取顺序；docs 只用于
+前端核对两边的段落序列一致（不一致时放弃倒排表，退回全量扫描）。
+若分片连同正文一起存，体积约为 training.json 的 1.3 倍，且与已缓存的 training.json 完全重复。
+
+查询时每个关键词取其全部二元组的倒排表求交（从最短的表开始），
+再对候选段落做子串核对；代价与命中的倒排表长度成正比，与语料总量无关。
+
+    shard = build_search_shard(training, tdata)
+    texts = search_texts(tdata)                 # 每个训练抽取一次，多次查询共用
+    search_shard(shard, '基督 身体', texts)    # [段落号, ...]
+"""
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+SEARCH_DIR = 'search'
+SEARCH_MANIFEST_FILE = 'index.json'
+SEARCH_INDEX_FORMAT = 2
+
+MIN_PARA_LEN = 10
+DOC_FIELDS = ['chapter', 'type', 'pi', 'day_index']
+
+_ZS_SPLIT_RE = re.compile(r'\n\s*\n')
+
+_B64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_B64_INDEX = {c: i for i, c in enumerate(_B64)}
+
+
+# ── 段落抽取（与 search.js _buildSearchEntries 保持一致）───────────────────
+
+def _flatten_sections(sections, buf: list) -> None:
+    for sec in sections or []:
+        t = (sec.get('level', '') + ' ' + sec.get('title', '')).strip()
+        if t:
+            buf.append(t)
+        for para in sec.get('content') or []:
+            if para:
+                buf.append(para)
+        _flatten_sections(sec.get('children'), buf)
+
+
+def _flatten_detail_content(sections, buf: list) -> None:
+    """detail_sections 的内容段落（深度优先，与 renderMessageSection 顺序一致）。"""
+    for sec in sections or []:
+        buf.extend(sec.get('content') or [])
+        _flatten_detail_content(sec.get('children'), buf)
+
+
+def iter_search_docs(tdata: dict) -> Iterable[tuple]:
+    """产出 (篇号, 类型, 类型名, 篇题, 选择器, pi, day_index, 正文)；day_index 无时为 -1。"""
+    for cidx, chapter in enumerate(tdata.get('chapters') or []):
+        num = chapter.get('number') or (cidx + 1)
+        ch_title = f"第{num}篇 {chapter.get('title', '')}"
+
+        # h: 听抄（message_content 后接 detail_sections 内容，pi 连续计数）
+        paras = list(chapter.get('message_content') or [])
+        _flatten_detail_content(chapter.get('detail_sections'), paras)
+        for pi, para in enumerate(paras):
+            if para and len(para) >= MIN_PARA_LEN:
+                yield num, 'h', '听抄', ch_title, 'content-text', pi, -1, para
+
+        # cv: 纲目
+        cv_buf = []
+        _flatten_sections(chapter.get('outline_sections'), cv_buf)
+        for pi, para in enumerate(cv_buf):
+            if len(para) >= MIN_PARA_LEN:
+                yield num, 'cv', '纲目', ch_title, 'outline-item', pi, -1, para
+
+        # cx: 晨读 — DOM 顺序 morning_feeding → message_reading，day-page 内按 pi 定位
+        for day_idx, revival in enumerate(chapter.get('morning_revivals') or []):
+            mf = revival.get('morning_feeding') or []
+            for pi, para in enumerate(mf):
+                if para and len(para) >= MIN_PARA_LEN:
+                    yield num, 'cx', '晨兴喂养', ch_title, 'content-text', pi, day_idx, para
+            for mri, para in enumerate(revival.get('message_reading') or []):
+                if para and len(para) >= MIN_PARA_LEN:
+                    yield num, 'cx', '信息选读', ch_title, 'content-text', len(mf) + mri, day_idx, para
+
+        # zs: 职事摘录（按空行拆段；短标题行渲染为 ministry-subtitle，不计 pi）
+        excerpt = chapter.get('ministry_excerpt') or ''
+        if len(excerpt) >= MIN_PARA_LEN:
+            pi = 0
+            for para in _ZS_SPLIT_RE.split(excerpt):
+                para = para.strip()
+                if not para or (len(para) < 30 and '\n' not in para):
+                    continue
+                if len(para) >= MIN_PARA_LEN:
+                    yield num, 'zs', '职事摘录', ch_title, 'content-text', pi, -1, para
+                pi += 1
+
+
+# ── 分词与倒排表编码 ──────────────────────────────────────────────────────
+
+def bigrams(text: str) -> set:
+    """小写后的相邻字符二元组（含空白的跳过：查询词按空白切分，永远不含空白）。"""
+    grams = set()
+    for run in text.lower().split():
+        grams.update([run[i:i + 2] for i in range(len(run) - 1)])
+    return grams
+
+
+def encode_postings(ids: List[int]) -> str:
+    """升序段落号 → 差分 → VLQ（每字符 5 位数据 + 1 位续位）→ base64 字符串。"""
+    out = []
+    prev = 0
+    for doc_id in ids:
+        delta = doc_id - prev
+        prev = doc_id
+        while True:
+            digit = delta & 0x1F
+            delta >>= 5
+            if delta:
+                out.append(_B64[digit | 0x20])
+            else:
+                out.append(_B64[digit])
+                break
+    return ''.join(out)
+
+
+def decode_postings(s: str) -> List[int]:
+    ids = []
+    value = shift = 0
+    prev = 0
+    for c in s:
+        digit = _B64_INDEX[c]
+        value |= (digit & 0x1F) << shift
+        if digit & 0x20:
+            shift += 5
+            continue
+        prev += value
+        ids.append(prev)
+        value = shift = 0
+    return ids
+
+
+# ── 分片构建 ──────────────────────────────────────────────────────────────
+
+def season_label_of(tdata: dict, training: Optional[dict] = None) -> str:
+    training = training or {}
+    year = tdata.get('year') or training.get('year') or ''
+    season = tdata.get('season') or training.get('season') or ''
+    return f"{year}-{season}" if season else str(year)
+
+
+def build_search_shard(training: dict, tdata: dict) -> dict:
+    """由 training.json 数据构建单个训练的搜索分片（倒排表 + 段落定位，不含正文）。"""
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def sid(s: str) -> int:
+        i = string_ids.get(s)
+        if i is None:
+            i = string_ids[s] = len(strings)
+            strings.append(s)
+        return i
+
+    docs = []
+    postings: Dict[str, List[int]] = defaultdict(list)
+    for doc_id, (num, typ, _, ch_title, _, pi, day_idx, text) in enumerate(iter_search_docs(tdata)):
+        docs.append([num, sid(typ), pi, day_idx])
+        # 与前端 search() 的匹配范围一致：篇题 + 正文
+        for gram in bigrams(ch_title + text):
+            postings[gram].append(doc_id)
+
+    return {
+        'format': SEARCH_INDEX_FORMAT,
+        'path': training.get('path', ''),
+        'version': tdata.get('version') or training.get('version', ''),
+        'training': tdata.get('title') or training.get('title', ''),
+        'season_label': season_label_of(tdata, training),
+        'fields': DOC_FIELDS,
+        'strings': strings,
+        'docs': docs,
+        'postings': {gram: encode_postings(ids) for gram, ids in sorted(postings.items())},
+    }
+
+
+# ── 查询 ──────────────────────────────────────────────────────────────────
+
+def search_texts(tdata: dict) -> List[str]:
+    """按段落号排列的匹配文本（篇题 + 正文，已小写），供 search_shard 核对候选段落。"""
+    return [(ch_title + text).lower() for _, _, _, ch_title, _, _, _, text in iter_search_docs(tdata)]
+
+
+def search_shard(shard: dict, query: str, texts: List[str]) -> List[int]:
+    """多关键词 AND 子串匹配（不区分大小写），返回段落号升序列表。
+
+    texts 为 search_texts() 的结果（由构建该分片的 training.json 抽取）；
+    只对倒排表求交得到的候选段落做子串核对。
+    """
+    terms = query.strip().lower().split()
+    if not terms:
+        return []
+    docs, postings = shard['docs'], shard['postings']
+
+    grams = set()
+    for term in terms:
+        grams.update(term[i:i + 2] for i in range(len(term) - 1))
+    if grams:
+        lists = []
+        for gram in grams:
+            encoded = postings.get(gram)
+            if encoded is None:
+                return []
+            lists.append(encoded)
+        lists.sort(key=len)
+        candidates = decode_postings(lists[0])
+        for encoded in lists[1:]:
+            if not candidates:
+                return []
+            keep = set(decode_postings(encoded))
+            candidates = [d for d in candidates if d in keep]
+    else:
+        candidates = range(len(docs))   # 全部是单字关键词：二元组无法缩小范围
+
+    hits = []
+    for doc_id in candidates:
+        hay = texts[doc_id]
+        if all(term in hay for term in terms):
+            hits.append(doc_id)
+    return hits
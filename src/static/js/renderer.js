@@ -102,6 +102,72 @@
       });
   }
 
+  // ── 按篇分片加载：training-index.json + chapters/<n>.json ───────────────
+  // 目录 / 标语页只需索引，章节页只需索引 + 该篇分片；索引或分片不可用时
+  // （本地导入、旧版构建、离线只缓存了 training.json）回退到整份 training.json。
+  var _indexCache = {};
+  var _chapterCache = {};
+
+  // trainings.json 中该训练索引的内容哈希（用作 ?v=，避免 SW 缓存优先读到旧索引）
+  function trainingIndexHash(batchPath) {
+    var list = win.__cxTrainings || [];
+    for (var i = 0; i < list.length; i++) {
+      if (list[i].path === batchPath) return (list[i].index && list[i].index.hash) || '';
+    }
+    return '';
+  }
+
+  function fetchJson(url) {
+    return fetch(url).then(function(r) {
+      if (!r.ok) throw new Error('HTTP ' + r.status);
+      return r.json();
+    });
+  }
+
+  function loadTrainingIndex(batchPath) {
+    if (_cache[batchPath]) return Promise.resolve(_cache[batchPath]);
+    if (_indexCache[batchPath]) return Promise.resolve(_indexCache[batchPath]);
+    var hash = trainingIndexHash(batchPath);
+    if (!hash || batchPath.indexOf('local-') === 0) return loadTraining(batchPath);
+    var root = win.CX_ROOT || './';
+    return fetchJson(root + batchPath + '/training-index.json?v=' + hash)
+      .then(function(index) {
+        if (!index || !index.chapters) throw new Error('索引格式不符');
+        _indexCache[batchPath] = index;
+        return index;
+      })
+      .catch(function() { return loadTraining(batchPath); });
+  }
+
+  // 返回 { training: 索引或整份数据, chapter: 该篇数据或 null }
+  function loadChapter(batchPath, chNum) {
+    return loadTrainingIndex(batchPath).then(function(training) {
+      var chapters = training.chapters || [];
+      var entry = null;
+      for (var i = 0; i < chapters.length; i++) {
+        if (chapters[i].number === chNum) { entry = chapters[i]; break; }
+      }
+      if (!entry || !entry.file) return { training: training, chapter: entry };
+      var key = batchPath + '/' + chNum;
+      if (_chapterCache[key]) return { training: training, chapter: _chapterCache[key] };
+      var root = win.CX_ROOT || './';
+      return fetchJson(root + batchPath + '/' + entry.file + '?v=' + entry.hash)
+        .then(function(chapter) {
+          _chapterCache[key] = chapter;
+          return { training: training, chapter: chapter };
+        })
+        .catch(function() {
+          return loadTraining(batchPath).then(function(full) {
+            var list = full.chapters || [];
+            for (var j = 0; j < list.length; j++) {
+              if (list[j].number === chNum) return { training: full, chapter: list[j] };
+            }
+            return { training: full, chapter: null };
+          });
+        });
+    });
+  }
+
   // 从经文文本中提取所有引用（与 Python 的 _extract_verse_refs 等价）
   var _BOOK_RE = /([创出利民申书士得撒王代拉尼斯伯诗箴传歌赛耶哀结但何珥摩俄拿弥鸿哈番该亚玛太可路约徒罗林加弗腓西帖提门多彼约犹启来])(?:[一二三四五六七八九十后前上下壹贰叁]\d+|\d+):\d+[上下]?/g;
   function extractRefs(text) {
@@ -966,6 +1032,7 @@
     }[viewType] || '');
 
     win.CX_TRAINING_PATH = batchPath;  /* 告知 scripture-popup.js 当前训练路径，用于加载 scriptures-data.json */
+    win.CX_TRAINING_BIBLE_BOOKS = (training && training.bible_books) || null;  /* 本训练引用的书卷，scripture-popup.js 只预加载这些分卷 */
     if (win.CXScripturePopup && win.CXScripturePopup.init) try { win.CXScripturePopup.init(); } catch(e){}
     if (win.CXFontControl && win.CXFontControl.apply) try { win.CXFontControl.apply(); } catch(e){}
     if (win.CXHighlight && win.CXHighlight.init) try { win.CXHighlight.init(); } catch(e){}
@@ -1194,7 +1261,7 @@
     rescueThemeBtn();
     getApp().innerHTML = '<div class="home-status"><div class="home-status-icon">⏳</div>加载中...</div>';
 
-    loadTraining(batchPath)
+    loadTrainingIndex(batchPath)
       .then(function(training) {
         try { if(window.Capacitor||window.navigator.standalone||(window.matchMedia&&window.matchMedia('(display-mode: standalone)').matches)){sessionStorage.setItem('cx_access','ok');} } catch(e){}
         setMeta(training);
@@ -1216,7 +1283,8 @@
         var tocItems = (training.chapters || []).map(function(ch) {
           var savedView = '';
           try { savedView = localStorage.getItem('cx_chapter_view:' + batchPath + '/' + ch.number) || ''; } catch(e){}
-          var defView = savedView || ((ch.morning_revivals && ch.morning_revivals.length > 0) ? 'cx' : 'cv');
+          var hasMr = ch.morning_revival_count > 0 || (ch.morning_revivals && ch.morning_revivals.length > 0);
+          var defView = savedView || (hasMr ? 'cx' : 'cv');
           return '<a href="javascript:void(0)" class="toc-item" onclick="CXRouter.navigate(\'' +
             escAttr(batchPath) + '/' + ch.number + '/' + defView + '\')" data-chapter="' + ch.number + '">' +
             '<span class="toc-num">第' + ch.number + '篇</span>' +
@@ -1277,7 +1345,7 @@
     _scrollPageKey = null;
     showApp();
     rescueThemeBtn();
-    loadTraining(batchPath).then(function(training) {
+    loadTrainingIndex(batchPath).then(function(training) {
       var nav = '<div class="page-navigation">' +
         '<a href="javascript:void(0)" class="nav-link" title="返回主页" onclick="CXRouter.navigate(\'\')">返回主页</a>' +
         '<a href="javascript:void(0)" class="nav-link" title="目录" onclick="CXRouter.navigate(\'' + escAttr(batchPath) + '\')">目录</a>' +
@@ -1354,7 +1422,7 @@
     showApp();
     rescueThemeBtn();
     var root = win.CX_ROOT || './';
-    loadTraining(batchPath).then(function(training) {
+    loadTrainingIndex(batchPath).then(function(training) {
       var nav = '<div class="page-navigation">' +
         '<a href="javascript:void(0)" class="nav-link" title="返回主页" onclick="CXRouter.navigate(\'\')">返回主页</a>' +
         '<a href="javascript:void(0)" class="nav-link" title="目录" onclick="CXRouter.navigate(\'' + escAttr(batchPath) + '\')">目录</a>' +
@@ -1482,13 +1550,10 @@
     showApp();
     rescueThemeBtn();
     getApp().innerHTML = '<div class="home-status"><div class="home-status-icon">⏳</div>加载中...</div>';
-    loadTraining(batchPath)
-      .then(function(training) {
-        var chapter = null;
-        var chapters = training.chapters || [];
-        for (var i = 0; i < chapters.length; i++) {
-          if (chapters[i].number === chNum) { chapter = chapters[i]; break; }
-        }
+    loadChapter(batchPath, chNum)
+      .then(function(loaded) {
+        var training = loaded.training;
+        var chapter = loaded.chapter;
         if (!chapter) {
           getApp().innerHTML = '<p class="no-content">未找到第' + chNum + '篇</p>';
           return;
@@ -5,6 +5,7 @@
  *   .showPacksDialog()    打开历史资源包下载弹层
  *   .showCachedDialog()   打开已缓存训练管理弹层
  *   .isPackCached(pack)   → Promise<boolean>  判断某资源包是否已缓存
+ *   .updatePack(pack)     已安装旧版本时优先下载增量包（manifest 中的 deltas），否则下载完整包
  */
 (function (win) {
   'use strict';
@@ -14,6 +15,10 @@
   var SOURCES_KEY = 'cx_pack_sources';
   // 记录初始安装的训练元数据，供删除后展示"可恢复"状态用
   var INITIAL_TRAININGS_KEY = 'cx_initial_trainings';
+  // 已安装资源包版本：{ "<year_start>": "<pack.hash>" }（包名随年份范围变化，起始年份不变）
+  var PACK_VERSIONS_KEY = 'cx_pack_versions';
+  // 增量包内的元数据成员（删除列表），不写入缓存
+  var DELTA_META = '.delta.json';
 
   // ── 工具 ───────────────────────────────────────────────────────────────────────────
 
@@ -148,6 +153,34 @@
     _saveSources(sources);
   }
 
+  function _loadPackVersions() {
+    try { return JSON.parse(win.localStorage.getItem(PACK_VERSIONS_KEY) || '{}'); }
+    catch (e) { return {}; }
+  }
+
+  function _setPackVersion(pack, hash) {
+    var versions = _loadPackVersions();
+    if (hash) versions[pack.year_start] = hash;
+    else delete versions[pack.year_start];
+    try { win.localStorage.setItem(PACK_VERSIONS_KEY, JSON.stringify(versions)); } catch (e) {}
+  }
+
+  // 已安装版本与清单不同（且已知已安装版本）→ 需要更新
+  function packNeedsUpdate(pack) {
+    var installed = _loadPackVersions()[pack.year_start];
+    return !!(installed && pack.hash && installed !== pack.hash);
+  }
+
+  // 已安装版本对应的增量包；没有时返回 null（需下载完整包）
+  function findPackDelta(pack) {
+    var installed = _loadPackVersions()[pack.year_start];
+    var deltas = pack.deltas || [];
+    for (var i = 0; i < deltas.length; i++) {
+      if (deltas[i].from === installed) return deltas[i];
+    }
+    return null;
+  }
+
   // ── 删除操作（模块级，供多 dialog 共享） ───────────────────────────────────
 
   // 来源感知删除整包：只删该包下载且未被后续操作覆写的训练
@@ -172,6 +205,7 @@
       var newSources = _loadSources();
       pathsToDelete.forEach(function (tp) { delete newSources[tp]; });
       _saveSources(newSources);
+      _setPackVersion(pack, null);
       if (onDone) onDone();
     }).catch(function () { if (onDone) onDone(); });
   }
@@ -222,7 +256,9 @@
 
   // ── 下载资源包 ──────────────────────────────────────────────────────────────────
 
-  function downloadPack(pack, onProgress) {
+  // delta 为 pack.deltas 中的一项时下载增量包：写入变化的文件并删除删除列表中的条目
+  function downloadPack(pack, onProgress, delta) {
+    var source = delta || pack;
     function ensureJSZip() {
       if (win.JSZip) return Promise.resolve();
       return new Promise(function (resolve, reject) {
@@ -238,7 +274,7 @@
       var RACE_TIMEOUT = 12000;
 
       function pumpZip(response) {
-        var total = parseInt(response.headers.get('content-length') || '0', 10) || pack.size_bytes || 0;
+        var total = parseInt(response.headers.get('content-length') || '0', 10) || source.size_bytes || 0;
         var loaded = 0;
         var reader = response.body && response.body.getReader();
         if (!reader) return response.arrayBuffer();
@@ -262,7 +298,7 @@
 
       // 使用 smartFetch：先最快镜像直取，失败再竞速重探
       if (win.CX && win.CX.smartFetch && servers.length) {
-        var pathSuffix = pack.path;
+        var pathSuffix = source.path;
         return win.CX.smartFetch(servers, pathSuffix, {
           timeout: RACE_TIMEOUT,
           logPrefix: '[资源包]',
@@ -278,7 +314,7 @@
       // 降级：顺序 fallback（含本地源）
       var baseUrls = servers.map(function (s) { return s.replace(/\/$/, ''); });
       baseUrls.push(win.location.origin);
-      var urls = baseUrls.map(function (b) { return b + '/' + pack.path; });
+      var urls = baseUrls.map(function (b) { return b + '/' + source.path; });
       function tryServer(idx) {
         if (idx >= urls.length) return Promise.reject(new Error('所有镜像均失败'));
         return fetch(urls[idx], { cache: 'no-cache' })
@@ -300,12 +336,23 @@
         if (!('caches' in win)) throw new Error('此环境不支持 Cache API');
         return caches.open(CACHE_NAME).then(function (cache) {
           var files = [];
+          var metaEntry = null;
           zip.forEach(function (relativePath, zipEntry) {
-            if (!zipEntry.dir) files.push({ path: relativePath, entry: zipEntry });
+            if (zipEntry.dir) return;
+            if (relativePath === DELTA_META) { metaEntry = zipEntry; return; }
+            files.push({ path: relativePath, entry: zipEntry });
           });
           var done = 0;
+          // 增量包：按删除列表移除已不存在的文件
+          function applyDeletions() {
+            if (!metaEntry) return Promise.resolve();
+            return metaEntry.async('string').then(function (text) {
+              var deleted = (JSON.parse(text).deleted) || [];
+              return Promise.all(deleted.map(function (p) { return cache.delete(entryToUrl(p)); }));
+            });
+          }
           function nextFile() {
-            if (done >= files.length) return Promise.resolve();
+            if (done >= files.length) return applyDeletions();
             var item = files[done];
             done++;
             return item.entry.async('arraybuffer').then(function (buf) {
@@ -330,9 +377,15 @@
       })
       .then(function () {
         _markPackSources(pack);
+        _setPackVersion(pack, pack.hash);
       });
   }
 
+  // 更新已安装的资源包：有对应增量包时只下载增量，否则重新下载完整包
+  function updatePack(pack, onProgress) {
+    return downloadPack(pack, onProgress, findPackDelta(pack));
+  }
+
   function downloadAll(onProgressPack) {
     return fetchManifest().then(function (manifest) {
       var packs = manifest.packs || [];
@@ -739,7 +792,7 @@
           '</div>';
         }
 
-        function makeActionBtns(btnId, isCached, onDownload, onDelete) {
+        function makeActionBtns(btnId, isCached, onDownload, onDelete, onUpdate, updateLabel) {
           var wrap = document.getElementById(btnId + '_wrap');
           if (!wrap) return;
           wrap.innerHTML = '';
@@ -750,6 +803,13 @@
               dBtn.className = 'action-btn danger icon';
               dBtn.addEventListener('click', onDelete); wrap.appendChild(dBtn);
             }
+            if (onUpdate) {
+              var uBtn = document.createElement('button');
+              uBtn.textContent = '⬆ 更新'; uBtn.title = updateLabel || '';
+              uBtn.className = 'action-btn primary icon';
+              uBtn.addEventListener('click', onUpdate); wrap.appendChild(uBtn);
+              return;
+            }
             var cBtn = document.createElement('button');
             cBtn.textContent = '✓ 已缓存'; cBtn.disabled = true;
             cBtn.className = 'action-btn cached icon';
@@ -767,14 +827,15 @@
           }
         }
 
-        function startPackDownload(pack, i, cachedArr) {
+        function startPackDownload(pack, i, cachedArr, isUpdate) {
           var progEl = document.getElementById('cxRpPkProg_' + i);
           var barEl  = document.getElementById('cxRpPkBar_' + i);
           var pctEl  = document.getElementById('cxRpPkPct_' + i);
           var wrap   = document.getElementById('cxRpPkBtn_' + i + '_wrap');
           if (wrap) wrap.innerHTML = '<button disabled style="padding:5px 12px;border-radius:8px;border:none;font-size:12px;background:var(--surface-alt);color:var(--text-secondary)">下载中…</button>';
           if (progEl) progEl.style.display = '';
-          return downloadPack(pack, function (ratio) {
+          var run = isUpdate ? updatePack : downloadPack;
+          return run(pack, function (ratio) {
             var pct = Math.round(ratio * 100);
             if (barEl) barEl.style.width = pct + '%';
             if (pctEl) pctEl.textContent = pct + '%';
@@ -822,6 +883,8 @@
           packs.forEach(function (pack, i) {
             (function (pk, idx) {
               function refreshBtn() {
+                var needsUpdate = cachedArr[idx] && packNeedsUpdate(pk);
+                var delta = needsUpdate ? findPackDelta(pk) : null;
                 makeActionBtns('cxRpPkBtn_' + idx, cachedArr[idx],
                   cachedArr[idx] ? null : function () { startPackDownload(pk, idx, cachedArr); },
                   cachedArr[idx] ? function () {
@@ -830,7 +893,9 @@
                       cachedArr[idx] = false; refreshBtn();
                       if (win.refreshHomeGrid) win.refreshHomeGrid();
                     });
-                  } : null
+                  } : null,
+                  needsUpdate ? function () { startPackDownload(pk, idx, cachedArr, true); } : null,
+                  needsUpdate ? '下载 ' + fmtSize(delta ? delta.size_bytes : pk.size_bytes) : ''
                 );
               }
               refreshBtn();
@@ -1047,6 +1112,7 @@
     showCachedDialog: showCachedDialog,
     isPackCached: isPackCached,
     downloadPack: downloadPack,
+    updatePack: updatePack,
     downloadAll: downloadAll,
   };
 
@@ -7,12 +7,13 @@
  *  3. 弹框内 {N} 注脚号 → 展开注解（fn-ref）
  *  4. 弹框内 [a] 串珠号 → 展开对应串珠经文列表（xref-ref）
  *  5. 导航栈（返回按钮）
- *  6. 三文件懒加载：bible-text.json / bible-notes.json / bible-xrefs.json
+ *  6. 按书卷懒加载：data/bible/index.json + text/notes/xrefs 分卷
+ *     （无分卷索引时退回整本 bible-text.json / bible-notes.json / bible-xrefs.json）
  *
- * 全局变量（fetch 后手动赋值）：
- *   CX_SCRIPTURES_DATA   （bible-text.json）
- *   CX_BIBLE_NOTES       （bible-notes.json）
- *   CX_BIBLE_XREFS       （bible-xrefs.json）
+ * 全局变量（fetch 后逐卷合并）：
+ *   CX_SCRIPTURES_DATA   （经文 + 当前训练补充经文）
+ *   CX_BIBLE_NOTES       （注解）
+ *   CX_BIBLE_XREFS       （串珠）
  */
 (function () {
   'use strict';
@@ -289,104 +290,173 @@
       .catch(function () { onDone(null); }); /* 加载失败也继续 */
   }
 
-  var _loadingText  = false, _cbText  = [];
-  var _loadingNotes = false, _cbNotes = [];
-  var _loadingXrefs = false, _cbXrefs = [];
-  var _bibleLoaded = false;          /* bible-text.json 是否已加载 */
+  /* ── 圣经数据：按书卷懒加载 ──
+   * data/bible/index.json（export_bible_sql_json.py 生成）列出每卷书 text/notes/xrefs
+   * 分卷文件及其内容哈希；只下载当前要显示的书卷，分卷 URL 带 ?v=<哈希>，
+   * 内容变化后不会命中旧缓存。索引不可用（旧版输出）或调用方未指定书卷时，
+   * 退回整本 bible-*.json。
+   */
+  var BIBLE_FULL_FILES = { text: 'bible-text.json', notes: 'bible-notes.json', xrefs: 'bible-xrefs.json' };
+  var _bibleState = {
+    text:  { full: false, books: {}, loading: {} },
+    notes: { full: false, books: {}, loading: {} },
+    xrefs: { full: false, books: {}, loading: {} }
+  };
+  var _bibleIndex;                   /* undefined = 尚未加载；null = 不可用 */
+  var _cbIndex = [];
+  var _suppData = null;              /* 当前训练的补充经文，优先于全本圣经同键条目 */
   var _suppLoadedForPath = null;     /* 上次加载 scriptures-data.json 对应的 CX_TRAINING_PATH */
+  var _loadingSupp = false, _cbSupp = [];
+
+  function ensureBibleIndex(cb) {
+    if (_bibleIndex !== undefined) { cb(_bibleIndex); return; }
+    _cbIndex.push(cb);
+    if (_cbIndex.length > 1) return;
+    var v = window.CX_BIBLE_INDEX ? '?v=' + window.CX_BIBLE_INDEX : '';
+    loadJSON(getRootPath() + 'data/bible/index.json' + v, function (data) {
+      _bibleIndex = (data && data.books) ? data : null;
+      var cbs = _cbIndex.slice(); _cbIndex = [];
+      cbs.forEach(function (f) { f(_bibleIndex); });
+    });
+  }
 
-  function ensureBibleText(cb) {
-    var tp = window.CX_TRAINING_PATH || null; /* e.g. '2025-07'，由 renderer.js 设置 */
-    /* 全部就绪：bible 已加载 且 当前训练的补充数据已加载（或无训练） */
-    if (_bibleLoaded && _suppLoadedForPath === tp) { cb(); return; }
-    _cbText.push(cb);
-    if (_loadingText) return;
-    _loadingText = true;
+  /* 引用串涉及的书卷（含上下文书卷，省略书卷的续接引用沿用前一个书卷） */
+  function refBooks(refs, contextRef) {
+    var seen = {}, out = [];
+    var last = getBookFromRef(contextRef || '');
+    if (last) { seen[last] = 1; out.push(last); }
+    splitRefTokens(refs).forEach(function (token) {
+      var lm = /^\d+(?:[~～\-]\d+)?:([^\d:].*)$/.exec(token);
+      if (lm) token = lm[1].trim();
+      var bk = getBookFromRef(normalizeRef(token, last));
+      if (!bk) return;
+      last = bk;
+      if (!seen[bk]) { seen[bk] = 1; out.push(bk); }
+    });
+    return out;
+  }
 
-    /* 本地导入路径（local-YYYY-NN）：从 localforage 读取补充经文，无需网络 */
-    var isLocal = tp && /^local-/.test(tp);
-    function loadSupp(onData) {
-      if (!tp) { onData(null); return; }
-      if (isLocal && window.CXLocalImport && window.CXLocalImport.loadScriptures) {
-        window.CXLocalImport.loadScriptures(tp).then(onData).catch(function() { onData(null); });
-      } else if (!isLocal) {
-        loadJSON(getRootPath() + tp + '/js/scriptures-data.json', onData);
-      } else {
-        onData(null);
-      }
+  function mergeBibleData(kind, data) {
+    if (kind === 'text') {
+      window.CX_BIBLE_TEXT_DATA = Object.assign(window.CX_BIBLE_TEXT_DATA || {}, data);  /* 全本圣经独立引用，供整章展开使用 */
+      var dict = window.CX_SCRIPTURES_DATA || (window.CX_SCRIPTURES_DATA = {});
+      Object.keys(data).forEach(function (k) {
+        if (!(_suppData && Object.prototype.hasOwnProperty.call(_suppData, k))) dict[k] = data[k];
+      });
+    } else if (kind === 'notes') {
+      window.CX_BIBLE_NOTES = Object.assign(window.CX_BIBLE_NOTES || {}, data);
+    } else {
+      window.CX_BIBLE_XREFS = Object.assign(window.CX_BIBLE_XREFS || {}, data);
     }
+  }
 
-    if (_bibleLoaded) {
-      /* bible 已加载，只需重新加载当前训练的补充经文 */
-      function applySupp(data) {
-        var base = window.CX_BIBLE_TEXT_DATA || {};
-        window.CX_SCRIPTURES_DATA = data
-          ? Object.assign({}, base, data)
-          : Object.assign({}, base);
-        _suppLoadedForPath = tp;
-        _loadingText = false;
-        var cbs = _cbText.slice(); _cbText = [];
-        cbs.forEach(function (f) { f(); });
-      }
-      loadSupp(applySupp);
-      return;
-    }
+  /* 指定书卷（或整本）的数据是否已就绪，可同步渲染 */
+  function hasBibleData(kind, books) {
+    var st = _bibleState[kind];
+    if (st.full) return true;
+    if (!books || !_bibleIndex) return false;
+    return books.every(function (bk) { return st.books[bk] || !_bibleIndex.books[bk]; });
+  }
 
-    /* bible 尚未加载：bible-text.json 同步加载，补充经文按类型加载 */
-    var pending = tp ? 2 : 1, bibleData = null, suppData = null;
-    function allDone() {
-      if (--pending > 0) return;
-      if (bibleData) {
-        window.CX_BIBLE_TEXT_DATA = bibleData;  /* 保留全本圣经独立引用，供整章展开使用 */
-        window.CX_SCRIPTURES_DATA = Object.assign({}, bibleData);
+  /* kind: 'text' | 'notes' | 'xrefs'；books 为书卷缩写数组，省略时加载整本 */
+  function ensureBibleData(kind, books, cb) {
+    var st = _bibleState[kind];
+    if (st.full) { cb(); return; }
+    ensureBibleIndex(function (index) {
+      var files = [];
+      if (index && books) {
+        books.forEach(function (bk) {
+          var book = index.books[bk];
+          if (st.books[bk] || !book) return;       /* 已加载，或索引中没有这卷书 */
+          if (!book[kind]) { st.books[bk] = 1; return; }  /* 该卷没有这类数据 */
+          files.push({ key: bk, url: getRootPath() + 'data/bible/' + book[kind].file + '?v=' + book[kind].hash });
+        });
+      } else {
+        files.push({ key: '*', url: getRootPath() + 'data/' + BIBLE_FULL_FILES[kind] });
       }
+      var pending = files.length;
+      if (!pending) { cb(); return; }
+      var finish = function () { if (--pending === 0) cb(); };
+      files.forEach(function (file) {
+        if (st.loading[file.key]) { st.loading[file.key].push(finish); return; }
+        st.loading[file.key] = [finish];
+        loadJSON(file.url, function (data) {
+          if (!data && file.key !== '*') {
+            /* 分卷加载失败（文件缺失、离线且未缓存）：退回整本文件 */
+            ensureBibleData(kind, undefined, function () { loaded(null); });
+            return;
+          }
+          loaded(data);
+        });
+        function loaded(data) {
+          if (data) {
+            mergeBibleData(kind, data);
+            if (file.key === '*') st.full = true;
+            else st.books[file.key] = 1;
+          }
+          if (st.full) {
+            if (kind === 'text') window.CX_BIBLE_TEXT_READY = 1;  /* 向后兼容 */
+            else if (kind === 'notes') window.CX_BIBLE_NOTES_READY = 1;
+            else window.CX_BIBLE_XREFS_READY = 1;
+          }
+          var cbs = st.loading[file.key]; delete st.loading[file.key];
+          cbs.forEach(function (f) { f(); });             /* 加载失败也继续 */
+        }
+      });
+    });
+  }
+
+  /* 当前训练的补充经文（scriptures-data.json），切换训练时重新加载 */
+  function ensureSupp(cb) {
+    var tp = window.CX_TRAINING_PATH || null; /* e.g. '2025-07'，由 renderer.js 设置 */
+    if (_suppLoadedForPath === tp) { cb(); return; }
+    _cbSupp.push(cb);
+    if (_loadingSupp) return;
+    _loadingSupp = true;
+
+    function applySupp(data) {
+      _suppData = data || null;
+      var base = window.CX_BIBLE_TEXT_DATA || {};
       /* 训练专属条目最后合并，确保其优先于全本圣经同键条目 */
-      if (suppData) {
-        window.CX_SCRIPTURES_DATA = Object.assign(window.CX_SCRIPTURES_DATA || {}, suppData);
-      }
-      _bibleLoaded = true;
+      window.CX_SCRIPTURES_DATA = _suppData
+        ? Object.assign({}, base, _suppData)
+        : Object.assign({}, base);
       _suppLoadedForPath = tp;
-      _loadingText = false;
-      window.CX_BIBLE_TEXT_READY = 1;  /* 向后兼容 */
-      var cbs = _cbText.slice(); _cbText = [];
+      _loadingSupp = false;
+      var cbs = _cbSupp.slice(); _cbSupp = [];
       cbs.forEach(function (f) { f(); });
     }
-    loadJSON(getRootPath() + 'data/bible-text.json', function (data) {
-      bibleData = data; allDone();
-    });
-    if (tp) {
-      loadSupp(function(data) { suppData = data; allDone(); });
+
+    /* 本地导入路径（local-YYYY-NN）：从 localforage 读取补充经文，无需网络 */
+    var isLocal = tp && /^local-/.test(tp);
+    if (!tp) {
+      applySupp(null);
+    } else if (isLocal && window.CXLocalImport && window.CXLocalImport.loadScriptures) {
+      window.CXLocalImport.loadScriptures(tp).then(applySupp).catch(function() { applySupp(null); });
+    } else if (!isLocal) {
+      loadJSON(getRootPath() + tp + '/js/scriptures-data.json', applySupp);
+    } else {
+      applySupp(null);
     }
   }
 
-  function ensureBibleNotes(cb) {
-    if (window.CX_BIBLE_NOTES_READY) { cb(); return; }
-    _cbNotes.push(cb);
-    if (_loadingNotes) return;
-    _loadingNotes = true;
-    loadJSON(getRootPath() + 'data/bible-notes.json', function (data) {
-      if (data) {
-        window.CX_BIBLE_NOTES = data;
-        window.CX_BIBLE_NOTES_READY = 1;
-      }
-      var cbs = _cbNotes.slice(); _cbNotes = [];
-      cbs.forEach(function (f) { f(); });
-    });
+  function hasBibleText(books) {
+    return hasBibleData('text', books) && _suppLoadedForPath === (window.CX_TRAINING_PATH || null);
   }
 
-  function ensureBibleXrefs(cb) {
-    if (window.CX_BIBLE_XREFS_READY) { cb(); return; }
-    _cbXrefs.push(cb);
-    if (_loadingXrefs) return;
-    _loadingXrefs = true;
-    loadJSON(getRootPath() + 'data/bible-xrefs.json', function (data) {
-      if (data) {
-        window.CX_BIBLE_XREFS = data;
-        window.CX_BIBLE_XREFS_READY = 1;
-      }
-      var cbs = _cbXrefs.slice(); _cbXrefs = [];
-      cbs.forEach(function (f) { f(); });
-    });
+  function ensureBibleText(cb, books) {
+    var pending = 2;
+    var done = function () { if (--pending === 0) cb(); };
+    ensureSupp(done);
+    ensureBibleData('text', books, done);
+  }
+
+  function ensureBibleNotes(cb, books) {
+    ensureBibleData('notes', books, cb);
+  }
+
+  function ensureBibleXrefs(cb, books) {
+    ensureBibleData('xrefs', books, cb);
   }
 
   /* ═══════════════════════════ DOM 结构 ═══════════════════════════ */
@@ -503,7 +573,8 @@
 
     if (frame.type === 'verses') {
       m.title.textContent = frame.label || (frame.refs || '').replace(/,/g, '、');
-      if (window.CX_BIBLE_TEXT_READY) {
+      var books = refBooks(frame.refs, frame.verseKey);
+      if (hasBibleText(books)) {
         /* 数据已缓存（预加载），直接渲染，避免 loading→内容 双重 innerHTML 导致闪屏 */
         m.body.innerHTML = renderVerseList(frame.refs, frame.verseKey || '');
         m.body.scrollTop = frame._scrollTop || 0;
@@ -512,11 +583,12 @@
         ensureBibleText(function () {
           m.body.innerHTML = renderVerseList(frame.refs, frame.verseKey || '');
           m.body.scrollTop = frame._scrollTop || 0;
-        });
+        }, books);
       }
     } else if (frame.type === 'footnote') {
       m.title.textContent = frame.verseKey + ' 注' + frame.num;
-      if (window.CX_BIBLE_NOTES_READY) {
+      var noteBooks = refBooks('', frame.verseKey);
+      if (hasBibleData('notes', noteBooks)) {
         var noteArr = (window.CX_BIBLE_NOTES || {})[frame.verseKey] || [];
         var text = noteArr[parseInt(frame.num, 10) - 1] || '（未找到注解）';
         m.body.innerHTML = '<div class="scripture-popup-fn-body">' + renderNoteText(text, frame.verseKey) + '</div>';
@@ -528,13 +600,14 @@
           var text2 = noteArr2[parseInt(frame.num, 10) - 1] || '（未找到注解）';
           m.body.innerHTML = '<div class="scripture-popup-fn-body">' + renderNoteText(text2, frame.verseKey) + '</div>';
           m.body.scrollTop = frame._scrollTop || 0;
-        });
+        }, noteBooks);
       }
     } else if (frame.type === 'xrefs') {
       m.title.textContent = frame.verseKey + ' 串' + frame.letter;
-      if (window.CX_BIBLE_XREFS_READY && window.CX_BIBLE_TEXT_READY) {
-        var xrefMap = (window.CX_BIBLE_XREFS || {})[frame.verseKey] || {};
-        var refs = xrefMap[frame.letter] || '';
+      var xrefBooks = refBooks('', frame.verseKey);
+      var xrefMap = hasBibleData('xrefs', xrefBooks) ? ((window.CX_BIBLE_XREFS || {})[frame.verseKey] || {}) : null;
+      var refs = xrefMap ? (xrefMap[frame.letter] || '') : '';
+      if (xrefMap && (!refs || hasBibleText(refBooks(refs, frame.verseKey)))) {
         if (refs) {
           m.body.innerHTML = renderVerseList(refs, frame.verseKey || '');
           m.body.scrollTop = frame._scrollTop || 0;
@@ -551,12 +624,12 @@
             ensureBibleText(function () {
               m.body.innerHTML = renderVerseList(refs2, frame.verseKey || '');
               m.body.scrollTop = frame._scrollTop || 0;
-            });
+            }, refBooks(refs2, frame.verseKey));
           } else {
             m.body.innerHTML = '<div class="scripture-popup-empty">（未找到串珠）</div>';
             m.body.scrollTop = 0;
           }
-        });
+        }, xrefBooks);
       }
     }
   }
@@ -789,6 +862,17 @@
     annotateInlineRefs();
   }
 
+  /* 一组经文块引用到的书卷 */
+  function blocksBooks(blocks) {
+    var seen = {}, out = [];
+    Array.prototype.forEach.call(blocks, function (block) {
+      refBooks(block.dataset.refs || '').forEach(function (bk) {
+        if (!seen[bk]) { seen[bk] = 1; out.push(bk); }
+      });
+    });
+    return out;
+  }
+
   /* ═══════════════════════════ 自动渲染 scripture-block ═══════════════════════════ */
   /* .scripture-block[data-refs] 行内经文块（晨兴喂养等），带注脚和串珠上标 */
   function renderScriptureBlocks() {
@@ -808,7 +892,7 @@
       }
       // 经文块撑开内容后，通知翻页布局重新计算容器高度（避免 overflow:hidden 截断最后段落）
       document.dispatchEvent(new CustomEvent('cx:scriptureBlocksRendered'));
-    });
+    }, blocksBooks(blocks));
   }
 
   if (document.readyState === 'loading') {
@@ -913,7 +997,7 @@
         window.CXHighlight.redoHighlights();
       }
       document.dispatchEvent(new CustomEvent('cx:scriptureBlocksRendered'));
-    });
+    }, blocksBooks(blocks));
   }
 
   if (document.readyState === 'loading') {
@@ -929,13 +1013,15 @@
     annotateInlineRefs();
     renderScriptureBlocks();
     renderScriptureStaticBlocks();
+    schedulePreload();
   }
   window.CXScripturePopup = { open: openModal, close: closeModal, init: init };
 
-  /* ── 空闲预加载：页面加载后利用空闲时间提前解析三个大文件 ──
+  /* ── 空闲预加载：利用空闲时间提前加载并解析经文数据 ──
    * 文件已在 PWA/APK 缓存中，无网络开销；
    * 提前解析后用户首次点击经文时无需等待。
-   * 按优先级依次加载：bible-text → bible-notes → bible-xrefs
+   * 有分卷索引且已知当前训练引用的书卷（training-index.json 的 bible_books）时只加载这些分卷，
+   * 否则加载三个整本文件（保证离线可用）。按优先级依次加载：text → notes → xrefs
    */
   function idleLoad(fn) {
     if (window.requestIdleCallback) {
@@ -947,14 +1033,18 @@
 
   function schedulePreload() {
     idleLoad(function () {
-      ensureBibleText(function () {
-        idleLoad(function () {
-          ensureBibleNotes(function () {
-            idleLoad(function () {
-              ensureBibleXrefs(function () {});
-            });
+      ensureBibleIndex(function (index) {
+        var books = window.CX_TRAINING_BIBLE_BOOKS;
+        if (!index || !(books && books.length)) books = undefined;  /* 未知训练书卷：预加载整本 */
+        ensureBibleText(function () {
+          idleLoad(function () {
+            ensureBibleNotes(function () {
+              idleLoad(function () {
+                ensureBibleXrefs(function () {}, books);
+              });
+            }, books);
           });
-        });
+        }, books);
       });
     });
   }
@@ -30,6 +30,10 @@
 
     // 内存缓存：path → entries[]
     _searchCache: {},
+    // 倒排表（来自 data/search/<path>.json 分片）：path → { 二元组: VLQ 差分串 }
+    _searchPostings: {},
+    // 各训练搜索分片（来自 trainings.json 的 search 字段）：path → { file, hash }
+    _searchShards: {},
     // 各训练版本号（来自 trainings.json）：path → version string
     _trainingVersions: {},
     // trainings.json 中所有训练路径（首次加载后缓存，供重建队列用）
@@ -178,6 +182,8 @@
     // ── 缓存训练搜索数据（renderer.js 加载 training.json 后异步调用）────────
 
     _cacheTraining: function (path, data) {
+      // 已连同倒排分片加载过（段落由同一份 training.json 抽取），无需重建
+      if (this._searchPostings[path]) return;
       var entries = this._buildSearchEntries(path, data);
       this._searchCache[path] = entries;
       if (!win.localforage) return;
@@ -203,6 +209,7 @@
           var trainings = data.trainings || [];
           trainings.forEach(function (t) {
             self._trainingVersions[t.path] = t.version || '';
+            if (t.search && t.search.file) self._searchShards[t.path] = t.search;
           });
           self._allTrainingPaths = trainings.map(function (t) { return t.path; });
           return self._rebuildSearchQueue();
@@ -280,19 +287,127 @@
     },
 
 
+    // ── 搜索分片：解码段落表 + 倒排表求交 ─────────────────────────────────
+
+    // 分片只含倒排表与段落定位 docs [篇号, 类型, pi, day_index]，正文取自 training.json；
+    // 逐条核对定位与 _buildSearchEntries 的结果一致才返回倒排表，否则返回 null（退回全量扫描）
+    _shardPostings: function (entries, shard) {
+      var strs = shard.strings || [];
+      var docs = shard.docs || [];
+      if (!shard.postings || docs.length !== entries.length) return null;
+      for (var i = 0; i < docs.length; i++) {
+        var d = docs[i], e = entries[i];
+        var day = e.day_index !== undefined ? e.day_index : -1;
+        if (d[0] !== e.chapter || strs[d[1]] !== e.type || d[2] !== e.pi || d[3] !== day) return null;
+      }
+      return shard.postings;
+    },
+
+    // VLQ base64 差分串 → 升序段落号（编码见 src/search_index.py encode_postings）
+    _decodePostings: function (s) {
+      var B64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/';
+      var ids = [];
+      var value = 0, shift = 0, prev = 0;
+      for (var i = 0; i < s.length; i++) {
+        var digit = B64.indexOf(s.charAt(i));
+        value += (digit & 31) * Math.pow(2, shift);
+        if (digit & 32) { shift += 5; continue; }
+        prev += value;
+        ids.push(prev);
+        value = 0; shift = 0;
+      }
+      return ids;
+    },
+
+    // 某训练中可能命中 query 的 entries：有倒排表时按二元组求交（代价与命中数成正比），
+    // 否则返回全部 entries；最终匹配仍由 search() 做子串核对
+    _candidateEntries: function (path, query) {
+      var entries = this._searchCache[path];
+      var postings = this._searchPostings[path];
+      if (!entries || !postings) return entries || [];
+      var terms = query.trim().toLowerCase().split(/\s+/).filter(Boolean);
+      var grams = {}, lists = [];
+      for (var i = 0; i < terms.length; i++) {
+        // 按码点切分（扩展区汉字为代理对），与 search_index.py bigrams() 一致
+        var chars = terms[i].match(/[\uD800-\uDBFF][\uDC00-\uDFFF]|[\s\S]/g) || [];
+        for (var j = 0; j + 1 < chars.length; j++) {
+          var g = chars[j] + chars[j + 1];
+          if (grams[g]) continue;
+          grams[g] = true;
+          if (!postings.hasOwnProperty(g)) return [];
+          lists.push(postings[g]);
+        }
+      }
+      if (!lists.length) return entries;   // 全是单字关键词，无法用二元组缩小范围
+      lists.sort(function (a, b) { return a.length - b.length; });
+      var ids = this._decodePostings(lists[0]);
+      for (var k = 1; k < lists.length && ids.length; k++) {
+        var other = this._decodePostings(lists[k]);
+        var merged = [], a = 0, b = 0;
+        while (a < ids.length && b < other.length) {
+          if (ids[a] === other[b]) { merged.push(ids[a]); a++; b++; }
+          else if (ids[a] < other[b]) a++;
+          else b++;
+        }
+        ids = merged;
+      }
+      var out = new Array(ids.length);
+      for (var n = 0; n < ids.length; n++) out[n] = entries[ids[n]];
+      return out;
+    },
+
+    // 拉取训练的搜索分片；无分片信息或请求失败时 reject，由调用方只用 training.json
+    _fetchShard: function (path) {
+      var info = this._searchShards[path];
+      if (!info || path.indexOf('local-') === 0) return Promise.reject(new Error('no shard'));
+      var root = (win.CX_ROOT !== undefined ? win.CX_ROOT : './');
+      return fetch(root + info.file + '?v=' + (info.hash || ''))
+        .then(function (r) {
+          if (!r.ok) throw new Error('HTTP ' + r.status);
+          return r.json();
+        });
+    },
+
+    // 读取训练的 training.json：_searchQueue 已过滤为已缓存训练，fetch 将由 SW 从缓存返回，不走网络
+    _fetchTrainingJson: function (path) {
+      var root = (win.CX_ROOT !== undefined ? win.CX_ROOT : './');
+      var isNative = !!(win.Capacitor && win.Capacitor.isNativePlatform && win.Capacitor.isNativePlatform());
+      return fetch(root + path + '/training.json')
+        .then(function (r) {
+          if (!r.ok) throw new Error('HTTP ' + r.status);
+          return r.json();
+        })
+        .catch(function (fetchErr) {
+          // Capacitor 原生 App 无 SW，历史合辑训练（资源包下载到 cx-main）需从 Cache Storage 兜底读取
+          if (isNative && 'caches' in win) {
+            var cacheUrl = (win.location.origin || '') + '/' + path + '/training.json';
+            return caches.match(cacheUrl).then(function (r1) {
+              return r1 || caches.match(root + path + '/training.json');
+            }).then(function (cachedResp) {
+              if (cachedResp && cachedResp.ok) return cachedResp.json();
+              throw fetchErr;
+            });
+          }
+          throw fetchErr;
+        });
+    },
+
     // ── 持续加载批次直到有 targetGroups 个训练产生结果，或队列耗尽 ───────────
     // 返回 Promise<{entries, newOffset}>
 
     _loadUntilEnoughResults: function (startOffset, targetGroups, query) {
       var self = this;
       var allEntries = [];
+      var indexed = 0;
       function step(off) {
         if (off >= self._searchQueue.length) return Promise.resolve(off);
         return self._loadBatch(off).then(function () {
           var paths = self._searchQueue.slice(off, off + self.SEARCH_BATCH_SIZE);
           var newOff = Math.min(off + self.SEARCH_BATCH_SIZE, self._searchQueue.length);
           paths.forEach(function (p) {
-            if (self._searchCache[p]) allEntries = allEntries.concat(self._searchCache[p]);
+            if (!self._searchCache[p]) return;
+            indexed += self._searchCache[p].length;
+            allEntries = allEntries.concat(self._candidateEntries(p, query));
           });
           var result = self.search(query, allEntries);
           if (result.groups.length >= targetGroups || newOff >= self._searchQueue.length) {
@@ -302,16 +417,14 @@
         });
       }
       return step(startOffset).then(function (newOff) {
-        return { entries: allEntries, newOffset: newOff };
+        return { entries: allEntries, newOffset: newOff, indexed: indexed };
       });
     },
 
-    // ── 加载一批训练的搜索数据（localforage 命中 → fetch → Capacitor Cache Storage 兜底）──
+    // ── 加载一批训练的搜索数据（localforage 命中 → training.json + 倒排分片 → Capacitor Cache Storage 兜底）──
 
     _loadBatch: function (offset) {
       var self = this;
-      var root = (win.CX_ROOT !== undefined ? win.CX_ROOT : './');
-      var isNative = !!(win.Capacitor && win.Capacitor.isNativePlatform && win.Capacitor.isNativePlatform());
       var paths = this._searchQueue.slice(offset, offset + this.SEARCH_BATCH_SIZE);
       var promises = paths.map(function (path) {
         if (self._searchCache[path]) return Promise.resolve();
@@ -322,36 +435,24 @@
         return fromForage.then(function (cached) {
           if (cached && cached.version === expectedVer && cached.entries) {
             self._searchCache[path] = cached.entries;
+            if (cached.postings) self._searchPostings[path] = cached.postings;
             return;
           }
-          // _searchQueue 已过滤为已缓存训练，fetch 将由 SW 从缓存返回，不走网络
-          return fetch(root + path + '/training.json')
-            .then(function (r) {
-              if (!r.ok) throw new Error('HTTP ' + r.status);
-              return r.json();
-            })
-            .catch(function (fetchErr) {
-              // Capacitor 原生 App 无 SW，历史合辑训练（资源包下载到 cx-main）需从 Cache Storage 兜底读取
-              if (isNative && 'caches' in win) {
-                var cacheUrl = (win.location.origin || '') + '/' + path + '/training.json';
-                return caches.match(cacheUrl).then(function (r1) {
-                  return r1 || caches.match(root + path + '/training.json');
-                }).then(function (cachedResp) {
-                  if (cachedResp && cachedResp.ok) return cachedResp.json();
-                  throw fetchErr;
-                });
-              }
-              throw fetchErr;
-            })
-            .then(function (data) {
-              var entries = self._buildSearchEntries(path, data);
-              self._searchCache[path] = entries;
-              if (win.localforage) {
-                var ver = self._trainingVersions[path] || data.version || '';
-                win.localforage.setItem('cx_search_' + path, { version: ver, entries: entries });
-              }
-            })
-            .catch(function () {});
+          // 正文来自 training.json；构建期生成的倒排分片可选，缺失或不一致时全量扫描
+          var shardP = self._fetchShard(path).catch(function () { return null; });
+          return Promise.all([self._fetchTrainingJson(path), shardP]).then(function (res) {
+            var data = res[0], shard = res[1];
+            var entries = self._buildSearchEntries(path, data);
+            var postings = shard ? self._shardPostings(entries, shard) : null;
+            self._searchCache[path] = entries;
+            if (postings) self._searchPostings[path] = postings;
+            if (win.localforage) {
+              var ver = expectedVer || data.version || '';
+              var item = { version: ver, entries: entries };
+              if (postings) item.postings = postings;
+              win.localforage.setItem('cx_search_' + path, item);
+            }
+          }).catch(function () {});
         }).catch(function () {});
       });
       return Promise.all(promises);
@@ -788,7 +889,7 @@
         self._queueOffset = loaded.newOffset;
         var terms = q.toLowerCase().split(/\s+/).filter(Boolean);
         var result = self.search(q, loaded.entries);
-        if (loaded.entries.length === 0) {
+        if (loaded.indexed === 0) {
           self._countEl.textContent = '请先访问训练页面以建立搜索索引';
         } else if (result.totalAll === 0) {
           self._countEl.textContent = '未找到相关内容';
@@ -922,7 +1023,7 @@
           var paths = self._searchQueue.slice(off, off + self.SEARCH_BATCH_SIZE);
           var batchEntries = [];
           paths.forEach(function (p) {
-            if (self._searchCache[p]) batchEntries = batchEntries.concat(self._searchCache[p]);
+            if (self._searchCache[p]) batchEntries = batchEntries.concat(self._candidateEntries(p, q));
           });
           off = Math.min(off + self.SEARCH_BATCH_SIZE, self._searchQueue.length);
           var result = self.search(q, batchEntries);
@@ -1,10 +1,17 @@
 /**
  * Service Worker for 特会信息合集
- * 纯路由版：不管理版本，缓存生命周期由安装对话框负责
+ * 路由 + 壳资源增量预缓存：训练缓存的生命周期仍由安装对话框负责；
+ * js/css 等壳资源按 precache-manifest.json 比对哈希，只下载变化的文件
  */
 
 const CACHE_NAME = 'cx-main';
 
+// 构建时由 main.py 写入预缓存清单的版本：清单变化 → sw.js 字节变化 → 浏览器安装新 SW
+const PRECACHE_VERSION = '';
+const PRECACHE_MANIFEST = 'precache-manifest.json';
+// 上次预缓存的 {url: hash}，存于 cx-main
+const PRECACHE_STATE = 'precache-state.json';
+
 const CONFIG = {
   TIMEOUT: 5000,
   CACHEABLE_TYPES: ['basic', 'cors']
@@ -15,10 +22,47 @@ const CONFIG = {
 // --------------------------------------------------------------------------
 
 self.addEventListener('install', event => {
-  // 无需预缓存；缓存由安装对话框管理
+  // 壳资源增量预缓存；失败不阻止安装（页面侧安装对话框仍会补齐）
+  event.waitUntil(precacheChanged().catch(() => {}));
   self.skipWaiting();
 });
 
+// 按清单比对上次预缓存的哈希：只下载新增/变化的资源，删除清单中已移除的资源
+async function precacheChanged() {
+  if (!PRECACHE_VERSION) return;
+  const scope = self.registration.scope;
+  const res = await fetch(new URL(PRECACHE_MANIFEST, scope).href + '?v=' + PRECACHE_VERSION, { cache: 'no-store' });
+  if (!res.ok) return;
+  const manifest = await res.json();
+  const cache = await caches.open(CACHE_NAME);
+  const stateUrl = new URL(PRECACHE_STATE, scope).href;
+  const stateRes = await cache.match(stateUrl);
+  const prev = stateRes ? await stateRes.json().catch(() => ({})) : {};
+  const assets = (manifest.assets || []).map(a => ({ url: new URL(a.url, scope).href, hash: a.hash }));
+  const next = {};
+
+  await Promise.all(assets.map(async asset => {
+    const url = asset.url;
+    if (prev[url] === asset.hash && await cache.match(url)) {
+      next[url] = asset.hash;
+      return;
+    }
+    try {
+      const r = await fetch(url, { cache: 'no-cache' });
+      if (r.ok) {
+        await cache.put(url, r);
+        next[url] = asset.hash;
+      }
+    } catch (e) { /* 单个资源失败：下次安装重试 */ }
+  }));
+
+  const current = new Set(assets.map(a => a.url));
+  await Promise.all(Object.keys(prev).filter(url => !current.has(url)).map(url => cache.delete(url)));
+  await cache.put(stateUrl, new Response(JSON.stringify(next), {
+    headers: { 'Content-Type': 'application/json' }
+  }));
+}
+
 self.addEventListener('activate', event => {
   event.waitUntil(self.clients.claim());
 });
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+经文存储 — bible-text.json 的二进制版本，按经节顺序排列，mmap 只读共享
+
+由 export_bible_sql_json.py 与 bible-text.json 一同写出（bible-text.bin）。
+构建期查询经文时不必 json.load 整本圣经：文件以只读 mmap 打开，
+多个进程（--jobs 进程池的各个 worker）共享同一份页缓存。
+
+    store = VerseStore.open('output/data/bible-text.bin')
+    store.get('太5:3')               # 经文（含 {N}/[a] 标记），没有时返回 None
+    '太5:3上' in store
+    store.get_range('腓2', 5, 11)    # [(key, text), ...]，连续读取
+
+文件格式（小端）:
+    头部     magic 'CXVS' | version u16 | 保留 u16 | 条数 u32 | 书卷表长度 u32
+    书卷表   UTF-8 JSON {"创": 1, ...}（书卷缩写 → 卷号）
+    记录     条数 × (排序键 u64 | 文本偏移 u32 | 文本长度 u32)，按排序键升序
+    文本     UTF-8 经文依次相接
+
+排序键 = 卷号 << 40 | 章 << 24 | 节 << 8 | 半节序（'' < 上 < 中 < 下），
+同一章的经节在记录区连续，查找为 O(log n) 二分。
+"""
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MAGIC = b'CXVS'
+STORE_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHII')
+_RECORD = struct.Struct('<QII')
+
+_HALF_RANK = {'': 0, '上': 1, '中': 2, '下': 3}
+_HALF_SUFFIX = {v: k for k, v in _HALF_RANK.items()}
+_KEY_RE = re.compile(r'^(\D+)(\d+):(\d+)([上中下]?)$')
+_BOOK_CH_RE = re.compile(r'^(\D+)(\d+)$')
+
+
+def _sort_key(book_index: int, chapter: int, verse: int, rank: int = 0) -> int:
+    return (book_index << 40) | (chapter << 24) | (verse << 8) | rank
+
+
+class VerseStoreWriter:
+    """写出经文存储：add() 顺序任意，close() 时排序写盘（临时文件 + 原子替换）。"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.books: Dict[str, int] = {}
+        self._records: List[Tuple[int, int, int]] = []
+        self._blob = bytearray()
+
+    def add(self, book_index: int, abbr: str, chapter: int, verse: int, half: str, text: str) -> None:
+        """half 为 ''、'上'、'中' 或 '下'。"""
+        self.books.setdefault(abbr, book_index)
+        data = text.encode('utf-8')
+        self._records.append((_sort_key(book_index, chapter, verse, _HALF_RANK[half]), len(self._blob), len(data)))
+        self._blob += data
+
+    def close(self) -> None:
+        self._records.sort()
+        books = json.dumps(self.books, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, STORE_VERSION, 0, len(self._records), len(books)))
+            f.write(books)
+            f.write(b''.join(_RECORD.pack(*r) for r in self._records))
+            f.write(self._blob)
+        os.replace(tmp, self.path)
+
+
+class VerseStore:
+    """只读经文存储（mmap）。"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _reserved, count, books_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            self._mm.close()
+            raise ValueError(f'不是经文存储文件或版本不符: {self.path}')
+        self._count = count
+        books_at = _HEADER.size
+        self.books: Dict[str, int] = json.loads(self._mm[books_at:books_at + books_len].decode('utf-8'))
+        self._abbr = {idx: abbr for abbr, idx in self.books.items()}
+        self._records_at = books_at + books_len
+        self._text_at = self._records_at + count * _RECORD.size
+
+    @classmethod
+    def open(cls, path) -> Optional['VerseStore']:
+        """打开存储；文件不存在或格式不符时返回 None。"""
+        try:
+            return cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def close(self) -> None:
+        self._mm.close()
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _record(self, i: int) -> Tuple[int, int, int]:
+        return _RECORD.unpack_from(self._mm, self._records_at + i * _RECORD.size)
+
+    def _lower_bound(self, skey: int) -> int:
+        lo, hi = 0, self._count
+        at, size, unpack = self._records_at, _RECORD.size, _RECORD.unpack_from
+        mm = self._mm
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if unpack(mm, at + mid * size)[0] < skey:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _text(self, off: int, length: int) -> str:
+        start = self._text_at + off
+        return self._mm[start:start + length].decode('utf-8')
+
+    def _key(self, skey: int) -> str:
+        book = self._abbr.get(skey >> 40, str(skey >> 40))
+        return f"{book}{(skey >> 24) & 0xFFFF}:{(skey >> 8) & 0xFFFF}{_HALF_SUFFIX[skey & 0xFF]}"
+
+    def _parse(self, key: str) -> Optional[int]:
+        m = _KEY_RE.match(key)
+        if not m:
+            return None
+        book_index = self.books.get(m.group(1))
+        if book_index is None:
+            return None
+        return _sort_key(book_index, int(m.group(2)), int(m.group(3)), _HALF_RANK[m.group(4)])
+
+    def get(self, key: str, default=None):
+        """返回经文（含 {N}/[a] 标记），找不到返回 default。"""
+        skey = self._parse(key)
+        if skey is None:
+            return default
+        i = self._lower_bound(skey)
+        if i < self._count:
+            k, off, length = self._record(i)
+            if k == skey:
+                return self._text(off, length)
+        return default
+
+    def get_range(self, book_ch: str, start: int, end: int) -> List[Tuple[str, str]]:
+        """book_ch（如 "腓2"）第 start～end 节（含半节条目），按经节顺序返回 [(key, text)]。"""
+        m = _BOOK_CH_RE.match(book_ch)
+        book_index = self.books.get(m.group(1)) if m else None
+        if book_index is None or end < start:
+            return []
+        chapter = int(m.group(2))
+        lo = self._lower_bound(_sort_key(book_index, chapter, start))
+        hi = self._lower_bound(_sort_key(book_index, chapter, end + 1))
+        out = []
+        for i in range(lo, hi):
+            k, off, length = self._record(i)
+            out.append((self._key(k), self._text(off, length)))
+        return out
+
+    def keys(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._key(self._record(i)[0])
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        return self.keys()
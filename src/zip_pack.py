@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+ZIP 资源包组装 — 成员以「已压缩数据」为单位读写
+
+zipfile 只能逐个文件重新压缩；资源包增量构建需要把旧包中未变的成员
+原样搬到新包（不解压、不重压），因此这里直接按 ZIP 格式写本地文件头与中央目录。
+
+    member = compress_file('output/1997-01/training.json', '1997-01/training.json')
+    old = read_members('output/resource-packs/pack-1997-2006.zip')   # {arcname: PackMember}
+    write_zip('output/resource-packs/pack-1997-2006.zip', [member, old['1998-01/training.json']])
+
+只支持 DEFLATE / STORED 与 4 GB 以内的包（不写 ZIP64 扩展），资源包远小于此。
+"""
+import os
+import struct
+import time
+import zipfile
+import zlib
+from collections import namedtuple
+from typing import Dict, Iterable
+
+# data 为压缩后的字节；date_time 为 (年, 月, 日, 时, 分, 秒)；mode 为 Unix 文件权限
+PackMember = namedtuple('PackMember', 'name crc size method data date_time mode')
+
+_LOCAL = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END = struct.Struct('<IHHHHIIH')
+_LOCAL_SIG = 0x04034b50
+_CENTRAL_SIG = 0x02014b50
+_END_SIG = 0x06054b50
+_VERSION = 20
+_MADE_BY = (3 << 8) | _VERSION        # Unix
+_FLAG_UTF8 = 0x800
+_LIMIT = 0xFFFFFFFF
+
+
+def compress_bytes(data: bytes, name: str, date_time=None, mode: int = 0o644,
+                   level: int = 6) -> PackMember:
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    packed = comp.compress(data) + comp.flush()
+    return PackMember(name, zlib.crc32(data) & _LIMIT, len(data), zipfile.ZIP_DEFLATED, packed,
+                      tuple(date_time or time.localtime()[:6]), mode & 0xFFFF)
+
+
+def compress_file(path: str, name: str, level: int = 6) -> PackMember:
+    """读取并 DEFLATE 压缩一个文件；修改时间取文件 mtime（与 ZipFile.write 相同）。"""
+    st = os.stat(path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    return compress_bytes(data, name, date_time, st.st_mode, level)
+
+
+def read_members(zip_path: str) -> Dict[str, PackMember]:
+    """读取已有 ZIP 的全部成员（保留压缩数据，不解压）。"""
+    members = {}
+    with zipfile.ZipFile(zip_path) as zf, open(zip_path, 'rb') as fp:
+        for info in zf.infolist():
+            if info.compress_type not in (zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED) or info.flag_bits & 0x1:
+                raise ValueError(f'不支持的成员格式: {info.filename}')
+            fp.seek(info.header_offset)
+            header = fp.read(_LOCAL.size)
+            if len(header) != _LOCAL.size or _LOCAL.unpack(header)[0] != _LOCAL_SIG:
+                raise ValueError(f'本地文件头损坏: {info.filename}')
+            name_len, extra_len = _LOCAL.unpack(header)[-2:]
+            fp.seek(name_len + extra_len, os.SEEK_CUR)
+            data = fp.read(info.compress_size)
+            members[info.filename] = PackMember(info.filename, info.CRC, info.file_size,
+                                                info.compress_type, data, info.date_time,
+                                                (info.external_attr >> 16) & 0xFFFF)
+    return members
+
+
+def _dos_time(date_time) -> tuple:
+    y, mo, d, h, mi, s = date_time
+    return (h << 11) | (mi << 5) | (s // 2), ((y - 1980) << 9) | (mo << 5) | d
+
+
+def write_zip(zip_path: str, members: Iterable[PackMember]) -> int:
+    """按给定顺序写出 ZIP（临时文件 + 原子替换），返回文件字节数。"""
+    tmp = zip_path + '.tmp'
+    try:
+        size = _write_members(tmp, zip_path, members)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, zip_path)
+    return size
+
+
+def _write_members(tmp: str, zip_path: str, members: Iterable[PackMember]) -> int:
+    central = []
+    offset = 0
+    with open(tmp, 'wb') as f:
+        for m in members:
+            name = m.name.encode('utf-8')
+            flags = 0 if m.name.isascii() else _FLAG_UTF8
+            dos_time, dos_date = _dos_time(m.date_time)
+            header = _LOCAL.pack(_LOCAL_SIG, _VERSION, flags, m.method, dos_time, dos_date,
+                                 m.crc, len(m.data), m.size, len(name), 0)
+            central.append(_CENTRAL.pack(_CENTRAL_SIG, _MADE_BY, _VERSION, flags, m.method,
+                                         dos_time, dos_date, m.crc, len(m.data), m.size,
+                                         len(name), 0, 0, 0, 0, (m.mode & 0xFFFF) << 16, offset) + name)
+            f.write(header)
+            f.write(name)
+            f.write(m.data)
+            offset += len(header) + len(name) + len(m.data)
+            if offset > _LIMIT or len(central) > 0xFFFF:
+                raise ValueError(f'资源包超出 ZIP 格式上限（需 ZIP64）: {zip_path}')
+        cd = b''.join(central)
+        f.write(cd)
+        f.write(_END.pack(_END_SIG, 0, 0, len(central), len(central), len(cd), offset, 0))
+    return offset + len(cd) + _END.size
@@ -0,0 +1,711 @@
+# -*- coding: utf-8 -*-
+"""
+构建性能基准 — 用合成训练文档测量解析与生成各阶段的耗时。
+
+用法:
+    python tools/benchmark.py                               # 默认规模，结果写到 .cache/benchmark/result.json
+    python tools/benchmark.py --chapters 12 --size 2 --repeat 5
+    python tools/benchmark.py --save-baseline               # 把本次结果另存为基线
+    python tools/benchmark.py --baseline bench.json --threshold 0.15
+    python tools/benchmark.py --node                        # 同时计时 Node 端 TXT / EPUB 批次解析
+
+合成数据（由 --seed 决定，同一参数每次生成的内容完全相同）:
+    1. 经文.docx / 听抄.docx / 晨兴.docx：段落样式取自 ImprovedParser.STYLE_MAP 的秋季样式，
+       纲目点、经节行、听抄正文、晨兴喂养都带圣经出处，密度接近真实训练（--ref-density 调节）
+    2. 同一份内容的 TXT（txt-importer 格式）与 EPUB（epub-importer 的 Calibre 格式）
+    3. --history 个历史训练输出目录（复制本次导出的 training.json），供搜索索引与资源包使用
+
+计时阶段（每个阶段重复 --repeat 次，取墙钟中位数）:
+    parse_training_docs_improved / export_training_json /
+    generate_search_index_from_json / generate_resource_packs
+    （--node 时另有 node:build-batch-txt / node:build-batch-epub）
+
+与基线比较时，中位数超过基线 (1 + --threshold) 倍的阶段视为退化，退出码为 1。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
+
+# 将项目根目录加入 sys.path，以便导入 src 模块
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
+
+from src.bible_dict import BibleDict
+from src.build_profile import BuildProfiler, peak_rss_mb
+from src.generator import export_training_json, generate_search_index_from_json
+from src.parser_improved import ImprovedParser, parse_training_docs_improved
+
+BENCH_DIR = os.path.join(_project_root, '.cache', 'benchmark')
+RESULT_FILE = 'result.json'
+BASELINE_FILE = 'baseline.json'
+RESULT_VERSION = 1
+
+BATCH_NAME = '2025-09 秋季训练'
+BATCH_PATH = '2025-09'
+BATCH_YEAR = 2025
+BATCH_SEASON = '秋季'
+
+
+# ── 合成文本 ──────────────────────────────────────────────────────────────────
+
+# (书卷缩写, 章数)；章数超过 99 的书卷截到 99（中文章号只生成两位）
+_BOOKS = [
+    ('创', 50), ('出', 40), ('利', 27), ('申', 34), ('撒上', 31), ('王上', 22),
+    ('诗', 99), ('箴', 31), ('歌', 8), ('赛', 66), ('耶', 52), ('结', 48), ('但', 12),
+    ('太', 28), ('可', 16), ('路', 24), ('约', 21), ('徒', 28), ('罗', 16),
+    ('林前', 16), ('林后', 13), ('加', 6), ('弗', 6), ('腓', 4), ('西', 4),
+    ('帖前', 5), ('提后', 4), ('来', 13), ('彼前', 5), ('彼后', 3), ('约壹', 5), ('启', 22),
+]
+
+_WORDS = (
+    '神 基督 那灵 召会 生命 祷告 恩典 荣耀 国度 身体 新妇 经历 享受 彰显 建造 '
+    '信徒 圣徒 儿子 名分 永远 经纶 心意 异象 时代 得胜者 分赐 变化 模成 应用 '
+    '十字架 复活 升天 交通 话语 真理 见证 事奉 职事 供应 丰富 元素 同在 成全 '
+    '我们 必须 乃是 借着 为着 使 成为 进入 活出 认识 接受 吃喝 呼吸 联结 跟随'
+).split()
+
+_CN_DIGITS = '一二三四五六七八九'
+_LEVEL1 = '壹贰叁肆伍陆柒捌玖拾'
+_LEVEL2 = '一二三四五六七八九十'
+_DAYS = '一二三四五六'
+
+
+def cn_number(n: int) -> str:
+    """1~99 的中文数字（篇号 / 周号用）：十一、二十、三十五。"""
+    tens, ones = divmod(n, 10)
+    if tens == 0:
+        return _CN_DIGITS[ones - 1]
+    head = '' if tens == 1 else _CN_DIGITS[tens - 1]
+    return head + '十' + (_CN_DIGITS[ones - 1] if ones else '')
+
+
+def cn_chapter(n: int) -> str:
+    """经文出处里的中文章号：十、十四、二十、二四（与纲目原文一致，二位数不写"十"）。"""
+    if n <= 20 or n % 10 == 0:
+        return cn_number(n)
+    tens, ones = divmod(n, 10)
+    return _CN_DIGITS[tens - 1] + _CN_DIGITS[ones - 1]
+
+
+class Synth:
+    """确定性的合成文本生成器。"""
+
+    def __init__(self, seed: int, ref_density: float = 1.0):
+        self.rng = random.Random(seed)
+        self.ref_density = ref_density
+
+    def ref(self):
+        """随机经文出处，返回 (中文出处, 经节行前缀)，如 ('弗一4~5', '弗1:4')。"""
+        book, chapters = self.rng.choice(_BOOKS)
+        ch = self.rng.randint(1, chapters)
+        v = self.rng.randint(1, 30)
+        text = f"{book}{cn_chapter(ch)}{v}"
+        if self.rng.random() < 0.3:
+            text += f"~{v + self.rng.randint(1, 4)}"
+        return text, f"{book}{ch}:{v}"
+
+    def refs(self, lo: int, hi: int) -> str:
+        return '，'.join(self.ref()[0] for _ in range(self.rng.randint(lo, hi)))
+
+    def phrase(self, lo: int, hi: int) -> str:
+        """lo~hi 个词组成的短句（不含标点）。"""
+        return ''.join(self.rng.choice(_WORDS) for _ in range(self.rng.randint(lo, hi)))
+
+    def paragraph(self, lo: int = 80, hi: int = 220) -> str:
+        """一段正文，按 --ref-density 在句中插入（出处）。"""
+        target = self.rng.randint(lo, hi)
+        parts = []
+        size = 0
+        while size < target:
+            sentence = self.phrase(4, 12)
+            # 真实听抄 / 晨兴约每 120 字一处出处
+            if self.rng.random() < 0.35 * self.ref_density:
+                sentence += f"（{self.ref()[0]}）"
+            sentence += self.rng.choice('，，。；')
+            parts.append(sentence)
+            size += len(sentence)
+        return ''.join(parts).rstrip('，；') + '。'
+
+    def verse_line(self) -> str:
+        """纲目经节行：'弗1:4<TAB>经文'（匹配 ImprovedParser.VERSE_PATTERN）。"""
+        return f"{self.ref()[1]}\t{self.paragraph(30, 70)}"
+
+    def outline_title(self) -> str:
+        title = self.phrase(6, 14)
+        n_refs = max(1, round(self.rng.randint(1, 3) * self.ref_density))
+        return f"{title}─{self.refs(n_refs, n_refs)}。"
+
+
+def build_training(chapters: int, size: float, seed: int, ref_density: float) -> dict:
+    """生成一个训练的内容模型（各输出格式共用同一份内容）。"""
+    syn = Synth(seed, ref_density)
+    rng = syn.rng
+    n = lambda base: max(1, int(round(base * size)))  # noqa: E731
+
+    def make_nodes(rank, markers, count):
+        nodes = []
+        for i in range(count):
+            node = {
+                'rank': rank,
+                'marker': markers[i],
+                'title': syn.outline_title(),
+                'verses': [syn.verse_line() for _ in range(rng.randint(1, 3))],
+                'listen': [syn.paragraph() for _ in range(n(2))],
+                'children': [],
+            }
+            if rank == 1:
+                node['children'] = make_nodes(2, _LEVEL2, rng.randint(2, 4))
+            elif rank == 2:
+                node['children'] = make_nodes(3, [str(k) for k in range(1, 10)], rng.randint(0, 3))
+            elif rank == 3 and rng.random() < 0.3:
+                node['children'] = make_nodes(4, 'abcdefgh', rng.randint(1, 3))
+            nodes.append(node)
+        return nodes
+
+    training = {
+        'title': '二〇二五年秋季训练',
+        'subtitle': syn.phrase(6, 10),
+        'mottos': [syn.phrase(8, 16) + '。' for _ in range(4)],
+        'chapters': [],
+    }
+    for num in range(1, chapters + 1):
+        outline = make_nodes(1, _LEVEL1, rng.randint(3, 5))
+        training['chapters'].append({
+            'number': num,
+            'cn': cn_number(num),
+            'title': syn.phrase(4, 8),
+            'scripture': syn.refs(2, 4),
+            'hymn': rng.randint(1, 1100),
+            'outline': outline,
+            'listen_pre': [syn.paragraph() for _ in range(2)],
+            'ministry': [syn.paragraph(150, 300) for _ in range(n(3))],
+            'days': [{
+                'outline': outline[d % len(outline)],
+                'feeding_verses': [f"{syn.ref()[0]}　{syn.paragraph(30, 70)}" for _ in range(rng.randint(2, 4))],
+                'feeding': [syn.paragraph() for _ in range(n(4))],
+                'reading': [syn.paragraph() for _ in range(n(5))],
+                'ref': f"参读：{syn.phrase(3, 5)}生命读经，第{cn_number(rng.randint(1, 60))}篇。",
+            } for d in range(6)],
+            'hymn_lines': [syn.phrase(4, 7) + '，' + syn.phrase(4, 7) + '；' for _ in range(n(8))],
+        })
+    return training
+
+
+def walk_outline(nodes):
+    """深度优先遍历大纲节点。"""
+    for node in nodes:
+        yield node
+        yield from walk_outline(node['children'])
+
+
+def _node_line(node) -> str:
+    return f"{node['marker']}　{node['title']}"
+
+
+# ── .docx 写出 ────────────────────────────────────────────────────────────────
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+_DOC_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+
+def fall_style(kind: str) -> str:
+    """STYLE_MAP 中某类段落的秋季样式名（字典里秋季样式排在前面）。"""
+    return next(name for name, k in ImprovedParser.STYLE_MAP.items() if k == kind)
+
+
+def write_docx(path: str, paragraphs):
+    """写出最小 .docx；paragraphs 为 [(样式名或 None, 文本)]，文本中的 \\t 写成 w:tab。"""
+    style_ids = {}
+    body = []
+    for style, text in paragraphs:
+        ppr = ''
+        if style:
+            sid = style_ids.setdefault(style, f'S{len(style_ids) + 1}')
+            ppr = f'<w:pPr><w:pStyle w:val="{sid}"/></w:pPr>'
+        runs = '<w:tab/>'.join(f'<w:t xml:space="preserve">{escape(part)}</w:t>'
+                               for part in text.split('\t'))
+        body.append(f'<w:p>{ppr}<w:r>{runs}</w:r></w:p>')
+
+    styles = ''.join(
+        f'<w:style w:type="paragraph" w:styleId="{sid}"><w:name w:val={quoteattr(name)}/></w:style>'
+        for name, sid in style_ids.items()
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('word/_rels/document.xml.rels', _DOC_RELS)
+        zf.writestr('word/styles.xml',
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<w:styles xmlns:w="{_W_NS}">'
+                    f'<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+                    f'{styles}</w:styles>')
+        zf.writestr('word/document.xml',
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<w:document xmlns:w="{_W_NS}"><w:body>{"".join(body)}</w:body></w:document>')
+    return len(paragraphs)
+
+
+def outline_doc_paragraphs(training):
+    """经文.docx：标题、总题、标语、目录，正文每篇以单独的"第X篇"开始。"""
+    paras = [(None, training['title']), (None, '总题：' + training['subtitle']), (None, ''), (None, '标　语')]
+    paras += [(None, m) for m in training['mottos']]
+    paras += [(None, ''), (None, '目　录')]
+    paras += [(None, f"第{ch['cn']}篇　{ch['title']}") for ch in training['chapters']]
+    for ch in training['chapters']:
+        paras += [(None, f"第{ch['cn']}篇"), (None, ch['title']),
+                  (None, f"EM 诗歌：{ch['hymn']}"), (None, '读经：' + ch['scripture'])]
+        for node in walk_outline(ch['outline']):
+            paras.append((None, _node_line(node)))
+            paras += [(None, v) for v in node['verses']]
+        paras.append((None, '职事信息摘录：'))
+        paras += [(None, p) for p in ch['ministry']]
+    return paras
+
+
+def listen_doc_paragraphs(training):
+    """听抄.docx：篇题 / 大点 / 中点 / 小点 / 小a点 / 正文都用 STYLE_MAP 的秋季样式。"""
+    content = fall_style('content')
+    level_styles = {r: fall_style(f'section_level{r}') for r in range(1, 5)}
+    paras = []
+    for ch in training['chapters']:
+        paras.append((fall_style('chapter_title'), f"第{ch['cn']}篇　{ch['title']}"))
+        paras.append((content, '读经：' + ch['scripture']))
+        paras += [(content, p) for p in ch['listen_pre']]
+        for node in walk_outline(ch['outline']):
+            paras.append((level_styles[node['rank']], _node_line(node)))
+            paras += [(content, p) for p in node['listen']]
+    return paras
+
+
+def morning_doc_paragraphs(training):
+    """晨兴.docx（秋季文本格式）：第X周 • 纲目 → 周一~周六纲目 → 诗歌 → 每天晨兴喂养 / 信息选读 / 参读。
+
+    ImprovedParser 的晨兴周号只识别到"第九周"，超过九篇时其余各篇不生成晨兴。
+    """
+    content = fall_style('content')
+    paras = [(None, '目　录')]
+    for ch in training['chapters'][:9]:
+        week = f"第{ch['cn']}周"
+        paras.append((None, f"{week} • 纲目"))
+        for d, day in enumerate(ch['days']):
+            paras.append((None, f"周{_DAYS[d]}"))
+            paras += [(None, _node_line(node)) for node in walk_outline([day['outline']])]
+        paras.append((None, f"{week} • 诗歌"))
+        paras += [(None, line) for line in ch['hymn_lines']]
+        for d, day in enumerate(ch['days']):
+            paras += [(None, f"{week} • 周{_DAYS[d]}"), (None, '晨兴喂养')]
+            paras += [(content, v) for v in day['feeding_verses']]
+            paras += [(content, p) for p in day['feeding']]
+            paras.append((None, '信息选读'))
+            paras += [(content, p) for p in day['reading']]
+            paras.append((None, day['ref']))
+    return paras
+
+
+# ── TXT 写出 ──────────────────────────────────────────────────────────────────
+
+def txt_lines(training):
+    """txt-importer 格式：目录区（TOP-目录 之前）+ 每篇的 大纲 / 听抄 / 晨兴 三块。"""
+    lines = [training['title'], '总题：' + training['subtitle'], '标　语']
+    for ch in training['chapters']:
+        lines += [f"第{ch['number']:02d}篇　{ch['title']}", '纲目|outline|对照＼听抄＼晨兴']
+    lines += ['TOP', '　', '标　语'] + training['mottos'] + ['', 'TOP-目录']
+
+    for ch in training['chapters']:
+        header = f"第{ch['cn']}篇　{ch['title']}"
+        # 大纲（cn_outline 块）
+        nav = '晨兴-大纲|Outline|对照-听抄-目录'
+        lines += [header, nav, '读经：' + ch['scripture']]
+        lines += [_node_line(node) for node in walk_outline(ch['outline'])]
+        lines += ['职事信息摘录：'] + ch['ministry']
+        lines += ['', 'TOP-' + nav, '　', '　']
+        # 听抄（message_content 块）
+        nav = '晨兴-纲目|Outline|对照-目录'
+        lines += [header, nav, '未经讲者审阅，仅供追求参考'] + ch['listen_pre']
+        for node in walk_outline(ch['outline']):
+            lines.append(_node_line(node))
+            lines += node['listen']
+        lines += ['', 'TOP-' + nav, '　', '　']
+        # 晨兴
+        week = f"第{ch['cn']}周"
+        lines += [f"{week}　{ch['title']}", '纲目|Outline|对照-听抄-目录',
+                  '读经：' + ch['scripture'], f"诗歌：大本{ch['hymn']}首",
+                  '纲目 [1] [2] [3] [4] [5] [6]', '晨兴 [1] [2] [3] [4] [5] [6]']
+        for d, day in enumerate(ch['days']):
+            lines.append(f"周　{_DAYS[d]}")
+            lines += [_node_line(node) for node in walk_outline([day['outline']])]
+            lines += [f"周{_DAYS[d]}晨兴", '']
+        for d, day in enumerate(ch['days']):
+            lines += [f"{week}　周{_DAYS[d]}", '晨兴喂养'] + day['feeding_verses'] + day['feeding']
+            lines += ['信息选读'] + day['reading'] + [day['ref'], '今日晨兴/今日纲目/页首', '']
+        lines += [f"{week}　诗歌", ''] + ch['hymn_lines'] + ['Back', '　', '　']
+    return lines
+
+
+# ── EPUB 写出 ─────────────────────────────────────────────────────────────────
+
+def _xhtml(title: str, body) -> str:
+    return ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+            f'<title>{escape(title)}</title></head><body>{"".join(body)}</body></html>')
+
+
+def _p(cls: str, text: str) -> str:
+    return f'<p class="{cls}">{escape(text)}</p>'
+
+
+_EPUB_OUTLINE_CLASS = {1: 'calibre_text_dadian', 2: 'calibre_text_zhongdian', 3: 'calibre_text_xiaodian', 4: 'calibre'}
+
+
+def epub_files(training):
+    """epub-importer 的 Calibre 文件约定：index.html / banner.html / {N}_cv / {N}_ts / {N}_h_1~6 / {N}_h_hymn。"""
+    files = {}
+    index = [f'<h1 class="calibre_index_title1">{escape(training["title"])}</h1>',
+             _p('calibre_zongti', '总题：' + training['subtitle'])]
+    for ch in training['chapters']:
+        n = ch['number']
+        index.append(
+            f'<p class="calibre_index_chapter"><b>{escape("第" + ch["cn"] + "篇　" + ch["title"])}</b><br/>'
+            f'<a class="calibre_hyperlinks" href="{n}_cv.htm">纲目</a> '
+            f'<a class="calibre_hyperlinks" href="{n}_ts.htm">听抄</a> '
+            f'<a class="calibre_hyperlinks" href="{n}_h.htm">晨兴</a></p>'
+        )
+        title = _p('calibre_content_title', f"第{ch['cn']}篇　{ch['title']}")
+        verse = _p('calibre_text_verse', '读经：' + ch['scripture'])
+
+        cv = [title, verse]
+        for node in walk_outline(ch['outline']):
+            cv.append(_p(_EPUB_OUTLINE_CLASS[node['rank']], _node_line(node)))
+            cv += [_p('calibre_verse', v.replace('\t', '　')) for v in node['verses']]
+        files[f'{n}_cv.htm'] = _xhtml(ch['title'], cv)
+
+        ts = [title, verse] + [_p('calibre_text_abs', p) for p in ch['listen_pre']]
+        for node in walk_outline(ch['outline']):
+            ts.append(_p('calibre_text_abs_dadian', _node_line(node)))
+            ts += [_p('calibre_text_abs', p) for p in node['listen']]
+        files[f'{n}_ts.htm'] = _xhtml(ch['title'], ts)
+
+        for d, day in enumerate(ch['days']):
+            h = [title, _p('calibre_text_gangmu_wn', f"周　{_DAYS[d]}")]
+            h += [_p(_EPUB_OUTLINE_CLASS[node['rank']], _node_line(node)) for node in walk_outline([day['outline']])]
+            h.append(_p('calibre_text_chenxing_content_wyxd', '晨兴喂养'))
+            h += [_p('calibre_text_chenxing_verse', v) for v in day['feeding_verses']]
+            h += [_p('calibre_text_chenxing_content', p) for p in day['feeding']]
+            h.append(_p('calibre_text_chenxing_content_wyxd', '信息选读'))
+            h += [_p('calibre_text_chenxing_content', p) for p in day['reading']]
+            h.append(_p('calibre_text_chenxing_content', day['ref']))
+            files[f'{n}_h_{d + 1}.htm'] = _xhtml(ch['title'], h)
+
+        files[f'{n}_h_hymn.htm'] = _xhtml(ch['title'], [
+            _p('calibre_content_title', f"诗歌：大本{ch['hymn']}首"),
+        ] + [_p('calibre_text_hymns', line) for line in ch['hymn_lines']])
+
+    files['index.html'] = _xhtml(training['title'], index)
+    files['banner.html'] = _xhtml('标语', [_p('banner', m) for m in training['mottos']])
+    return files
+
+
+def write_epub(path: str, training) -> int:
+    files = epub_files(training)
+    names = ['index.html', 'banner.html'] + sorted(f for f in files if f not in ('index.html', 'banner.html'))
+    manifest = ''.join(f'<item id="f{i}" href="{name}" media-type="application/xhtml+xml"/>'
+                       for i, name in enumerate(names))
+    spine = ''.join(f'<itemref idref="f{i}"/>' for i in range(len(names)))
+    opf = ('<?xml version="1.0" encoding="utf-8"?>'
+           '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="uid">'
+           '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+           f'<dc:title>{escape(training["title"])}</dc:title><dc:language>zh</dc:language>'
+           '<dc:identifier id="uid">benchmark</dc:identifier></metadata>'
+           f'<manifest>{manifest}</manifest><spine>{spine}</spine></package>')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip')
+        zf.writestr('META-INF/container.xml',
+                    '<?xml version="1.0"?>'
+                    '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                    '<rootfiles><rootfile full-path="content.opf" media-type="application/oebps-package+xml"/>'
+                    '</rootfiles></container>')
+        zf.writestr('content.opf', opf, zipfile.ZIP_DEFLATED)
+        for name in names:
+            zf.writestr(name, files[name], zipfile.ZIP_DEFLATED)
+    return len(names)
+
+
+def generate_inputs(work_dir: str, args) -> dict:
+    """在 <work>/resource/<批次> 下生成全部合成输入，返回输入规模统计。"""
+    batch_dir = os.path.join(work_dir, 'resource', BATCH_NAME)
+    if os.path.isdir(batch_dir):
+        shutil.rmtree(batch_dir)
+    os.makedirs(batch_dir)
+
+    training = build_training(args.chapters, args.size, args.seed, args.ref_density)
+    stats = {
+        'chapters': len(training['chapters']),
+        'outline_points': sum(1 for ch in training['chapters'] for _ in walk_outline(ch['outline'])),
+        'paragraphs': {},
+        'bytes': {},
+    }
+    docs = (('经文.docx', outline_doc_paragraphs), ('听抄.docx', listen_doc_paragraphs),
+            ('晨兴.docx', morning_doc_paragraphs))
+    for name, render in docs:
+        stats['paragraphs'][name] = write_docx(os.path.join(batch_dir, name), render(training))
+
+    txt_name = f'{BATCH_YEAR}-3-benchmark.txt'
+    with open(os.path.join(batch_dir, txt_name), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(txt_lines(training)) + '\n')
+    stats['paragraphs']['epub'] = write_epub(os.path.join(batch_dir, 'benchmark.epub'), training)
+
+    for name in sorted(os.listdir(batch_dir)):
+        stats['bytes'][name] = os.path.getsize(os.path.join(batch_dir, name))
+    return {'batch_dir': batch_dir, 'txt': os.path.join(batch_dir, txt_name),
+            'epub': os.path.join(batch_dir, 'benchmark.epub'), 'stats': stats}
+
+
+# ── 计时 ──────────────────────────────────────────────────────────────────────
+
+@contextlib.contextmanager
+def _quiet(enabled: bool):
+    """屏蔽被测函数的进度输出（print 本身会影响计时）。"""
+    if not enabled:
+        yield
+        return
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        yield
+
+
+def seed_history(output_dir: str, count: int):
+    """把本次导出的训练复制成 count 个历史训练（每年 2 个），返回训练列表。"""
+    src = os.path.join(output_dir, BATCH_PATH)
+    with open(os.path.join(src, 'training.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    chapter_count = len(data.get('chapters', []))
+    trainings = [{'path': BATCH_PATH, 'title': '秋季训练', 'year': BATCH_YEAR,
+                  'season': BATCH_SEASON, 'chapter_count': chapter_count,
+                  'version': data.get('version', '')}]
+    for i in range(count):
+        year, month = 1997 + i // 2, 1 + i % 2
+        path = f'{year}-{month:02d}'
+        dst = os.path.join(output_dir, path)
+        if not os.path.isdir(dst):
+            shutil.copytree(src, dst)
+        # 与 main.py 合并历史训练时相同：版本取自各自的 training.json
+        with open(os.path.join(dst, 'training.json'), encoding='utf-8') as f:
+            version = json.load(f).get('version', '')
+        trainings.append({'path': path, 'title': f'{year}年第{month}次训练', 'year': year,
+                          'season': '', 'chapter_count': chapter_count, 'version': version,
+                          'is_collection': True})
+    return trainings
+
+
+def run_stages(inputs: dict, work_dir: str, args) -> dict:
+    """按顺序跑一遍各阶段，返回 {阶段: span}（span 为 BuildProfiler 的计时区间）。"""
+    from main import generate_resource_packs  # main 导入较重，仅在计时时加载
+
+    output_dir = os.path.join(work_dir, 'output')
+    training_dir = os.path.join(output_dir, BATCH_PATH)
+    batch_dir = inputs['batch_dir']
+    profiler = BuildProfiler()
+    spans = {}
+
+    def timed(name, fn, *a, **kw):
+        with _quiet(not args.verbose), profiler.span(name) as span:
+            value = fn(*a, **kw)
+        spans[name] = span
+        return value
+
+    training_data = timed(
+        'parse_training_docs_improved', parse_training_docs_improved,
+        os.path.join(batch_dir, '经文.docx'), os.path.join(batch_dir, '听抄.docx'),
+        os.path.join(batch_dir, '晨兴.docx'),
+        year=BATCH_YEAR, season=BATCH_SEASON, output_dir=training_dir, bible_dict=BibleDict(),
+    )
+    timed('export_training_json', export_training_json, training_data, training_dir)
+    trainings = seed_history(output_dir, args.history)
+    timed('generate_search_index_from_json', generate_search_index_from_json, output_dir, trainings)
+    timed('generate_resource_packs', generate_resource_packs, output_dir, trainings,
+          workers=args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+
+    if args.node:
+        from src.node_worker import NodeWorkerError, get_node_worker
+        worker = get_node_worker()
+        jobs = (('node:build-batch-txt', {'txt': inputs['txt']}),
+                ('node:build-batch-epub', {'epub': inputs['epub']}))
+        for name, params in jobs:
+            method = name.split(':', 1)[1]
+            params.update({'folder': batch_dir, 'output': os.path.join(work_dir, 'node-output', method),
+                           'year': str(BATCH_YEAR), 'season': BATCH_SEASON})
+            try:
+                timed(name, worker.call, method, params)
+            except NodeWorkerError as e:
+                # 如 jsdom 未安装时 EPUB 不可用
+                print(f"⚠ {name} 跳过: {e}")
+    return spans
+
+
+def summarize(runs) -> dict:
+    """多次运行的同名阶段 → {wall, cpu, peak_rss_mb, rss_growth_mb, runs}，wall/cpu 取中位数。"""
+    stages = {}
+    for spans in runs:
+        for name, span in spans.items():
+            stages.setdefault(name, []).append(span)
+    return {
+        name: {
+            'wall': round(statistics.median(s.wall for s in spans), 4),
+            'cpu': round(statistics.median(s.cpu for s in spans), 4),
+            'peak_rss_mb': max((s.peak_rss_mb for s in spans if s.peak_rss_mb is not None), default=None),
+            'rss_growth_mb': max((s.rss_growth_mb for s in spans if s.rss_growth_mb is not None), default=None),
+            'runs': [round(s.wall, 4) for s in spans],
+        }
+        for name, spans in stages.items()
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list:
+    """打印与基线的对比表，返回退化的阶段名列表。"""
+    if baseline.get('params') != result['params']:
+        print("⚠ 基线的合成参数与本次不同，对比仅供参考")
+        print(f"  基线: {baseline.get('params')}")
+    regressions = []
+    print(f"\n{'阶段':<34}{'基线(s)':>8}{'本次(s)':>8}{'变化':>8}")
+    for name, cur in result['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base or not base.get('wall'):
+            print(f"{name:<36}{'-':>10}{cur['wall']:>10.3f}{'新增':>8}")
+            continue
+        ratio = cur['wall'] / base['wall'] - 1
+        mark = ''
+        if ratio > threshold:
+            mark = ' ✗'
+            regressions.append(name)
+        elif ratio < -threshold:
+            mark = ' ✓'
+        print(f"{name:<36}{base['wall']:>10.3f}{cur['wall']:>10.3f}{ratio:>+10.1%}{mark}")
+    return regressions
+
+
+def write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='合成训练文档的解析 / 生成性能基准')
+    parser.add_argument('--chapters', type=int, default=8, help='篇数（默认 8，晨兴最多九周）')
+    parser.add_argument('--size', type=float, default=1.0, help='正文段落数倍率（默认 1.0）')
+    parser.add_argument('--ref-density', type=float, default=1.0, help='经文出处密度倍率（默认 1.0）')
+    parser.add_argument('--history', type=int, default=20, help='用于索引 / 打包的历史训练数（默认 20）')
+    parser.add_argument('--repeat', type=int, default=3, help='每个阶段重复次数，取中位数（默认 3）')
+    parser.add_argument('--seed', type=int, default=1, help='合成内容的随机种子')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='资源包压缩进程数（默认 1；0 = 全部 CPU 核）')
+    parser.add_argument('--node', action='store_true', help='同时计时 Node 端 TXT / EPUB 批次解析')
+    parser.add_argument('--work-dir', default=BENCH_DIR, help='合成数据与输出目录（默认 .cache/benchmark）')
+    parser.add_argument('--out', default=None, help='结果 JSON 路径（默认 <work-dir>/result.json）')
+    parser.add_argument('--baseline', default=None, help='基线 JSON 路径（默认 <work-dir>/baseline.json）')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果另存为基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定退化的相对阈值（默认 0.2 = 慢 20%%）')
+    parser.add_argument('--verbose', '-v', action='store_true', help='显示被测函数的输出')
+    args = parser.parse_args(argv)
+    if not 1 <= args.chapters <= 20:
+        parser.error('--chapters 需在 1~20 之间')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = os.path.abspath(args.work_dir)
+    out_path = args.out or os.path.join(work_dir, RESULT_FILE)
+    baseline_path = args.baseline or os.path.join(work_dir, BASELINE_FILE)
+
+    print(f"生成合成输入（{args.chapters} 篇, size={args.size}, seed={args.seed}）...")
+    inputs = generate_inputs(work_dir, args)
+    stats = inputs['stats']
+    total_kb = sum(stats['bytes'].values()) / 1024
+    print(f"✓ {stats['outline_points']} 个纲目点, {total_kb:.0f} KB 输入 → {inputs['batch_dir']}")
+
+    runs = []
+    for i in range(args.repeat):
+        output_dir = os.path.join(work_dir, 'output')
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        spans = run_stages(inputs, work_dir, args)
+        runs.append(spans)
+        print(f"  第 {i + 1}/{args.repeat} 轮: " +
+              ', '.join(f"{name} {span.wall:.2f}s" for name, span in spans.items()))
+
+    result = {
+        'version': RESULT_VERSION,
+        'started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {'chapters': args.chapters, 'size': args.size, 'ref_density': args.ref_density,
+                   'history': args.history, 'seed': args.seed},
+        'inputs': stats,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': summarize(runs),
+    }
+    write_json(out_path, result)
+    print(f"✓ 基准结果已写入: {out_path}")
+
+    if args.save_baseline:
+        write_json(baseline_path, result)
+        print(f"✓ 已保存为基线: {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"ℹ 无基线文件（{baseline_path}），用 --save-baseline 保存本次结果作为基线")
+        return 0
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} 个阶段比基线慢 {args.threshold:.0%} 以上: {', '.join(regressions)}")
+        return 1
+    print(f"\n✓ 无退化（阈值 {args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,6 +14,7 @@
  *   5. 输出元数据 JSON 到 stdout（供 Python 读取）
  *
  * 与 build-batch-txt.js 同架构：require 前端 JS 模块，避免 Python 重写导致的逻辑分叉。
+ * 也可作为模块使用：require('./build-batch-epub').run(opts)（见 tools/node-worker.js）。
  */
 
 'use strict';
@@ -21,131 +22,10 @@
 var fs   = require('fs');
 var path = require('path');
 
-// ── 参数解析 ─────────────────────────────────────────────────────────────────
-var argv = process.argv.slice(2);
-var optEpubFile  = null;
-var optFolder    = null;
-var optOutput    = null;
-var optYear      = null;
-var optSeason    = null;
-
-for (var i = 0; i < argv.length; i++) {
-  if (argv[i] === '--epub'   && i + 1 < argv.length) { optEpubFile = argv[++i]; continue; }
-  if (argv[i] === '--folder' && i + 1 < argv.length) { optFolder   = argv[++i]; continue; }
-  if (argv[i] === '--output' && i + 1 < argv.length) { optOutput   = argv[++i]; continue; }
-  if (argv[i] === '--year'   && i + 1 < argv.length) { optYear     = argv[++i]; continue; }
-  if (argv[i] === '--season' && i + 1 < argv.length) { optSeason   = argv[++i]; continue; }
-}
-
-if (!optEpubFile || !optFolder || !optOutput) {
-  console.error('用法: node tools/build-batch-epub.js --epub <epub_file> --folder <batch_folder> --output <output_dir>');
-  process.exit(1);
-}
-
-if (!fs.existsSync(optEpubFile)) {
-  console.error('EPUB 文件不存在: ' + optEpubFile);
-  process.exit(1);
-}
-
-// ── 设置全局环境（模拟浏览器）────────────────────────────────────────────────
-var ROOT     = path.resolve(__dirname, '..');
-var JSZIP_JS = path.join(ROOT, 'node_modules', 'jszip', 'dist', 'jszip.min.js');
-var VENDOR_JSZIP = path.join(ROOT, 'src', 'static', 'js', 'vendor', 'jszip.min.js');
-var EPUB_IMP = path.join(ROOT, 'src', 'static', 'js', 'epub-importer.js');
-var REF_DET  = path.join(ROOT, 'src', 'static', 'js', 'ref-detector.js');
-var ENRICHER = path.join(ROOT, 'src', 'static', 'js', 'training-enricher.js');
-
-// jsdom 提供 DOMParser 和 document
-var jsdom = require('jsdom');
-var dom   = new jsdom.JSDOM('<!DOCTYPE html><html><body></body></html>');
-
-global.window = dom.window;
-global.document = dom.window.document;
-global.DOMParser = dom.window.DOMParser;
-global.XMLSerializer = dom.window.XMLSerializer;
-global.Text = dom.window.Text;
-global.Element = dom.window.Element;
-global.Node = dom.window.Node;
-global.NodeList = dom.window.NodeList;
-global.HTMLElement = dom.window.HTMLElement;
-global.HTMLParagraphElement = dom.window.HTMLParagraphElement;
-global.XMLHttpRequest = dom.window.XMLHttpRequest;
-
-// JSZip：npm 包直接 require，手动注册到 window（epub-importer.js 通过 win.JSZip 使用）
-global.window.JSZip = require('jszip');
-
-// localforage 模拟（Node.js 不需要持久化）
-global.localforage = {
-  getItem:    function() { return Promise.resolve(null); },
-  setItem:    function(k, v) { return Promise.resolve(v); },
-  removeItem: function() { return Promise.resolve(); }
-};
-
-// require epub-importer.js
-require(EPUB_IMP);
-require(REF_DET);
-require(ENRICHER);
-
-var _epub = global.window.CXEpubImport;
-var _enr  = global.window.CXEnricher;
-
-if (!_epub || !_epub.parseAndSave) {
-  console.error('错误: epub-importer.js 未正确暴露 CXEpubImport.parseAndSave');
-  process.exit(1);
-}
-if (!_enr || !_enr.enrichChapter) {
-  console.error('错误: training-enricher.js 未正确暴露 enrichChapter');
-  process.exit(1);
-}
+var env = require('./cx-env');
 
 // ── 工具函数 ─────────────────────────────────────────────────────────────────
 
-function getNowVersion() {
-  var d = new Date();
-  function pad2(n) { return n < 10 ? '0' + n : '' + n; }
-  return '' + d.getFullYear() + pad2(d.getMonth() + 1) + pad2(d.getDate())
-    + pad2(d.getHours()) + pad2(d.getMinutes()) + pad2(d.getSeconds());
-}
-
-/** 规范化出处缩写（与 Python generator._normalize_source_abbr 一致） */
-function normalizeSourceAbbr(text) {
-  return text.replace(/李常受文集/g, 'CWWL').replace(/生命读经/g, 'L-S');
-}
-
-/** 从文件夹名提取 year/season */
-function extractYearSeasonFromFolder(folderName) {
-  var m = folderName.match(/^(\d{4})-(\d{2})/);
-  if (m) {
-    return { year: parseInt(m[1], 10), month: parseInt(m[2], 10) };
-  }
-  return null;
-}
-
-/** 复制标语诗歌图片 */
-function copyMottoSongImages(srcFolder, dstOutputDir) {
-  var images = [];
-  var entries = fs.readdirSync(srcFolder);
-  var songFiles = entries
-    .filter(function(f) {
-      return /^标语诗歌/.test(f) && /\.(png|jpe?g|webp|gif)$/i.test(f);
-    })
-    .sort();
-
-  if (!songFiles.length) return images;
-
-  var imgDir = path.join(dstOutputDir, 'images');
-  fs.mkdirSync(imgDir, { recursive: true });
-
-  songFiles.forEach(function(fname) {
-    var src = path.join(srcFolder, fname);
-    var dst = path.join(imgDir, fname);
-    fs.copyFileSync(src, dst);
-    images.push('images/' + fname);
-  });
-
-  return images;
-}
-
 /** 从 EPUB ZIP 中提取诗歌图片到 output/images/，同时填充 hymn_images */
 function extractHymnImages(epubBuffer, chapters, outputDir) {
   var JSZip = require('jszip');
@@ -206,7 +86,33 @@ function extractHymnImages(epubBuffer, chapters, outputDir) {
 }
 
 // ── 主逻辑 ────────────────────────────────────────────────────────────────────
-function main() {
+/**
+ * 从 EPUB 生成一个批次的 training.json。
+ *
+ * @param {{epub: string, folder: string, output: string, year?: string, season?: string}} opts
+ * @returns {Promise<object>} 元数据（name/year/season/title/chapter_count/images/version/source）
+ */
+function run(opts) {
+  var optEpubFile = opts.epub;
+  var optFolder   = opts.folder;
+  var optOutput   = opts.output;
+  var optYear     = opts.year || null;
+  var optSeason   = opts.season || null;
+
+  if (!fs.existsSync(optEpubFile)) {
+    return Promise.reject(new Error('EPUB 文件不存在: ' + optEpubFile));
+  }
+
+  var _env  = env.setup({ dom: true });
+  var _epub = _env.epub;
+  var _enr  = _env.enr;
+  if (!_epub || !_epub.parseAndSave) {
+    return Promise.reject(new Error('错误: epub-importer.js 未正确暴露 CXEpubImport.parseAndSave（需要 jsdom）'));
+  }
+  if (!_enr || !_enr.enrichChapter) {
+    return Promise.reject(new Error('错误: training-enricher.js 未正确暴露 enrichChapter'));
+  }
+
   console.error('[EPUB] 使用文件: ' + path.basename(optEpubFile));
 
   // 读取 EPUB 为 ArrayBuffer
@@ -217,11 +123,11 @@ function main() {
   console.error('[EPUB] 解析中...');
 
   // 调用 epub-importer.js 的 parseFromBuffer（共用浏览器端同一份解析逻辑）
-  _epub.parseFromBuffer(arrayBuf, fileName, function(cur, total, msg) {
+  return _epub.parseFromBuffer(arrayBuf, fileName, function(cur, total, msg) {
     console.error('[EPUB] ' + msg + ' (' + cur + '/' + total + ')');
   }).then(function(td) {
     // 从文件夹名补充 year/season
-    var folderInfo = extractYearSeasonFromFolder(path.basename(optFolder));
+    var folderInfo = env.extractYearSeasonFromFolder(path.basename(optFolder));
     var finalYear   = optYear || td.year || (folderInfo && folderInfo.year) || 2025;
     var finalSeason = optSeason || td.season || '';
 
@@ -232,11 +138,11 @@ function main() {
     (td.chapters || []).forEach(_enr.enrichChapter);
 
     // 添加版本
-    td.version = getNowVersion();
+    td.version = env.getNowVersion();
 
     // ── 复制标语诗歌图片 ────────────────────────────────────────────────────
     fs.mkdirSync(optOutput, { recursive: true });
-    var mottoImages = copyMottoSongImages(optFolder, optOutput);
+    var mottoImages = env.copyMottoSongImages(optFolder, optOutput);
     if (mottoImages.length) {
       td.motto_song_image  = mottoImages[0];
       td.motto_song_images = mottoImages;
@@ -251,12 +157,12 @@ function main() {
 
     // ── 写出 training.json ──────────────────────────────────────────────────
     var jsonPath = path.join(optOutput, 'training.json');
-    var jsonText = normalizeSourceAbbr(JSON.stringify(td, null, 2));
+    var jsonText = env.normalizeSourceAbbr(JSON.stringify(td, null, 2));
     fs.writeFileSync(jsonPath, jsonText, 'utf8');
     console.error('[EPUB] training.json 已写出 (' + (td.chapters || []).length + ' 篇章)');
 
-    // ── 输出元数据 JSON 到 stdout（供 Python 读取）───────────────────────────
-    var meta = {
+    // ── 元数据（CLI 模式输出到 stdout 供 Python 读取）─────────────────────────
+    return {
       name:          path.basename(optFolder),
       year:          finalYear,
       season:        finalSeason,
@@ -267,13 +173,37 @@ function main() {
       version:       td.version,
       source:        'epub'
     };
+  }, function(err) {
+    var wrapped = new Error('[EPUB] 解析失败: ' + (err.message || err));
+    wrapped.stack = err.stack || wrapped.stack;
+    throw wrapped;
+  });
+}
 
+module.exports = { run: run };
+
+// ── 命令行入口 ────────────────────────────────────────────────────────────────
+if (require.main === module) {
+  var argv = process.argv.slice(2);
+  var cli = {};
+  for (var i = 0; i < argv.length; i++) {
+    if (argv[i] === '--epub'   && i + 1 < argv.length) { cli.epub   = argv[++i]; continue; }
+    if (argv[i] === '--folder' && i + 1 < argv.length) { cli.folder = argv[++i]; continue; }
+    if (argv[i] === '--output' && i + 1 < argv.length) { cli.output = argv[++i]; continue; }
+    if (argv[i] === '--year'   && i + 1 < argv.length) { cli.year   = argv[++i]; continue; }
+    if (argv[i] === '--season' && i + 1 < argv.length) { cli.season = argv[++i]; continue; }
+  }
+
+  if (!cli.epub || !cli.folder || !cli.output) {
+    console.error('用法: node tools/build-batch-epub.js --epub <epub_file> --folder <batch_folder> --output <output_dir>');
+    process.exit(1);
+  }
+
+  run(cli).then(function(meta) {
     process.stdout.write(JSON.stringify(meta));
   }).catch(function(err) {
-    console.error('[EPUB] 解析失败: ' + (err.message || err));
+    console.error(err.message || err);
     console.error(err.stack || '');
     process.exit(1);
   });
 }
-
-main();
@@ -6,91 +6,72 @@
  * 使用 txt-importer.js + ref-detector.js 解析历史合辑 TXT 文件，
  * 为每个训练生成 output/{year}-{seq:02d}/training.json。
  *
+ * 增量构建：output/.trainings-manifest.json 记录各源文件哈希，只重新生成输入有变化的
+ * 合辑/年份单元；变化的年份目录由 worker_threads 并行处理。
+ *
  * 用法:
- *   node tools/build-trainings-json.js [--year YYYY]
+ *   node tools/build-trainings-json.js [--year YYYY] [--force] [--threads N] [--exclude 2025-01,2025-04]
+ *   或 require('./build-trainings-json').run({ year: YYYY })（见 tools/node-worker.js）
  */
 
 'use strict';
 
-const fs   = require('fs');
-const path = require('path');
+const fs      = require('fs');
+const os      = require('os');
+const path    = require('path');
+const crypto  = require('crypto');
+const threads = require('worker_threads');
+
+var env = require('./cx-env');
 
-// ── 参数解析 ─────────────────────────────────────────────────────────────────
+// 年份过滤（run() 每次调用时设置）
 var yearFilter = null;
-for (var ai = 2; ai < process.argv.length; ai++) {
-  if (process.argv[ai] === '--year' && process.argv[ai + 1]) {
-    yearFilter = parseInt(process.argv[ai + 1], 10);
-    ai++;
+// 不写出的输出目录（由 main.py 批次处理生成的 YYYY-NN，run() 每次调用时设置）
+var excludeDirs = {};
+
+// ── 1/2. 加载 IIFE 模块（浏览器全局量 shim 由 cx-env 统一设置）──────────────────
+var parseSingleTraining, parseCombinedFile, isOldCombinedFormat, parseOldCombinedFile,
+    detectDetailStart, extractYearSeqFromFilename, collectInlineVerses,
+    detectTrainingBoundaries, enrichChapter;
+
+function loadModules() {
+  var _env = env.setup();
+  var _imp = _env.imp;
+  var _ref = _env.ref;
+  var _enr = _env.enr;
+
+  if (!_imp || !_imp.parseSingleTraining) {
+    throw new Error('错误: txt-importer.js 未正确暴露 parseSingleTraining');
+  }
+  if (!_ref || !_ref.expandCnRefs) {
+    throw new Error('错误: ref-detector.js 未正确暴露 expandCnRefs');
+  }
+  if (!_enr || !_enr.enrichChapter) {
+    throw new Error('错误: training-enricher.js 未正确暴露 enrichChapter');
   }
-}
 
-// ── 1. 浏览器全局量 shim（在 require IIFE 模块之前设置）──────────────────────
-global.window = {};
-global.localforage = {
-  getItem:    function() { return Promise.resolve(null); },
-  setItem:    function() { return Promise.resolve(null); },
-  removeItem: function() { return Promise.resolve(null); }
-};
-
-// ── 2. 加载 IIFE 模块 ─────────────────────────────────────────────────────────
-var ROOT        = path.resolve(__dirname, '..');
-var TXT_IMP     = path.join(ROOT, 'src', 'static', 'js', 'txt-importer.js');
-var REF_DET     = path.join(ROOT, 'src', 'static', 'js', 'ref-detector.js');
-var ENRICHER    = path.join(ROOT, 'src', 'static', 'js', 'training-enricher.js');
-
-require(TXT_IMP);
-require(REF_DET);
-require(ENRICHER);
-
-var _imp = global.window.CXLocalImport;
-var _ref = global.window.CXRef;
-var _enr = global.window.CXEnricher;
-
-if (!_imp || !_imp.parseSingleTraining) {
-  console.error('错误: txt-importer.js 未正确暴露 parseSingleTraining');
-  process.exit(1);
-}
-if (!_ref || !_ref.expandCnRefs) {
-  console.error('错误: ref-detector.js 未正确暴露 expandCnRefs');
-  process.exit(1);
-}
-if (!_enr || !_enr.enrichChapter) {
-  console.error('错误: training-enricher.js 未正确暴露 enrichChapter');
-  process.exit(1);
+  parseSingleTraining        = _imp.parseSingleTraining;
+  parseCombinedFile          = _imp.parseCombinedFile;
+  isOldCombinedFormat        = _imp.isOldCombinedFormat;
+  parseOldCombinedFile       = _imp.parseOldCombinedFile;
+  detectDetailStart          = _imp.detectDetailStart;
+  extractYearSeqFromFilename = _imp.extractYearSeqFromFilename;
+  collectInlineVerses        = _imp.collectInlineVerses;
+  detectTrainingBoundaries   = _imp.detectTrainingBoundaries;
+  enrichChapter              = _enr.enrichChapter;
 }
 
-var parseSingleTraining        = _imp.parseSingleTraining;
-var parseCombinedFile          = _imp.parseCombinedFile;
-var isOldCombinedFormat        = _imp.isOldCombinedFormat;
-var parseOldCombinedFile       = _imp.parseOldCombinedFile;
-var detectDetailStart          = _imp.detectDetailStart;
-var extractYearSeqFromFilename = _imp.extractYearSeqFromFilename;
-var collectInlineVerses        = _imp.collectInlineVerses;
-var detectTrainingBoundaries   = _imp.detectTrainingBoundaries;
-var enrichChapter              = _enr.enrichChapter;
-
 // ── 3. 路径 ───────────────────────────────────────────────────────────────────
-var RESOURCE_DIR = path.join(ROOT, 'resource', '历史合辑');
-var OUTPUT_DIR   = path.join(ROOT, 'output');
+var RESOURCE_DIR = path.join(env.ROOT, 'resource', '历史合辑');
+var OUTPUT_DIR   = path.join(env.ROOT, 'output');
 
 // ── 3b. 补充经文写出（构建时写文件）────────────────────────────────────────────
 
-/** 懒加载 bible-text.json 的 key 集合（用于过滤已有经文）。 */
-var _bibleKeys = null;
-function getBibleKeys() {
-  if (_bibleKeys !== null) return _bibleKeys;
-  var p = path.join(OUTPUT_DIR, 'data', 'bible-text.json');
-  if (!fs.existsSync(p)) { _bibleKeys = new Set(); return _bibleKeys; }
-  var data = JSON.parse(fs.readFileSync(p, 'utf8'));
-  _bibleKeys = new Set(Object.keys(data));
-  return _bibleKeys;
-}
-
 /** 写出 scriptures-data.json（仅写出 bible-text.json 中不存在的补充经文）。 */
 function writeScriptures(verseDict, year, seq) {
   var keys = Object.keys(verseDict);
   if (!keys.length) return;
-  var bk = getBibleKeys();
+  var bk = env.getBibleKeys(OUTPUT_DIR);
   var filtered = {};
   keys.forEach(function(k) { if (!bk.has(k)) filtered[k] = verseDict[k]; });
   var fkeys = Object.keys(filtered);
@@ -102,27 +83,33 @@ function writeScriptures(verseDict, year, seq) {
 }
 
 // ── 4. 富化函数（由 training-enricher.js 提供）─────────────────────────────────
-// enrichChapter = _enr.enrichChapter（已在上方赋局部变量）
+// enrichChapter = _enr.enrichChapter（loadModules() 中赋值）
 
 // ── 4b. 同年重复检测（同年第一章相同则为合辑总览文件，跳过）────────────────────
-// key: "YYYY|ch0title"，在 main() 按年分批重置，避免跨年误判
+// key: "YYYY|ch0title"，在 processYearDir() 按年分批重置，避免跨年误判
 var seenFirstChapters = {};
 
 // ── 4c. 多段文件追加 seq 分配 ──────────────────────────────────────────────────
-// 本年文件名中最大 seq 号（在 main() 按年预计算）
+// 本年文件名中最大 seq 号（在 processYearDir() 按年预计算）
 var yearMaxSeq = 0;
-// 本年已追加的额外训练段数（在 main() 按年重置）
+// 本年已追加的额外训练段数（在 processYearDir() 按年重置）
 var extraSeqCounter = 0;
 
+// ── 4d. 当前处理单元写出/删除的输出目录（用于增量清单）──────────────────────────
+var unitOutputs = {};
+var unitRemoved = {};
+
 // ── 5. 写出 training.json ─────────────────────────────────────────────────────
-function normalizeSourceAbbr(text) {
-  return text.replace(/李常受文集/g, 'CWWL').replace(/生命读经/g, 'L-S');
-}
+var normalizeSourceAbbr = env.normalizeSourceAbbr;
 
 function writeTraining(td, year, seq) {
   if (yearFilter && year !== yearFilter) return false;
   var seqStr = seq < 10 ? '0' + seq : '' + seq;
   var dirName = year + '-' + seqStr;
+  if (excludeDirs[dirName]) {
+    console.log('    [跳过] ' + dirName + ' 由当前批次生成，不覆盖');
+    return false;
+  }
   var outDir  = path.join(OUTPUT_DIR, dirName);
   fs.mkdirSync(outDir, { recursive: true });
   fs.writeFileSync(
@@ -130,6 +117,8 @@ function writeTraining(td, year, seq) {
     normalizeSourceAbbr(JSON.stringify(td, null, 2)),
     'utf8'
   );
+  unitOutputs[dirName] = true;
+  delete unitRemoved[dirName];
   return true;
 }
 
@@ -243,7 +232,8 @@ function processFile(filePath, inYearSubdir) {
         if (seqOffset === 0) {
           console.warn('  [跳过重复] ' + filename + '（前3章与已有训练重复）');
           var oldDir = path.join(OUTPUT_DIR, ys.year + '-' + seqStr);
-          if (fs.existsSync(oldDir)) {
+          unitRemoved[ys.year + '-' + seqStr] = true;
+          if (!excludeDirs[ys.year + '-' + seqStr] && fs.existsSync(oldDir)) {
             fs.rmSync(oldDir, { recursive: true, force: true });
             console.warn('  [删除旧目录] ' + ys.year + '-' + seqStr);
           }
@@ -354,28 +344,230 @@ function processFile(filePath, inYearSubdir) {
   return count;
 }
 
-// ── 8. 主函数 ─────────────────────────────────────────────────────────────────
-function main() {
-  if (!fs.existsSync(RESOURCE_DIR)) {
-    console.error('资源目录不存在: ' + RESOURCE_DIR);
-    process.exit(1);
-  }
+// ── 8. 处理单元 ───────────────────────────────────────────────────────────────
+// 增量构建以「处理单元」为粒度：根目录合辑文件整体为一个单元（_root），
+// 每个年份子目录为一个单元。同年去重 / 多段 seq 分配都只在单元内部有状态，
+// 因此年份单元之间互相独立，可以并行处理。
 
-  var total = 0;
-  var entries = fs.readdirSync(RESOURCE_DIR);
+function beginUnit() {
+  unitOutputs = {};
+  unitRemoved = {};
+}
 
-  // ── 先处理根目录合辑文件（后处理的年份子目录文件会覆盖它）────────────────
-  var rootFiles = entries
-    .filter(function(f) { return f.toLowerCase().endsWith('.txt'); })
-    .sort();
+function endUnit(count, logs) {
+  return {
+    count:   count,
+    outputs: Object.keys(unitOutputs).sort(),
+    removed: Object.keys(unitRemoved).sort(),
+    logs:    logs || []
+  };
+}
 
+/** 处理根目录合辑文件（须先于年份子目录执行，后者会覆盖同 year-seq 的输出）。 */
+function processRootFiles(rootFiles) {
+  beginUnit();
+  var total = 0;
   rootFiles.forEach(function(f) {
     var n = processFile(path.join(RESOURCE_DIR, f), false);
     if (n > 0) console.log('  [合辑] ' + f + ' → ' + n + ' 个训练');
     total += n;
   });
+  return endUnit(total);
+}
+
+/** 处理一个年份子目录。 */
+function processYearDir(yr) {
+  beginUnit();
+  // 每年重置第一章去重表（避免跨年误判）及多段追加计数
+  seenFirstChapters = {};
+  extraSeqCounter = 0;
+  var yearDir = path.join(RESOURCE_DIR, yr);
+  var txts = listTxt(yearDir);
+  // 预计算本年最大 seq（用于多段文件的追加训练序号，避免与已有文件冲突）
+  yearMaxSeq = 0;
+  txts.forEach(function(t) {
+    var ys0 = extractYearSeqFromFilename(t);
+    if (ys0 && ys0.seq > yearMaxSeq) yearMaxSeq = ys0.seq;
+  });
+
+  var yearCount = 0;
+  txts.forEach(function(t) {
+    var n = processFile(path.join(yearDir, t), true);
+    yearCount += n;
+  });
+
+  if (yearCount > 0) {
+    console.log('  [' + yr + '] ' + txts.length + ' 个文件 → ' + yearCount + ' 个训练');
+  }
+  return endUnit(yearCount);
+}
+
+function listTxt(dir) {
+  return fs.readdirSync(dir)
+    .filter(function(f) { return f.toLowerCase().endsWith('.txt'); })
+    .sort();
+}
+
+// ── 9. 增量清单 ───────────────────────────────────────────────────────────────
+// output/.trainings-manifest.json 记录每个源 TXT 的 size/mtime/hash 与每个单元的输入哈希、
+// 输出目录。size+mtime 未变的文件直接复用记录的哈希，无需读取内容。
+var MANIFEST_FILE    = path.join(OUTPUT_DIR, '.trainings-manifest.json');
+var MANIFEST_VERSION = 1;
+
+// 影响输出的共享输入：解析/富化脚本与 bible-text.json（过滤补充经文）
+var SHARED_INPUTS = [
+  path.join(env.ROOT, 'src', 'static', 'js', 'txt-importer.js'),
+  path.join(env.ROOT, 'src', 'static', 'js', 'ref-detector.js'),
+  path.join(env.ROOT, 'src', 'static', 'js', 'training-enricher.js'),
+  path.join(__dirname, 'cx-env.js'),
+  __filename,
+  path.join(OUTPUT_DIR, 'data', 'bible-text.json')
+];
+
+function loadManifest() {
+  try {
+    var m = JSON.parse(fs.readFileSync(MANIFEST_FILE, 'utf8'));
+    if (m && m.version === MANIFEST_VERSION) return m;
+  } catch (e) { /* 不存在或损坏：视为空清单 */ }
+  return { version: MANIFEST_VERSION, files: {}, units: {} };
+}
+
+function saveManifest(manifest) {
+  fs.mkdirSync(OUTPUT_DIR, { recursive: true });
+  var tmp = MANIFEST_FILE + '.tmp';
+  fs.writeFileSync(tmp, JSON.stringify(manifest), 'utf8');
+  fs.renameSync(tmp, MANIFEST_FILE);
+}
+
+/** 文件内容哈希（size+mtime 未变时复用清单记录）；文件不存在返回 ''。 */
+function fileHash(manifest, files, absPath) {
+  var key = path.relative(env.ROOT, absPath).split(path.sep).join('/');
+  var st;
+  try { st = fs.statSync(absPath); } catch (e) { return ''; }
+  var rec = manifest.files[key];
+  if (!rec || rec.size !== st.size || rec.mtimeMs !== st.mtimeMs) {
+    rec = {
+      size:    st.size,
+      mtimeMs: st.mtimeMs,
+      hash:    crypto.createHash('sha1').update(fs.readFileSync(absPath)).digest('hex')
+    };
+  }
+  files[key] = rec;
+  return rec.hash;
+}
+
+/** 单元输入哈希：共享输入哈希 + 单元内各文件名与内容哈希。 */
+function unitHash(manifest, files, sharedHash, dir, names) {
+  var h = crypto.createHash('sha1').update(sharedHash);
+  names.forEach(function(name) {
+    h.update(name + '\0' + fileHash(manifest, files, path.join(dir, name)) + '\n');
+  });
+  return h.digest('hex');
+}
+
+/** 上次记录的输出是否都还在（被同年去重删除的目录不算缺失）。 */
+function outputsPresent(unit, removedAll) {
+  return (unit.outputs || []).every(function(d) {
+    return removedAll[d] || fs.existsSync(path.join(OUTPUT_DIR, d, 'training.json'));
+  });
+}
+
+// ── 10. 并行处理年份单元 ───────────────────────────────────────────────────────
+/**
+ * 在 worker_threads 中并行处理年份目录，返回 Promise<{yr: 单元结果}>。
+ * 每个线程只加载一次模块，依次领取多个年份；线程内的 console 输出收集后随结果返回，
+ * 由调用方按年份顺序打印（常驻 worker 模式下 stdout 是协议通道，线程不能直接写）。
+ */
+function processYearsParallel(years, threadCount) {
+  return new Promise(function(resolve, reject) {
+    var results = {};
+    var next = 0;
+    var remaining = years.length;
+    var pool = [];
+    var failed = false;
+
+    function finish(err) {
+      if (failed) return;
+      if (err) failed = true;
+      pool.forEach(function(w) { w.terminate(); });
+      if (err) reject(err);
+      else resolve(results);
+    }
+
+    function feed(w) {
+      if (next < years.length) {
+        w.current = years[next++];
+        w.postMessage(w.current);
+      }
+    }
+
+    var n = Math.min(threadCount, years.length);
+    for (var i = 0; i < n; i++) {
+      (function(w) {
+        pool.push(w);
+        w.on('message', function(res) {
+          results[w.current] = res;
+          if (--remaining === 0) finish(null);
+          else feed(w);
+        });
+        w.on('error', function(err) {
+          finish(new Error('[' + w.current + '] 工作线程异常: ' + (err && err.message || err)));
+        });
+        feed(w);
+      })(new threads.Worker(__filename, {
+        workerData: { btjYearWorker: true, yearFilter: yearFilter, excludeDirs: excludeDirs }
+      }));
+    }
+  });
+}
+
+/** 年份工作线程入口：逐个处理主线程分派的年份目录并发回结果。 */
+function yearThreadMain() {
+  var logs = [];
+  ['log', 'info', 'warn', 'error'].forEach(function(level) {
+    console[level] = function() {
+      logs.push(Array.prototype.map.call(arguments, String).join(' '));
+    };
+  });
+  yearFilter = threads.workerData.yearFilter;
+  excludeDirs = threads.workerData.excludeDirs || {};
+  loadModules();
+  threads.parentPort.on('message', function(yr) {
+    logs = [];
+    var res = processYearDir(yr);
+    res.logs = logs;
+    threads.parentPort.postMessage(res);
+  });
+}
+
+// ── 11. 主函数 ────────────────────────────────────────────────────────────────
+/**
+ * 解析历史合辑并写出 training.json（增量：只重新生成输入有变化的单元）。
+ *
+ * @param {{year?: (string|number), force?: boolean, threads?: number, exclude?: string[]}} opts
+ *   year:    只写出该年份的训练
+ *   force:   忽略清单，全部重新生成
+ *   threads: 并行处理年份目录的线程数（默认 min(4, CPU 数)）
+ *   exclude: 不写出的输出目录名（YYYY-NN），即本次由批次处理生成的训练
+ * @returns {Promise<{total: number, changed: number, skipped: number, outputs: string[]|null}>}
+ *   total: 本次写出的训练数；changed/skipped: 重新生成/跳过的单元数
+ *   outputs: 当前源文件对应的全部输出目录（含跳过的单元），供调用方清理已下线的训练；
+ *            --year 时只处理了部分单元，为 null
+ */
+function run(opts) {
+  opts = opts || {};
+  yearFilter = opts.year ? parseInt(opts.year, 10) : null;
+  excludeDirs = {};
+  (opts.exclude || []).forEach(function(d) { excludeDirs[d] = true; });
+  if (!fs.existsSync(RESOURCE_DIR)) {
+    return Promise.reject(new Error('资源目录不存在: ' + RESOURCE_DIR));
+  }
+  var threadCount = Math.max(1, opts.threads || Math.min(4, os.cpus().length || 1));
 
-  // ── 再处理年份子目录（覆盖合辑的同 year-seq 输出）────────────────────────
+  var entries = fs.readdirSync(RESOURCE_DIR);
+  var rootFiles = entries
+    .filter(function(f) { return f.toLowerCase().endsWith('.txt'); })
+    .sort();
   var years = entries
     .filter(function(name) {
       var full = path.join(RESOURCE_DIR, name);
@@ -383,34 +575,131 @@ function main() {
     })
     .sort();
 
-  years.forEach(function(yr) {
-    // 每年重置第一章去重表（避免跨年误判）及多段追加计数
-    seenFirstChapters = {};
-    extraSeqCounter = 0;
-    var yearDir = path.join(RESOURCE_DIR, yr);
-    var txts = fs.readdirSync(yearDir)
-      .filter(function(f) { return f.toLowerCase().endsWith('.txt'); })
-      .sort();
-    // 预计算本年最大 seq（用于多段文件的追加训练序号，避免与已有文件冲突）
-    yearMaxSeq = 0;
-    txts.forEach(function(t) {
-      var ys0 = extractYearSeqFromFilename(t);
-      if (ys0 && ys0.seq > yearMaxSeq) yearMaxSeq = ys0.seq;
+  // ── 检查哪些单元需要重新生成 ──────────────────────────────────────────────
+  var manifest = opts.force ? { version: MANIFEST_VERSION, files: {}, units: {} } : loadManifest();
+  var files = {};
+  var sharedHash = crypto.createHash('sha1');
+  SHARED_INPUTS.forEach(function(p) { sharedHash.update(fileHash(manifest, files, p) + '\n'); });
+  // 排除列表变化（批次增删）时全部单元重新生成，被释放的目录才会重新写出
+  sharedHash.update('exclude\0' + Object.keys(excludeDirs).sort().join(',') + '\n');
+  sharedHash = sharedHash.digest('hex');
+
+  var removedAll = {};
+  Object.keys(manifest.units).forEach(function(u) {
+    (manifest.units[u].removed || []).forEach(function(d) { removedAll[d] = true; });
+  });
+  function isStale(unitKey, hash) {
+    var unit = manifest.units[unitKey];
+    return !unit || unit.hash !== hash || !outputsPresent(unit, removedAll);
+  }
+
+  var rootHash = unitHash(manifest, files, sharedHash, RESOURCE_DIR, rootFiles);
+  var rootStale = isStale('_root', rootHash);
+
+  // --year：只看可能产出该年份的年份目录（目录名或文件名前缀为该年）
+  if (yearFilter) {
+    var yfs = String(yearFilter);
+    years = years.filter(function(yr) {
+      return yr === yfs || listTxt(path.join(RESOURCE_DIR, yr)).some(function(f) {
+        return f.indexOf(yfs) === 0;
+      });
     });
+  }
+  var yearHashes = {};
+  var staleYears = years.filter(function(yr) {
+    var dir = path.join(RESOURCE_DIR, yr);
+    yearHashes[yr] = unitHash(manifest, files, sharedHash, dir, listTxt(dir));
+    // 合辑重新生成会覆盖年份目录的输出，相关年份须随之重新生成
+    return rootStale || isStale(yr, yearHashes[yr]);
+  });
 
-    var yearCount = 0;
-    txts.forEach(function(t) {
-      var n = processFile(path.join(yearDir, t), true);
-      yearCount += n;
+  // 当前仍有源文件的单元的输出目录：源文件已删除的年份不再计入，其目录由调用方清理
+  function liveOutputs() {
+    if (yearFilter) return null;
+    var live = {};
+    ['_root'].concat(years).forEach(function(u) {
+      ((manifest.units[u] || {}).outputs || []).forEach(function(d) { live[d] = true; });
     });
+    return Object.keys(live).sort();
+  }
 
-    if (yearCount > 0) {
-      console.log('  [' + yr + '] ' + txts.length + ' 个文件 → ' + yearCount + ' 个训练');
+  var skipped = (rootStale ? 0 : 1) + years.length - staleYears.length;
+  if (!rootStale && !staleYears.length) {
+    console.log('  历史合辑未变化，跳过（' + (years.length + 1) + ' 个单元）');
+    return Promise.resolve({ total: 0, changed: 0, skipped: skipped, outputs: liveOutputs() });
+  }
+
+  // ── 重新生成 ────────────────────────────────────────────────────────────────
+  loadModules();
+  var total = 0;
+  var changed = 0;
+
+  // 先处理根目录合辑文件（后处理的年份子目录文件会覆盖它）
+  if (rootStale) {
+    var rootRes = processRootFiles(rootFiles);
+    total += rootRes.count;
+    changed++;
+    // --year 时合辑只写出了部分年份，不能记为最新
+    if (!yearFilter) {
+      manifest.units._root = { hash: rootHash, outputs: rootRes.outputs, removed: rootRes.removed };
     }
-    total += yearCount;
-  });
+  }
+
+  // 年份目录：变化的单元不多时直接在当前线程处理，省去线程启动开销
+  var pending = (threadCount > 1 && staleYears.length > 1)
+    ? processYearsParallel(staleYears, threadCount)
+    : Promise.resolve().then(function() {
+        var res = {};
+        staleYears.forEach(function(yr) { res[yr] = processYearDir(yr); });
+        return res;
+      });
 
-  console.log('\n共写出 ' + total + ' 个训练的 training.json');
+  return pending.then(function(results) {
+    staleYears.forEach(function(yr) {
+      var res = results[yr];
+      res.logs.forEach(function(line) { console.log(line); });
+      total += res.count;
+      changed++;
+      if (!yearFilter) {
+        manifest.units[yr] = { hash: yearHashes[yr], outputs: res.outputs, removed: res.removed };
+      }
+    });
+
+    if (!yearFilter) {
+      // 只保留本次仍存在的源文件与年份单元的记录
+      manifest.files = files;
+      Object.keys(manifest.units).forEach(function(u) {
+        if (u !== '_root' && years.indexOf(u) < 0) delete manifest.units[u];
+      });
+      saveManifest(manifest);
+    }
+
+    console.log('\n共写出 ' + total + ' 个训练的 training.json（重新生成 '
+      + changed + ' 个单元，跳过 ' + skipped + ' 个）');
+    return { total: total, changed: changed, skipped: skipped, outputs: liveOutputs() };
+  });
 }
 
-main();
+module.exports = { run: run };
+
+// ── 命令行入口 ────────────────────────────────────────────────────────────────
+if (!threads.isMainThread && threads.workerData && threads.workerData.btjYearWorker) {
+  yearThreadMain();
+} else if (require.main === module) {
+  var cli = {};
+  for (var ai = 2; ai < process.argv.length; ai++) {
+    if (process.argv[ai] === '--year' && process.argv[ai + 1]) {
+      cli.year = process.argv[++ai];
+    } else if (process.argv[ai] === '--threads' && process.argv[ai + 1]) {
+      cli.threads = parseInt(process.argv[++ai], 10);
+    } else if (process.argv[ai] === '--exclude' && process.argv[ai + 1]) {
+      cli.exclude = process.argv[++ai].split(',').filter(Boolean);
+    } else if (process.argv[ai] === '--force') {
+      cli.force = true;
+    }
+  }
+  run(cli).catch(function(e) {
+    console.error(e.message);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,152 @@
+/**
+ * cx-env.js — Node 构建脚本共用的浏览器环境 shim 与前端模块加载
+ *
+ * 前端 IIFE 模块（txt-importer / ref-detector / training-enricher / epub-importer）在 require
+ * 时捕获 window，因此同一进程（或 worker 线程）内只能初始化一次环境；setup() 幂等，
+ * 后续调用直接返回已加载的模块。
+ *
+ * 用法:
+ *   var env = require('./cx-env').setup({ dom: true });   // dom: 需要 EPUB（jsdom）
+ *   env.imp.parseSingleTraining(...)
+ */
+
+'use strict';
+
+var fs   = require('fs');
+var path = require('path');
+
+var ROOT     = path.resolve(__dirname, '..');
+var JS_DIR   = path.join(ROOT, 'src', 'static', 'js');
+var TXT_IMP  = path.join(JS_DIR, 'txt-importer.js');
+var REF_DET  = path.join(JS_DIR, 'ref-detector.js');
+var ENRICHER = path.join(JS_DIR, 'training-enricher.js');
+var EPUB_IMP = path.join(JS_DIR, 'epub-importer.js');
+
+var _env = null;
+
+/** 尝试创建 jsdom 窗口；jsdom 未安装时返回 null。 */
+function createDomWindow() {
+  var jsdom;
+  try { jsdom = require('jsdom'); } catch (e) { return null; }
+  var dom = new jsdom.JSDOM('<!DOCTYPE html><html><body></body></html>');
+  global.document = dom.window.document;
+  global.DOMParser = dom.window.DOMParser;
+  global.XMLSerializer = dom.window.XMLSerializer;
+  global.Text = dom.window.Text;
+  global.Element = dom.window.Element;
+  global.Node = dom.window.Node;
+  global.NodeList = dom.window.NodeList;
+  global.HTMLElement = dom.window.HTMLElement;
+  global.HTMLParagraphElement = dom.window.HTMLParagraphElement;
+  global.XMLHttpRequest = dom.window.XMLHttpRequest;
+  // JSZip：npm 包直接 require，手动注册到 window（epub-importer.js 通过 win.JSZip 使用）
+  dom.window.JSZip = require('jszip');
+  return dom.window;
+}
+
+/**
+ * 初始化全局环境并加载前端模块（幂等）。
+ *
+ * @param {{dom?: boolean}} opts  dom=true 时尝试用 jsdom 模拟浏览器并加载 epub-importer.js
+ * @returns {{imp, ref, enr, epub}}  epub 在 jsdom 不可用或未请求时为 null
+ */
+function setup(opts) {
+  if (_env) return _env;
+  var wantDom = !!(opts && opts.dom);
+
+  global.window = (wantDom && createDomWindow()) || {};
+  // localforage 模拟（Node.js 不需要持久化）
+  global.localforage = {
+    getItem:    function() { return Promise.resolve(null); },
+    setItem:    function(k, v) { return Promise.resolve(v); },
+    removeItem: function() { return Promise.resolve(); }
+  };
+
+  require(TXT_IMP);
+  require(REF_DET);
+  require(ENRICHER);
+  if (global.window.DOMParser || global.window.document) require(EPUB_IMP);
+
+  _env = {
+    imp:  global.window.CXLocalImport || null,
+    ref:  global.window.CXRef || null,
+    enr:  global.window.CXEnricher || null,
+    epub: global.window.CXEpubImport || null
+  };
+  return _env;
+}
+
+// ── 共用工具函数 ──────────────────────────────────────────────────────────────
+
+/** 规范化出处缩写（与 Python generator._normalize_source_abbr 一致） */
+function normalizeSourceAbbr(text) {
+  return text.replace(/李常受文集/g, 'CWWL').replace(/生命读经/g, 'L-S');
+}
+
+/** 当前时间版本号 YYYYMMDDHHMMSS */
+function getNowVersion() {
+  var d = new Date();
+  function pad2(n) { return n < 10 ? '0' + n : '' + n; }
+  return '' + d.getFullYear()
+    + pad2(d.getMonth() + 1) + pad2(d.getDate())
+    + pad2(d.getHours()) + pad2(d.getMinutes()) + pad2(d.getSeconds());
+}
+
+/** 从文件夹名提取 year/month */
+function extractYearSeasonFromFolder(folderName) {
+  var m = folderName.match(/^(\d{4})-(\d{2})/);
+  if (m) {
+    return { year: parseInt(m[1], 10), month: parseInt(m[2], 10) };
+  }
+  return null;
+}
+
+/** 复制标语诗歌图片到 output/images/，返回相对路径列表 */
+function copyMottoSongImages(srcFolder, dstOutputDir) {
+  var images = [];
+  var entries = fs.readdirSync(srcFolder);
+  var songFiles = entries
+    .filter(function(f) {
+      return /^标语诗歌/.test(f) && /\.(png|jpe?g|webp|gif)$/i.test(f);
+    })
+    .sort();
+
+  if (!songFiles.length) return images;
+
+  var imgDir = path.join(dstOutputDir, 'images');
+  fs.mkdirSync(imgDir, { recursive: true });
+
+  songFiles.forEach(function(fname) {
+    var src = path.join(srcFolder, fname);
+    var dst = path.join(imgDir, fname);
+    fs.copyFileSync(src, dst);
+    images.push('images/' + fname);
+  });
+
+  return images;
+}
+
+// bible-text.json key 集合缓存：{ path: { mtimeMs, keys } }，文件更新后自动重新读取
+var _bibleKeysCache = {};
+
+/** 读取 <outputRoot>/data/bible-text.json 的 key 集合（用于过滤已有经文）。 */
+function getBibleKeys(outputRoot) {
+  var p = path.join(outputRoot, 'data', 'bible-text.json');
+  if (!fs.existsSync(p)) return new Set();
+  var mtimeMs = fs.statSync(p).mtimeMs;
+  var cached = _bibleKeysCache[p];
+  if (cached && cached.mtimeMs === mtimeMs) return cached.keys;
+  var keys = new Set(Object.keys(JSON.parse(fs.readFileSync(p, 'utf8'))));
+  _bibleKeysCache[p] = { mtimeMs: mtimeMs, keys: keys };
+  return keys;
+}
+
+module.exports = {
+  ROOT: ROOT,
+  setup: setup,
+  normalizeSourceAbbr: normalizeSourceAbbr,
+  getNowVersion: getNowVersion,
+  extractYearSeasonFromFolder: extractYearSeasonFromFolder,
+  copyMottoSongImages: copyMottoSongImages,
+  getBibleKeys: getBibleKeys
+};
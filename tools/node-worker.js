@@ -0,0 +1,192 @@
+#!/usr/bin/env node
+/**
+ * node-worker.js — 常驻 Node 构建进程（供 Python 端 src/node_worker.py 调用）
+ *
+ * 整次构建只启动一次 Node：前端模块（txt-importer / ref-detector / training-enricher /
+ * epub-importer）在每个工作线程里只加载一次，之后的所有批次都复用，
+ * 省去每个批次重新启动 node、重新 require 的开销。
+ *
+ * 协议（每行一个 JSON，UTF-8）:
+ *   stdin  ← {"id": 1, "method": "build-batch-txt", "params": {...}}
+ *   stdout → {"id": 1, "result": {...}, "log": ["..."]}
+ *            {"id": 1, "error": {"message": "..."}, "log": ["..."]}
+ *
+ * 方法:
+ *   build-batch-txt       params 同 tools/build-batch-txt.js    run(opts)
+ *   build-batch-epub      params 同 tools/build-batch-epub.js   run(opts)
+ *   enrich                params 同 tools/enrich-training.js    run(opts)
+ *   build-trainings-json  params 同 tools/build-trainings-json.js run(opts)
+ *
+ * 多个请求可同时在途，由 worker_threads 线程池并发执行（--threads N，默认 min(4, CPU 数)）；
+ * 每个线程同一时刻只处理一个请求，请求内的 console 输出收集到 log 中随响应返回。
+ * stdin 关闭且在途请求全部完成后进程退出。
+ *
+ * 用法:
+ *   node tools/node-worker.js [--threads N]
+ */
+
+'use strict';
+
+var os       = require('os');
+var readline = require('readline');
+var threads  = require('worker_threads');
+
+var METHODS = {
+  'build-batch-txt':      './build-batch-txt',
+  'build-batch-epub':     './build-batch-epub',
+  'enrich':               './enrich-training',
+  'build-trainings-json': './build-trainings-json'
+};
+
+// ── 工作线程：执行单个请求 ────────────────────────────────────────────────────
+function workerMain() {
+  var log = null;
+
+  // 线程启动时一次性加载全部前端模块（含 EPUB 所需的 jsdom 环境；jsdom 未安装时只加载 TXT 相关模块）
+  require('./cx-env').setup({ dom: true });
+
+  // 请求执行期间的 console 输出收集到 log（不能写 stdout：stdout 是协议通道）
+  ['log', 'info', 'warn', 'error'].forEach(function(level) {
+    console[level] = function() {
+      var line = Array.prototype.map.call(arguments, String).join(' ');
+      if (log) log.push(line);
+      else process.stderr.write(line + '\n');
+    };
+  });
+
+  threads.parentPort.on('message', function(req) {
+    log = [];
+    var done = function(reply) {
+      reply.id = req.id;
+      reply.log = log;
+      log = null;
+      threads.parentPort.postMessage(reply);
+    };
+    Promise.resolve().then(function() {
+      return require(METHODS[req.method]).run(req.params || {});
+    }).then(function(result) {
+      done({ result: result === undefined ? null : result });
+    }, function(err) {
+      done({ error: { message: (err && err.message) || String(err) } });
+    });
+  });
+}
+
+// ── 主线程：读取请求、分派到线程池、写回响应 ────────────────────────────────
+function main() {
+  var size = Math.min(4, os.cpus().length || 1);
+  for (var ai = 2; ai < process.argv.length; ai++) {
+    if (process.argv[ai] === '--threads' && process.argv[ai + 1]) {
+      size = Math.max(1, parseInt(process.argv[++ai], 10) || 1);
+    }
+  }
+
+  var idle = [];     // 空闲线程
+  var queue = [];    // 等待线程的请求
+  var inFlight = 0;  // 已收到、尚未响应的请求数
+  var closed = false;
+  var pool = [];
+
+  function send(reply) {
+    process.stdout.write(JSON.stringify(reply) + '\n');
+    inFlight--;
+    maybeExit();
+  }
+
+  function maybeExit() {
+    if (closed && inFlight === 0) {
+      pool.forEach(function(w) { w.terminate(); });
+    }
+  }
+
+  function dispatch() {
+    while (idle.length && queue.length) {
+      var w = idle.pop();
+      var req = queue.shift();
+      w.busy = req.id;
+      w.postMessage(req);
+    }
+  }
+
+  // 线程启动即退出（如前端模块加载失败）且已无可用线程时的错误信息：之后的请求直接报错
+  var broken = null;
+
+  function fail(id, message) {
+    send({ id: id, error: { message: message }, log: [] });
+  }
+
+  function spawn() {
+    var w = new threads.Worker(__filename);
+    w.on('message', function(reply) {
+      w.busy = null;
+      w.served++;
+      idle.push(w);
+      send(reply);
+      dispatch();
+    });
+    w.on('error', function(err) {
+      // 未捕获异常：随后必有 'exit'，在那里统一处理
+      w.lastError = err;
+    });
+    w.on('exit', function(code) {
+      // 线程结束（崩溃、线程内 process.exit、或 maybeExit 主动终止）：
+      // 当前请求报错，补一个新线程，避免请求永远得不到响应
+      var id = w.busy;
+      pool.splice(pool.indexOf(w), 1);
+      if (idle.indexOf(w) >= 0) idle.splice(idle.indexOf(w), 1);
+      var reason = w.lastError
+        ? '工作线程异常: ' + (w.lastError.message || w.lastError)
+        : '工作线程意外退出 (exit ' + code + ')';
+      if (id !== null) fail(id, reason);
+      if (closed) return;
+      if (id !== null || w.served) {
+        idle.push(spawn());
+        dispatch();
+      } else if (!pool.length) {
+        broken = reason;
+        process.stderr.write('[node-worker] ' + reason + '\n');
+        while (queue.length) fail(queue.shift().id, reason);
+      }
+    });
+    w.busy = null;
+    w.served = 0;
+    w.lastError = null;
+    pool.push(w);
+    return w;
+  }
+
+  for (var i = 0; i < size; i++) idle.push(spawn());
+
+  var rl = readline.createInterface({ input: process.stdin });
+  rl.on('line', function(line) {
+    if (!line.trim()) return;
+    var req;
+    try {
+      req = JSON.parse(line);
+    } catch (e) {
+      process.stderr.write('[node-worker] 无法解析请求: ' + e.message + '\n');
+      return;
+    }
+    inFlight++;
+    if (!METHODS[req.method]) {
+      fail(req.id, '未知方法: ' + req.method);
+      return;
+    }
+    if (broken) {
+      fail(req.id, broken);
+      return;
+    }
+    queue.push(req);
+    dispatch();
+  });
+  rl.on('close', function() {
+    closed = true;
+    maybeExit();
+  });
+}
+
+if (threads.isMainThread) {
+  main();
+} else {
+  workerMain();
+}
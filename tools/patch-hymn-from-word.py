@@ -74,10 +74,12 @@ def find_morning_docs(folder_path):
     return result
 
 
-def patch_training_json(output_dir, batch_folder):
+def patch_training_json(output_dir, batch_folder, doc_cache=None):
     """
     从晨兴 Word 文档提取诗歌数据，合并到 training.json。
 
+    doc_cache: 可选的 DocumentCache，由调用方（main.py 进程内调用）传入以复用已读取的文档。
+
     Returns:
         dict: 操作摘要（含 patched_chapters 数量）
     """
@@ -105,7 +107,7 @@ def patch_training_json(output_dir, batch_folder):
         print(f"  - {os.path.basename(d)}", file=sys.stderr)
 
     # 创建 ImprovedParser（仅用于晨兴解析和图片提取）
-    parser = ImprovedParser(output_dir=output_dir)
+    parser = ImprovedParser(output_dir=output_dir, doc_cache=doc_cache)
 
     # 创建与 training.json 章节数匹配的 Chapter 对象列表
     chapters = []